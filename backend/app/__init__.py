@@ -10,7 +10,8 @@ def create_app():
         r"/api/*": {
             "origins": "*",
             "methods": ["GET", "POST", "OPTIONS"],
-            "allow_headers": ["Content-Type"]
+            "allow_headers": ["Content-Type", "If-None-Match"],
+            "expose_headers": ["ETag"]
         }
     })
     
@@ -20,5 +21,6 @@ def create_app():
     # Register routes
     from .routes import game
     app.register_blueprint(game.bp)
+    game.init_app(app)
 
     return app 
\ No newline at end of file
@@ -0,0 +1,306 @@
+"""
+ASGI serving mode for Math Crossword Game.
+Serves the same Flask API from an asyncio event loop: ordinary requests run
+the unchanged Flask views on a thread pool, while /api/gameEvents streams are
+held as coroutines, so an idle player connection costs no thread.
+"""
+
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote
+import asyncio
+import io
+import logging
+import sys
+
+from .routes import game as routes
+
+logger = logging.getLogger(__name__)
+
+Headers = List[Tuple[bytes, bytes]]
+
+MAX_BODY = 1024 * 1024  # Request body cap in bytes when the app sets no MAX_CONTENT_LENGTH
+
+class GameASGI:
+    """ASGI application wrapping the Flask app.
+
+    Flask views (including puzzle generation, which itself goes to the
+    puzzle worker processes when configured) run on `threads` worker
+    threads via `run_in_executor`, so the event loop never blocks on them.
+    Event streams subscribe to the shared EventBroker from the loop.
+    Request bodies over the app's MAX_CONTENT_LENGTH are refused with a 413
+    without being read in full.
+    """
+
+    def __init__(self, flask_app=None, threads: int = 32):
+        if flask_app is None:
+            from . import create_app
+            flask_app = create_app()
+        self.flask_app = flask_app
+        self.max_body = flask_app.config.get('MAX_CONTENT_LENGTH') or MAX_BODY
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix='asgi-wsgi')
+
+    async def __call__(self, scope: Dict, receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            if scope['path'] == '/api/gameEvents' and scope['method'] == 'GET':
+                if await self._game_events(scope, receive, send):
+                    return
+            await self._wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _wsgi(self, scope: Dict, receive, send) -> None:
+        """Answer a request with the Flask app on the thread pool."""
+        body = await _read_body(receive, self.max_body)
+        if body is None:
+            await _send_too_large(send)
+            return
+        environ = _environ(scope, body)
+        loop = asyncio.get_running_loop()
+        status, headers, content = await loop.run_in_executor(self._executor, self._call_flask, environ)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': content})
+
+    def _call_flask(self, environ: Dict) -> Tuple[int, Headers, bytes]:
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+
+        iterable = self.flask_app(environ, start_response)
+        try:
+            content = b''.join(iterable)
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+        return response['status'], response['headers'], content
+
+    async def _game_events(self, scope: Dict, receive, send) -> bool:
+        """Stream a game's events from the loop; False lets Flask answer (bad or unknown game)."""
+        game_id = parse_qs(scope['query_string'].decode('latin-1')).get('gameId', [None])[0]
+        if not game_id:
+            return False
+        loop = asyncio.get_running_loop()
+        # Lookups may hit the durable store, so keep them off the loop
+        opened = await loop.run_in_executor(self._executor, self._open_stream,
+                                            _environ(scope, b''), game_id, loop)
+        if opened is None:
+            return False
+
+        subscription, version, first, status, headers = opened
+        if subscription is None:
+            # A before_request hook answered instead of the view
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': first})
+            return True
+
+        broker = routes.event_broker
+        disconnect = None
+        try:
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': first, 'more_body': True})
+
+            async def close_on_disconnect():
+                while (await receive())['type'] != 'http.disconnect':
+                    pass
+                broker.unsubscribe(subscription)
+
+            disconnect = asyncio.ensure_future(close_on_disconnect())
+            keepalive = self.flask_app.config.get('GAME_EVENTS_KEEPALIVE', 15)
+            async for frame in subscription.frames(version, keepalive):
+                await send({'type': 'http.response.body', 'body': frame, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        except (ConnectionError, OSError):
+            pass  # Client went away mid-write
+        finally:
+            broker.unsubscribe(subscription)
+            if disconnect is not None:
+                disconnect.cancel()
+        return True
+
+    def _open_stream(self, environ: Dict, game_id: str, loop) -> Optional[Tuple]:
+        """Open a game's stream inside a Flask request context.
+
+        Runs the app's request hooks around the shared route helpers, so the
+        stream gets the same headers (CORS included) and latency metric as
+        the Flask view. Returns (subscription, version, first frame, status,
+        headers), or None if the game is not found. If a before_request hook
+        returns a response, that is the answer, as in Flask: the subscription
+        is None and the frame holds the hook's response body.
+        """
+        app = self.flask_app
+        with app.request_context(environ):
+            rv = app.preprocess_request()
+            if rv is not None:
+                response = app.finalize_request(rv)
+                return None, 0, response.get_data(), response.status_code, _headers(response)
+            game = routes.game_manager.get_game(game_id)
+            if game is None:
+                return None
+            subscription, version, first = routes.open_event_stream(game, loop)
+            response = app.process_response(routes.event_stream_response(iter(())))
+        return subscription, version, first, response.status_code, _headers(response)
+
+def _headers(response) -> Headers:
+    return [(name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in response.headers.items()]
+
+async def _read_body(receive, limit: Optional[int] = None) -> Optional[bytes]:
+    """Read the request body; None as soon as it exceeds `limit` bytes."""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request':
+            break
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if limit is not None and size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+async def _send_too_large(send) -> None:
+    await send({'type': 'http.response.start', 'status': 413,
+                'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': b'{"error":"Request body too large"}\n'})
+
+def _environ(scope: Dict, body: bytes) -> Dict:
+    """Build a WSGI environ for an ASGI HTTP scope."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+    for name, value in scope.get('headers', []):
+        key = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if key == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif key != 'CONTENT_LENGTH':
+            key = f'HTTP_{key}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+async def _handle_connection(application, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                             max_body: int = MAX_BODY) -> None:
+    """Serve one HTTP/1.1 request on a connection, then close it; bodies over `max_body` get a 413."""
+    try:
+        request_line = await reader.readline()
+        if not request_line:
+            return
+        method, target, version = request_line.decode('latin-1').split()
+        headers: Headers = []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers.append((name.strip().lower().encode('latin-1'), value.strip().encode('latin-1')))
+        length = int(dict(headers).get(b'content-length', b'0'))
+        if length < 0:
+            raise ValueError(f'Invalid content-length {length}')
+        if length > max_body:
+            # Refuse before reading; the connection is closed right after
+            writer.write(b'HTTP/1.1 413 Request Entity Too Large\r\nContent-Length: 0\r\n'
+                         b'Connection: close\r\n\r\n')
+            await writer.drain()
+            return
+        body = await reader.readexactly(length) if length else b''
+
+        path, _, query = target.partition('?')
+        peer = writer.get_extra_info('peername') or ('', 0)
+        sock = writer.get_extra_info('sockname') or ('', 0)
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': version.split('/', 1)[1],
+            'method': method,
+            'scheme': 'http',
+            'path': unquote(path),
+            'raw_path': path.encode('latin-1'),
+            'query_string': query.encode('latin-1'),
+            'root_path': '',
+            'headers': headers,
+            'client': peer[:2],
+            'server': sock[:2]
+        }
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await reader.read()  # Returns at EOF, when the client goes away
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                lines = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}']
+                lines += [f'{name.decode("latin-1")}: {value.decode("latin-1")}'
+                          for name, value in message.get('headers', [])]
+                lines.append('Connection: close')
+                writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+            elif message['type'] == 'http.response.body':
+                writer.write(message.get('body', b''))
+                await writer.drain()
+
+        await application(scope, receive, send)
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+        logger.debug('Connection ended: %s', e)
+    finally:
+        writer.close()
+
+def serve(application, host: str = '0.0.0.0', port: int = 5001, backlog: int = 4096) -> None:
+    """Run an ASGI application on a minimal asyncio HTTP/1.1 server.
+
+    One request per connection and no TLS: meant for development and
+    benchmarks where no ASGI server such as uvicorn is installed. Request
+    bodies are capped at the application's `max_body` (MAX_BODY if unset).
+    """
+    max_body = getattr(application, 'max_body', MAX_BODY)
+
+    async def main():
+        server = await asyncio.start_server(
+            lambda reader, writer: _handle_connection(application, reader, writer, max_body),
+            host, port, backlog=backlog)
+        logger.info('Serving ASGI on %s:%s', host, port)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+def create_asgi_app(threads: int = 32) -> GameASGI:
+    """Create the ASGI application around a new Flask app."""
+    return GameASGI(threads=threads)
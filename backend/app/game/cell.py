@@ -0,0 +1,108 @@
+"""
+Grid cell model for Math Crossword Game.
+Compact slotted cell used by the generator and game state; the JSON shape
+the frontend expects is only produced by `to_dict` at the API boundary.
+"""
+
+from typing import Dict, Optional, Tuple
+
+class Cell:
+    """A single grid cell.
+
+    Uses `__slots__` instead of a per-cell dict. For callers written against
+    the dict representation, cells also support read/write access keyed by the
+    JSON field names (`cell['value']`, `cell.get('isFixed')`).
+    """
+
+    __slots__ = ('value', 'is_operator', 'operator', 'is_fixed', 'is_result',
+                 'is_empty', 'in_equation', 'is_correct', 'is_incorrect')
+
+    # JSON field name -> attribute name, in the order the frontend receives them
+    FIELDS = {
+        'value': 'value',
+        'isOperator': 'is_operator',
+        'operator': 'operator',
+        'isFixed': 'is_fixed',
+        'isResult': 'is_result',
+        'isEmpty': 'is_empty',
+        'inEquation': 'in_equation',
+        'isCorrect': 'is_correct',
+        'isIncorrect': 'is_incorrect'
+    }
+
+    def __init__(self, value: Optional[int] = None, is_operator: bool = False, operator: Optional[str] = None,
+                 is_fixed: bool = False, is_result: bool = False, is_empty: bool = False,
+                 in_equation: bool = False, is_correct: bool = False, is_incorrect: bool = False):
+        self.value = value
+        self.is_operator = is_operator
+        self.operator = operator
+        self.is_fixed = is_fixed
+        self.is_result = is_result
+        self.is_empty = is_empty
+        self.in_equation = in_equation
+        self.is_correct = is_correct
+        self.is_incorrect = is_incorrect
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Cell':
+        """Build a cell from its JSON representation (missing fields use defaults)."""
+        cell = cls()
+        for key, attr in cls.FIELDS.items():
+            if key in data:
+                setattr(cell, attr, data[key])
+        return cell
+
+    def to_dict(self) -> Dict:
+        """Return the JSON representation of the cell."""
+        return {key: getattr(self, attr) for key, attr in self.FIELDS.items()}
+
+    # Boolean attributes packed into one integer by `to_tuple`, one bit each
+    FLAG_ATTRS = ('is_operator', 'is_fixed', 'is_result', 'is_empty',
+                  'in_equation', 'is_correct', 'is_incorrect')
+
+    def to_tuple(self) -> Tuple[Optional[int], Optional[str], int]:
+        """Return a compact (value, operator, flags) form for storage."""
+        flags = 0
+        for bit, attr in enumerate(self.FLAG_ATTRS):
+            if getattr(self, attr):
+                flags |= 1 << bit
+        return self.value, self.operator, flags
+
+    @classmethod
+    def from_tuple(cls, packed) -> 'Cell':
+        """Build a cell from the form returned by `to_tuple`."""
+        value, operator, flags = packed
+        cell = cls(value=value, operator=operator)
+        for bit, attr in enumerate(cls.FLAG_ATTRS):
+            setattr(cell, attr, bool(flags & (1 << bit)))
+        return cell
+
+    def copy(self) -> 'Cell':
+        """Return an independent copy of the cell."""
+        cell = Cell.__new__(Cell)
+        for attr in self.__slots__:
+            setattr(cell, attr, getattr(self, attr))
+        return cell
+
+    def __getitem__(self, key: str):
+        return getattr(self, self.FIELDS[key])
+
+    def __setitem__(self, key: str, value) -> None:
+        setattr(self, self.FIELDS[key], value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS
+
+    def get(self, key: str, default=None):
+        attr = self.FIELDS.get(key)
+        return default if attr is None else getattr(self, attr)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Cell):
+            return NotImplemented
+        return all(getattr(self, attr) == getattr(other, attr) for attr in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'Cell({self.to_dict()})'
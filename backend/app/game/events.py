@@ -0,0 +1,172 @@
+"""
+Game event fan-out for Math Crossword Game.
+Delivers game updates to every subscriber of a game as Server-Sent Events.
+"""
+
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+import asyncio
+import json
+import queue
+import threading
+
+def sse_frame(event: str, data: Union[Dict, bytes], event_id: Optional[int] = None) -> bytes:
+    """Encode one Server-Sent Events frame; `data` may already be single-line JSON bytes."""
+    if not isinstance(data, bytes):
+        data = json.dumps(data, separators=(',', ':')).encode()
+    head = b'' if event_id is None else f'id: {event_id}\n'.encode()
+    return head + f'event: {event}\ndata: '.encode() + data + b'\n\n'
+
+KEEPALIVE = b': keepalive\n\n'
+
+class Subscription:
+    """One subscriber's queue of (version, frame) pairs."""
+
+    _CLOSED = object()
+
+    def __init__(self, game_id: str, max_pending: int):
+        self.game_id = game_id
+        self._queue: 'queue.Queue' = queue.Queue(max_pending)
+        self.closed = False
+
+    def _offer(self, item) -> bool:
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self) -> None:
+        """End the subscription; a blocked `frames` call returns."""
+        self.closed = True
+        while not self._offer(self._CLOSED):
+            try:
+                self._queue.get_nowait()  # Make room for the close marker
+            except queue.Empty:
+                pass
+
+    def frames(self, after_version: int, keepalive: float) -> Iterator[bytes]:
+        """Yield frames newer than `after_version` until the subscription closes.
+
+        Blocks between frames, so an idle subscription costs no CPU; a
+        keep-alive comment is yielded whenever nothing arrives for
+        `keepalive` seconds.
+        """
+        while not self.closed:
+            try:
+                item = self._queue.get(timeout=keepalive)
+            except queue.Empty:
+                yield KEEPALIVE
+                continue
+            if item is self._CLOSED:
+                return
+            version, frame = item
+            if version > after_version:
+                yield frame
+
+class AsyncSubscription(Subscription):
+    """Subscription consumed from an asyncio event loop.
+
+    Publishers run in other threads, so frames are handed to the loop with
+    `call_soon_threadsafe`; a waiting subscriber is a suspended coroutine,
+    not a blocked thread.
+    """
+
+    def __init__(self, game_id: str, max_pending: int, loop: asyncio.AbstractEventLoop):
+        self.game_id = game_id
+        self.closed = False
+        self.max_pending = max_pending
+        self._loop = loop
+        self._queue: 'asyncio.Queue' = asyncio.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def _offer(self, item) -> bool:
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        except RuntimeError:
+            return False  # Loop already closed
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, self._CLOSED)
+        except RuntimeError:
+            pass
+
+    async def frames(self, after_version: int, keepalive: float) -> AsyncIterator[bytes]:
+        """Async counterpart of `Subscription.frames`."""
+        while not self.closed:
+            try:
+                item = await asyncio.wait_for(self._queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE
+                continue
+            if item is self._CLOSED:
+                return
+            with self._pending_lock:
+                self._pending -= 1
+            version, frame = item
+            if version > after_version:
+                yield frame
+
+class EventBroker:
+    """Fans game updates out to subscribers.
+
+    `publish` encodes an update once and hands the same bytes to every
+    subscriber of the game. A subscriber whose queue is full (a client not
+    keeping up) is closed instead of blocking the publisher; the client
+    reconnects and starts again from a fresh snapshot.
+    """
+
+    def __init__(self, max_pending: int = 64):
+        self.max_pending = max_pending
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, game_id: str, loop: Optional[asyncio.AbstractEventLoop] = None) -> Subscription:
+        """Subscribe to a game; pass the running event loop for an AsyncSubscription."""
+        if loop is not None:
+            subscription = AsyncSubscription(game_id, self.max_pending, loop)
+        else:
+            subscription = Subscription(game_id, self.max_pending)
+        with self._lock:
+            self._subscribers.setdefault(game_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.game_id, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.game_id, None)
+        subscription.close()
+
+    def has_subscribers(self, game_id: str) -> bool:
+        return game_id in self._subscribers
+
+    def subscriber_count(self, game_id: Optional[str] = None) -> int:
+        with self._lock:
+            if game_id is not None:
+                return len(self._subscribers.get(game_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, game_id: str, event: str, version: int, data: Dict) -> int:
+        """Send an update to every subscriber of a game; return how many got it."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(game_id, ()))
+        if not subscribers:
+            return 0
+        item: Tuple[int, bytes] = (version, sse_frame(event, data, version))
+        delivered = 0
+        for subscription in subscribers:
+            if subscription._offer(item):
+                delivered += 1
+            else:
+                self.unsubscribe(subscription)
+        return delivered
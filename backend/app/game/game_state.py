@@ -3,12 +3,37 @@ Game state management for Math Crossword Game.
 Handles active games and move validation.
 """
 
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List, Set, Tuple
 from dataclasses import dataclass
+from collections import Counter
+import functools
+import heapq
+import threading
 import uuid
 import time
 import logging
 
+from .cell import Cell
+from .number_bank import NumberBank
+from .puzzle_generator import Equation
+from .storage import GameStore
+from ..log import SampledLogger
+from ..metrics import DROPPED_MOVES, STORE_CONFLICTS
+
+logger = logging.getLogger(__name__)
+move_log = SampledLogger(logger)
+
+# (start row, start col, orientation, cells) of one equation
+EquationSlot = Tuple[int, int, str, Tuple[Tuple[int, int], ...]]
+
+def synchronized(method):
+    """Run a GameState method while holding the game's lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 @dataclass
 class Move:
     row: int
@@ -18,173 +43,386 @@ class Move:
 class GameState:
     def __init__(self, grid, equations, number_bank, difficulty):
         self.id = str(uuid.uuid4())
-        self.grid = grid
+        # Cells given in their JSON form are converted to the compact model
+        self.grid: List[List[Cell]] = [
+            [Cell.from_dict(cell) if isinstance(cell, dict) else cell for cell in row]
+            for row in grid
+        ]
         self.equations = equations
-        self.number_bank = list(number_bank)  # Make a copy
+        # Cell -> equations through it, so a move only rechecks those
+        self._cell_equations = self._index_equations()
+        # Completion counters, kept up to date by every mutation
+        self._equation_count = len({slot[:3] for slots in self._cell_equations.values() for slot in slots})
+        self._empty_count = sum(1 for row in self.grid for cell in row
+                                if cell.value is None and cell.in_equation
+                                and not cell.is_operator and not cell.is_fixed)
+        self._valid_equations: Set[Tuple[int, int, str]] = {
+            slot[:3] for slots in self._cell_equations.values() for slot in slots
+            if self._evaluate_equation(slot[3])
+        }
+        self.number_bank = NumberBank(number_bank)
         self.difficulty = difficulty
         self.created_at = time.time()
         self.last_activity = time.time()
         self.moves: List[Move] = []
+        # Incremented on every successful mutation; lets clients detect missed deltas
+        self.version = 0
+        self._changes: Set[Tuple[int, int]] = set()
+        # Guards grid, number bank and version; reentrant so callers can hold it
+        # across a mutation and the serialization of its result
+        self.lock = threading.RLock()
+        # Called with (game, result) after every successful mutation, under the lock
+        self.listeners: List[Callable[['GameState', Dict], None]] = []
+        # When the manager last matched this game against its durable store,
+        # and the stored version local changes are based on (None: not stored)
+        self.synced_at = 0.0
+        self.stored_version: Optional[int] = None
+        # (version, move) of every mutation not in the store yet, clears with
+        # value None; kept only for a manager with a store, see GameStateManager
+        self.unstored_moves: Optional[List[Tuple[int, Move]]] = None
+        # Tells versions of this copy apart from other copies' until stored, see etag
+        self._copy_tag = uuid.uuid4().hex[:8]
+        # (version, body) of the last serialized /api/gameState response
+        self.state_cache: Optional[Tuple[int, bytes]] = None
 
-    def validate_move(self, move: Move) -> Dict:
-        """Validate a move and update game state if valid."""
-        logging.info(f"Validating move: row={move.row}, col={move.col}, value={move.value}")
-        
-        # Check if position is valid
-        if not (0 <= move.row < len(self.grid) and 0 <= move.col < len(self.grid[0])):
-            logging.error("Invalid position")
-            return {
-                'valid': False,
-                'error': 'Invalid position'
-            }
+    @property
+    def is_complete(self) -> bool:
+        """Whether every equation cell is filled and every equation holds."""
+        return (self._equation_count > 0 and self._empty_count == 0
+                and len(self._valid_equations) == self._equation_count)
 
-        # Check if cell exists and is available
-        cell = self.grid[move.row][move.col]
-        if not cell:
-            logging.error("Cell does not exist")
-            return {
-                'valid': False,
-                'error': 'Cell does not exist'
-            }
-        
-        if cell.get('isOperator') or cell.get('isFixed', False):
-            logging.error("Cell is not available for moves")
-            return {
-                'valid': False,
-                'error': 'Cell is not available for moves'
-            }
-        
-        if not cell.get('inEquation', False):
-            logging.error("Cell is not part of an equation")
+    @property
+    def etag(self) -> str:
+        """Entity tag of the current state.
+
+        A version that isn't stored yet may lose to another worker's write
+        of the same version number, so until it is stored its tag names
+        this copy of the game as well and never matches another copy's state.
+        """
+        if self.version == self.stored_version:
+            return f'{self.id}:{self.version}'
+        return f'{self.id}:{self.version}:{self._copy_tag}'
+
+    def to_record(self) -> Dict:
+        """Return a JSON-serializable snapshot of the game for storage."""
+        with self.lock:
             return {
-                'valid': False,
-                'error': 'Cell is not part of an equation'
+                'id': self.id,
+                'grid': [[cell.to_tuple() for cell in row] for row in self.grid],
+                'equations': [eq.to_row() for eq in self.equations],
+                'numberBank': list(self.number_bank),
+                'difficulty': self.difficulty,
+                'createdAt': self.created_at,
+                'lastActivity': self.last_activity,
+                'moves': [[m.row, m.col, m.value] for m in self.moves],
+                'version': self.version
             }
 
-        # Check if number is in number bank
-        if move.value not in self.number_bank:
-            logging.error("Number is not available in number bank")
+    @classmethod
+    def from_record(cls, record: Dict) -> 'GameState':
+        """Rebuild a game from a snapshot produced by `to_record`."""
+        game = cls(
+            grid=[[Cell.from_tuple(cell) for cell in row] for row in record['grid']],
+            equations=[Equation.from_row(eq) for eq in record['equations']],
+            number_bank=record['numberBank'],
+            difficulty=record['difficulty']
+        )
+        game.id = record['id']
+        game.created_at = record['createdAt']
+        game.last_activity = record['lastActivity']
+        game.moves = [Move(*move) for move in record['moves']]
+        game.version = record['version']
+        return game
+
+    @synchronized
+    def validate_move(self, move: Move) -> Dict:
+        """Validate a move and update game state if valid."""
+        move_log.debug('validate_move game=%s row=%s col=%s value=%s', self.id, move.row, move.col, move.value)
+
+        error = self._move_error(move.row, move.col)
+        if not error and move.value not in self.number_bank:
+            error = 'Number is not available in number bank'
+        if error:
+            logger.warning('Move rejected game=%s row=%s col=%s: %s', self.id, move.row, move.col, error)
             return {
                 'valid': False,
-                'error': 'Number is not available in number bank'
+                'error': error
             }
 
         # Apply the move
-        cell['value'] = move.value
-        cell['isEmpty'] = False
-        self.number_bank.remove(move.value)
-        self.moves.append(move)
-        self.last_activity = time.time()
-
-        # Validate affected equations
-        affected_equations = self._validate_equations(move)
-        
-        # Log validation results
-        logging.info(f"Move validation successful. Affected equations: {affected_equations}")
+        self._changes = set()
+        replaced = self.grid[move.row][move.col].value
+        affected_equations = self._place(move)
+        move_log.info('Move applied game=%s affected=%s', self.id, len(affected_equations))
 
-        return {
-            'valid': True,
-            'grid': self.grid,
-            'numberBank': self.number_bank,
-            'affectedEquations': affected_equations
-        }
+        bank_values = [move.value] if replaced is None else [move.value, replaced]
+        return self._mutation_result(affected_equations, bank_values)
 
+    @synchronized
     def clear_cell(self, row: int, col: int) -> Dict:
         """Clear a cell and return its value to the number bank."""
-        logging.info(f"Clearing cell: row={row}, col={col}")
-        
-        # Check if position is valid
-        if not (0 <= row < len(self.grid) and 0 <= col < len(self.grid[0])):
-            logging.error("Invalid position")
+        move_log.debug('clear_cell game=%s row=%s col=%s', self.id, row, col)
+
+        error = self._clear_error(row, col)
+        if not error and self.grid[row][col].value is None:
+            error = 'Cell is already empty'
+        if error:
+            logger.warning('Clear rejected game=%s row=%s col=%s: %s', self.id, row, col, error)
             return {
                 'valid': False,
-                'error': 'Invalid position'
+                'error': error
             }
 
+        self._changes = set()
+        value = self.grid[row][col].value
+        affected_equations = self._clear(row, col)
+        move_log.info('Cell cleared game=%s value=%s', self.id, value)
+
+        return self._mutation_result(affected_equations, [value])
+
+    @synchronized
+    def apply_moves(self, moves: List[Move]) -> Dict:
+        """Apply an ordered list of moves atomically.
+
+        A move with value None clears its cell. Every move is first checked
+        against a dry-run view of the cells and number bank, so either all of
+        them are applied (as a single version bump) or none is, and the result
+        names the index of the first invalid move.
+        """
+        move_log.debug('apply_moves game=%s moves=%s', self.id, len(moves))
+        if not moves:
+            # Nothing changes, so keep the version (and with it ETags and cached bodies)
+            return self._result([], [])
+
+        values: Dict[Tuple[int, int], Optional[int]] = {}
+        bank = Counter(self.number_bank.counts())
+        for index, move in enumerate(moves):
+            position = (move.row, move.col)
+            if move.value is None:
+                error = self._clear_error(move.row, move.col)
+                current = values.get(position, self.grid[move.row][move.col].value) if not error else None
+                if not error and current is None:
+                    error = 'Cell is already empty'
+                if not error:
+                    values[position] = None
+                    bank[current] += 1
+            else:
+                error = self._move_error(move.row, move.col)
+                if not error and bank[move.value] <= 0:
+                    error = 'Number is not available in number bank'
+                if not error:
+                    replaced = values.get(position, self.grid[move.row][move.col].value)
+                    if replaced is not None:
+                        bank[replaced] += 1
+                    values[position] = move.value
+                    bank[move.value] -= 1
+            if error:
+                logger.warning('Batch rejected game=%s index=%s: %s', self.id, index, error)
+                return {
+                    'valid': False,
+                    'error': error,
+                    'index': index
+                }
+
+        self._changes = set()
+        affected: Dict[Tuple[int, int, str], Dict] = {}
+        bank_values = []
+        for move in moves:
+            if move.value is None:
+                bank_values.append(self.grid[move.row][move.col].value)
+                equations = self._clear(move.row, move.col)
+            else:
+                if self.grid[move.row][move.col].value is not None:
+                    bank_values.append(self.grid[move.row][move.col].value)
+                bank_values.append(move.value)
+                equations = self._place(move)
+            for equation in equations:
+                key = (equation['start']['row'], equation['start']['col'], equation['orientation'])
+                affected.pop(key, None)
+                affected[key] = equation  # Keep the state after the last move
+
+        move_log.info('Batch applied game=%s moves=%s affected=%s', self.id, len(moves), len(affected))
+
+        return self._mutation_result(list(affected.values()), bank_values)
+
+    def _move_error(self, row: int, col: int) -> Optional[str]:
+        """Return why a number cannot be placed at (row, col), or None."""
+        # Check if position is valid
+        if not (0 <= row < len(self.grid) and 0 <= col < len(self.grid[0])):
+            return 'Invalid position'
+
+        # Check if cell exists and is available
         cell = self.grid[row][col]
         if not cell:
-            logging.error("Cell does not exist")
-            return {
-                'valid': False,
-                'error': 'Cell does not exist'
-            }
-        
-        if cell.get('isOperator') or cell.get('isFixed', False):
-            logging.error("Cell cannot be cleared")
-            return {
-                'valid': False,
-                'error': 'Cell cannot be cleared'
-            }
+            return 'Cell does not exist'
+        if cell.is_operator or cell.is_fixed:
+            return 'Cell is not available for moves'
+        if not cell.in_equation:
+            return 'Cell is not part of an equation'
+        return None
 
-        value = cell.get('value')
-        if value is not None:
-            cell['value'] = None
-            cell['isEmpty'] = True
-            cell['isCorrect'] = False
-            cell['isIncorrect'] = False
-            self.number_bank.append(value)
-            self.number_bank.sort()  # Keep bank sorted
-            self.last_activity = time.time()
-
-            # Validate affected equations
-            affected_equations = self._validate_equations(Move(row, col, None))
-            
-            logging.info(f"Cell cleared successfully. Value {value} returned to number bank")
+    def _clear_error(self, row: int, col: int) -> Optional[str]:
+        """Return why the cell at (row, col) cannot be cleared, or None."""
+        # Check if position is valid
+        if not (0 <= row < len(self.grid) and 0 <= col < len(self.grid[0])):
+            return 'Invalid position'
 
-            return {
-                'valid': True,
-                'grid': self.grid,
-                'numberBank': self.number_bank,
-                'affectedEquations': affected_equations
-            }
+        cell = self.grid[row][col]
+        if not cell:
+            return 'Cell does not exist'
+        if cell.is_operator or cell.is_fixed:
+            return 'Cell cannot be cleared'
+        return None
+
+    def _place(self, move: Move) -> List[Dict]:
+        """Put a number in a cell and revalidate; the move must already be checked.
 
-        logging.error("Cell is already empty")
+        A number already in the cell goes back to the bank.
+        """
+        cell = self.grid[move.row][move.col]
+        self._changes.add((move.row, move.col))
+        if cell.value is not None:
+            self.number_bank.put(cell.value)
+        else:
+            self._empty_count -= 1
+        cell.value = move.value
+        cell.is_empty = False
+        self.number_bank.take(move.value)
+        self.moves.append(move)
+        if self.unstored_moves is not None:
+            self.unstored_moves.append((self.version + 1, move))
+        self.last_activity = time.time()
+
+        # Validate affected equations
+        return self._validate_equations(move)
+
+    def _clear(self, row: int, col: int) -> List[Dict]:
+        """Empty a filled cell and revalidate; the clear must already be checked."""
+        cell = self.grid[row][col]
+        value = cell.value
+        self._changes.add((row, col))
+        self._empty_count += 1
+        cell.value = None
+        cell.is_empty = True
+        cell.is_correct = False
+        cell.is_incorrect = False
+        self.number_bank.put(value)
+        self.last_activity = time.time()
+        clear = Move(row, col, None)
+        if self.unstored_moves is not None:
+            self.unstored_moves.append((self.version + 1, clear))
+
+        # Validate affected equations
+        return self._validate_equations(clear)
+
+    def _mutation_result(self, affected_equations: List[Dict], bank_values: List[int]) -> Dict:
+        """Bump the version and build the result of a successful mutation.
+
+        Besides the full grid and bank, the result lists the cells whose value
+        or correctness flags changed and the new bank count of each touched
+        value, so callers can send a delta instead of the whole state.
+        """
+        self.version += 1
+        result = self._result(affected_equations, bank_values)
+        for listener in self.listeners:
+            listener(self, result)
+        return result
+
+    def _result(self, affected_equations: List[Dict], bank_values: List[int]) -> Dict:
+        """Build a successful result for the current version."""
+        changes = sorted(self._changes)
+        self._changes = set()
         return {
-            'valid': False,
-            'error': 'Cell is already empty'
+            'valid': True,
+            'grid': self.grid,
+            'numberBank': self.number_bank,
+            'affectedEquations': affected_equations,
+            'version': self.version,
+            'changes': changes,
+            'bankChanges': {value: self.number_bank.count(value) for value in bank_values},
+            'isComplete': self.is_complete
         }
 
+    def _index_equations(self) -> Dict[Tuple[int, int], List[EquationSlot]]:
+        """Map every equation cell to the equations that contain it.
+
+        Uses the generator's equations when the game has them; otherwise the
+        equations are found once by scanning the grid for `a op b = c` runs.
+        """
+        if self.equations:
+            slots = [(eq.position.row, eq.position.col, eq.position.orientation, tuple(eq.cells))
+                     for eq in self.equations]
+        else:
+            slots = self._find_equation_slots()
+        index: Dict[Tuple[int, int], List[EquationSlot]] = {}
+        for slot in slots:
+            for position in slot[3]:
+                index.setdefault(position, []).append(slot)
+        return index
+
+    def _find_equation_slots(self) -> List[EquationSlot]:
+        """Find the 5-cell equation runs in a grid given without equations."""
+        rows, cols = len(self.grid), len(self.grid[0]) if self.grid else 0
+        slots = []
+        for orientation in ('horizontal', 'vertical'):
+            for row in range(rows - (4 if orientation == 'vertical' else 0)):
+                for col in range(cols - (4 if orientation == 'horizontal' else 0)):
+                    positions = tuple((row + i, col) if orientation == 'vertical' else (row, col + i)
+                                      for i in range(5))
+                    cells = [self.grid[r][c] for r, c in positions]
+                    if (all(cell.in_equation for cell in cells)
+                            and cells[1].is_operator and cells[3].operator == '='):
+                        slots.append((row, col, orientation, positions))
+        return slots
+
     def _validate_equations(self, move: Move) -> List[Dict]:
         """Validate equations affected by a move."""
         affected_equations = []
+        for slot in self._cell_equations.get((move.row, move.col), ()):
+            equation = self._validate_equation_at(*slot)
+            if equation:
+                affected_equations.append(equation)
+        return affected_equations
 
-        # Check horizontal equations
-        for col in range(max(0, move.col - 4), min(len(self.grid[0]), move.col + 1)):
-            if col + 4 < len(self.grid[0]):  # Need 5 cells for equation
-                equation = self._validate_equation_at(move.row, col, 'horizontal')
-                if equation:
-                    affected_equations.append(equation)
+    def _validate_equation_at(self, start_row: int, start_col: int, orientation: str,
+                              positions: Tuple[Tuple[int, int], ...]) -> Optional[Dict]:
+        """Validate the equation occupying the given cells."""
+        is_valid = self._evaluate_equation(positions)
+        if is_valid:
+            self._valid_equations.add((start_row, start_col, orientation))
+        else:
+            self._valid_equations.discard((start_row, start_col, orientation))
+        if is_valid is None:
+            return None
 
-        # Check vertical equations
-        for row in range(max(0, move.row - 4), min(len(self.grid), move.row + 1)):
-            if row + 4 < len(self.grid):  # Need 5 cells for equation
-                equation = self._validate_equation_at(row, move.col, 'vertical')
-                if equation:
-                    affected_equations.append(equation)
+        # Update cell states
+        for position in positions:
+            cell = self.grid[position[0]][position[1]]
+            if not cell.is_operator and (cell.is_correct, cell.is_incorrect) != (is_valid, not is_valid):
+                cell.is_correct = is_valid
+                cell.is_incorrect = not is_valid
+                self._changes.add(position)
 
-        return affected_equations
+        return {
+            'start': {'row': start_row, 'col': start_col},
+            'orientation': orientation,
+            'isValid': is_valid
+        }
 
-    def _validate_equation_at(self, start_row: int, start_col: int, orientation: str) -> Optional[Dict]:
-        """Validate equation at given position and orientation."""
-        cells = []
-        for i in range(5):  # X op Y = Z format needs 5 cells
-            row = start_row + (i if orientation == 'vertical' else 0)
-            col = start_col + (i if orientation == 'horizontal' else 0)
-            cell = self.grid[row][col]
-            if not cell or not cell.get('inEquation', False):
-                return None
-            cells.append(cell)
+    def _evaluate_equation(self, positions: Tuple[Tuple[int, int], ...]) -> Optional[bool]:
+        """Return whether the equation in the given cells holds, or None if it is incomplete."""
+        cells = [self.grid[row][col] for row, col in positions]
 
         # Check if this forms a complete equation
-        if not all(cell.get('value') is not None or cell.get('isOperator') for cell in cells):
+        if not all(cell.value is not None or cell.is_operator for cell in cells):
             return None
 
         # Extract values and operator
-        num1 = cells[0].get('value')
-        op = cells[1].get('operator')
-        num2 = cells[2].get('value')
-        equals = cells[3].get('operator')
-        result = cells[4].get('value')
+        num1 = cells[0].value
+        op = cells[1].operator
+        num2 = cells[2].value
+        equals = cells[3].operator
+        result = cells[4].value
 
         if not all([num1 is not None, op, num2 is not None, equals == '=', result is not None]):
             return None
@@ -198,24 +436,72 @@ class GameState:
         elif op == '*':
             expected = num1 * num2
 
-        is_valid = expected == result
+        return expected == result
 
-        # Update cell states
-        for cell in cells:
-            if not cell.get('isOperator'):
-                cell['isCorrect'] = is_valid
-                cell['isIncorrect'] = not is_valid
+class _Shard:
+    """One partition of the active games, with its own lock and expiry heap."""
 
-        return {
-            'start': {'row': start_row, 'col': start_col},
-            'orientation': orientation,
-            'isValid': is_valid
-        }
+    __slots__ = ('games', 'expiry_heap', 'lock')
 
-class GameStateManager:
     def __init__(self):
-        self.active_games: Dict[str, GameState] = {}
+        self.games: Dict[str, GameState] = {}
+        self.expiry_heap: List[Tuple[float, str]] = []
+        self.lock = threading.Lock()
+
+class GameStateManager:
+    """Registry of active games with activity-based expiry.
+
+    Games are spread over `shard_count` shards by game id, each with its own
+    lock, so lookups and creations for different games rarely contend. Moves
+    on a single game are serialized by that game's own lock.
+
+    Expiry is tracked per shard in a min-heap of (deadline, game_id).
+    Deadlines are stamped when pushed and games only ever become more
+    recently active, so a stale entry is simply re-pushed with its new
+    deadline when it reaches the top. Expiring therefore only touches entries
+    whose stamped deadline has passed, instead of scanning every active game.
+
+    With a durable store attached, the shards act as a hot cache: mutated
+    games are marked dirty and written behind in periodic batches, games
+    missing from the cache are loaded from the store, and cached games are
+    re-checked against the stored version at most every
+    `revalidate_interval` seconds so another worker's moves are picked up.
+    Writes are optimistic: a game is only written over the version it was
+    loaded or last written as. If another worker stored the game in between,
+    the stored game is reloaded and the moves not stored yet are replayed on
+    top of it one by one; a move that no longer applies is dropped and logged.
+    """
+
+    def __init__(self, shard_count: int = 16, store: Optional[GameStore] = None):
         self.cleanup_threshold = 3600  # 1 hour in seconds
+        self.sweep_on_access = True  # Disabled while the background sweeper runs
+        # Added to the listeners of every game the manager holds
+        self.game_listeners: List[Callable[[GameState, Dict], None]] = []
+        self._shards = [_Shard() for _ in range(shard_count)]
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_stopped = threading.Event()
+
+        self.store = store
+        self.revalidate_interval = 1.0
+        self._dirty: Dict[str, GameState] = {}
+        self._dirty_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_stopped = threading.Event()
+
+    @property
+    def active_games(self) -> Dict[str, GameState]:
+        """Return a snapshot of all active games keyed by id."""
+        games: Dict[str, GameState] = {}
+        for shard in self._shards:
+            with shard.lock:
+                games.update(shard.games)
+        return games
+
+    def __len__(self) -> int:
+        return sum(len(shard.games) for shard in self._shards)
+
+    def _shard_for(self, game_id: str) -> _Shard:
+        return self._shards[hash(game_id) % len(self._shards)]
 
     def create_game(self, puzzle_data: Dict, difficulty: str) -> GameState:
         """Create a new game state from puzzle data."""
@@ -225,20 +511,228 @@ class GameStateManager:
             number_bank=puzzle_data['numberBank'],
             difficulty=difficulty
         )
-        self.active_games[game.id] = game
+        self._adopt(game)
+        if self.store is not None:
+            self._mark_dirty(game)
         return game
 
     def get_game(self, game_id: str) -> Optional[GameState]:
         """Get game state by ID."""
-        self._cleanup_old_games()
-        return self.active_games.get(game_id)
+        shard = self._shard_for(game_id)
+        if self.sweep_on_access:
+            self._expire_shard(shard, time.time())
+        game = shard.games.get(game_id)
+        if self.store is not None:
+            game = self._load(game_id) if game is None else self._revalidate(game)
+        if game is not None and time.time() - game.last_activity > self.cleanup_threshold:
+            return None  # Expired but not swept yet
+        return game
+
+    def _adopt(self, game: GameState, replace: bool = False) -> GameState:
+        """Put a game in its shard; keeps an already cached game unless `replace`."""
+        game.listeners.extend(self.game_listeners)
+        if self.store is not None:
+            game.listeners.append(self._mark_dirty)
+            if game.unstored_moves is None:
+                game.unstored_moves = []
+        shard = self._shard_for(game.id)
+        with shard.lock:
+            existing = shard.games.get(game.id)
+            if existing is not None and not replace:
+                return existing
+            shard.games[game.id] = game
+            if existing is None:  # A replaced game keeps its heap entry
+                heapq.heappush(shard.expiry_heap, (game.last_activity + self.cleanup_threshold, game.id))
+        return game
+
+    def attach_store(self, store: GameStore, flush_interval: float = 0.5) -> None:
+        """Back the manager with a durable store and start the write-behind flusher."""
+        self.store = store
+        if flush_interval > 0 and (self._flusher is None or not self._flusher.is_alive()):
+            self._flusher_stopped.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, args=(flush_interval,),
+                                             name='game-store-flusher', daemon=True)
+            self._flusher.start()
+
+    def close(self) -> None:
+        """Stop background threads, flush pending games and close the store."""
+        self.stop_sweeper()
+        self._flusher_stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        if self.store is not None:
+            self.flush()
+            self.store.close()
+
+    def flush(self) -> int:
+        """Write all dirty games to the store in one batch; return how many."""
+        if self.store is None:
+            return 0
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+        batch = []
+        for game in dirty.values():
+            with game.lock:
+                batch.append((game.to_record(), game.stored_version))
+        try:
+            conflicts = set(self.store.save_many(batch))
+        except Exception as e:
+            logger.error('Failed to flush %d games: %s', len(batch), e)
+            with self._dirty_lock:
+                for game_id, game in dirty.items():
+                    self._dirty.setdefault(game_id, game)
+            return 0
+        now = time.time()
+        for (record, _), game in zip(batch, dirty.values()):
+            if game.id in conflicts:
+                self._reload(game)
+                continue
+            with game.lock:
+                game.stored_version = record['version']
+                game.unstored_moves = [entry for entry in game.unstored_moves or ()
+                                       if entry[0] > record['version']]
+            game.synced_at = now
+        return len(batch) - len(conflicts)
+
+    def _mark_dirty(self, game: GameState, result: Optional[Dict] = None) -> None:
+        with self._dirty_lock:
+            self._dirty[game.id] = game
+
+    def _flush_loop(self, interval: float) -> None:
+        while not self._flusher_stopped.wait(interval):
+            self.flush()
+            try:
+                self.store.delete_expired(time.time() - self.cleanup_threshold)
+            except Exception as e:
+                logger.error('Failed to delete expired games: %s', e)
+
+    def _load(self, game_id: str) -> Optional[GameState]:
+        """Load a game another worker (or an earlier run) stored."""
+        record = self.store.load(game_id)
+        if record is None or time.time() - record['lastActivity'] > self.cleanup_threshold:
+            return None
+        game = GameState.from_record(record)
+        game.stored_version = game.version
+        game.synced_at = time.time()
+        return self._adopt(game)
+
+    def _revalidate(self, game: GameState) -> GameState:
+        """Reload a cached game if another worker stored a newer version of it."""
+        now = time.time()
+        if now - game.synced_at < self.revalidate_interval:
+            return game
+        stored_version = self.store.load_version(game.id)
+        game.synced_at = now
+        if stored_version is None or stored_version == game.stored_version:
+            return game
+        return self._reload(game)
+
+    def _reload(self, game: GameState) -> GameState:
+        """Replace a cached game with its stored state, replaying local moves on top.
+
+        Moves not stored yet were made on a copy another worker had already
+        moved past. They were acknowledged to the player, so rather than
+        being dropped they are applied again, in order, to the stored game;
+        only those that no longer apply there are dropped. A stale copy that
+        was already replaced has its moves replayed on the cached game.
+        """
+        with self._dirty_lock:
+            if self._dirty.get(game.id) is game:
+                del self._dirty[game.id]
+        shard = self._shard_for(game.id)
+        with game.lock:
+            with shard.lock:
+                current = shard.games.get(game.id)
+            if current is None or current is game:
+                record = self.store.load(game.id)
+                if record is None:
+                    # Deleted from the store meanwhile; write the local game back
+                    game.stored_version = None
+                    self._mark_dirty(game)
+                    return game
+                fresh = GameState.from_record(record)
+                fresh.stored_version = fresh.version
+                fresh.synced_at = time.time()
+                current = self._adopt(fresh, replace=True)
+            pending, game.unstored_moves = game.unstored_moves or [], []
+            if pending:
+                STORE_CONFLICTS.inc()
+                logger.warning('Game %s was changed by another worker; replaying %d local moves on version %s',
+                               game.id, len(pending), current.version)
+                self._replay(current, [move for _, move in pending])
+        return current
+
+    def _replay(self, game: GameState, moves: List[Move]) -> None:
+        """Apply moves made on a stale copy of a game; log each that no longer applies."""
+        for move in moves:
+            if move.value is None:
+                result = game.clear_cell(move.row, move.col)
+            else:
+                result = game.validate_move(move)
+            if not result['valid']:
+                DROPPED_MOVES.inc()
+                logger.warning('Dropped move game=%s row=%s col=%s value=%s after a store conflict: %s',
+                               game.id, move.row, move.col, move.value, result['error'])
+
+    def start_sweeper(self, interval: float) -> None:
+        """Expire games on a background timer so request threads never pay for it."""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self.sweep_on_access = False
+        self._sweeper_stopped.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, args=(interval,),
+                                         name='game-expiry-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self, timeout: Optional[float] = None) -> None:
+        """Stop the background sweeper and go back to expiring on access."""
+        self._sweeper_stopped.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout)
+            self._sweeper = None
+        self.sweep_on_access = True
+
+    def _sweep_loop(self, interval: float) -> None:
+        while not self._sweeper_stopped.wait(interval):
+            self._expire_games()
+
+    def _expire_games(self) -> int:
+        """Remove games whose inactivity exceeds cleanup_threshold; return how many."""
+        current_time = time.time()
+        return sum(self._expire_shard(shard, current_time) for shard in self._shards)
+
+    def _expire_shard(self, shard: _Shard, current_time: float) -> int:
+        removed = 0
+        heap = shard.expiry_heap
+        with shard.lock:  # Other threads pop and push under the lock
+            while heap and heap[0][0] < current_time:
+                _, game_id = heapq.heappop(heap)
+                game = shard.games.get(game_id)
+                if game is None:
+                    continue  # Already removed
+                deadline = game.last_activity + self.cleanup_threshold
+                if deadline < current_time:
+                    del shard.games[game_id]
+                    removed += 1
+                else:
+                    heapq.heappush(heap, (deadline, game_id))
+        return removed
 
     def _cleanup_old_games(self):
-        """Remove inactive games older than cleanup_threshold."""
+        """Remove inactive games older than cleanup_threshold.
+
+        Full scan over every game; also catches games whose last_activity was
+        moved backwards, which the expiry heaps cannot see.
+        """
         current_time = time.time()
-        to_remove = []
-        for game_id, game in self.active_games.items():
-            if current_time - game.last_activity > self.cleanup_threshold:
-                to_remove.append(game_id)
-        for game_id in to_remove:
-            del self.active_games[game_id] 
\ No newline at end of file
+        for shard in self._shards:
+            with shard.lock:
+                to_remove = []
+                for game_id, game in shard.games.items():
+                    if current_time - game.last_activity > self.cleanup_threshold:
+                        to_remove.append(game_id)
+                for game_id in to_remove:
+                    del shard.games[game_id]
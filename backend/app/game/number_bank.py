@@ -0,0 +1,90 @@
+"""
+Number bank for Math Crossword Game.
+Multiset of the numbers a player can still place, with O(1) take and return.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from bisect import insort
+from collections import Counter
+
+class NumberBank:
+    """Multiset of available numbers backed by per-value counts.
+
+    Membership, `take` and `put` are O(1) count updates; only a value's
+    first copy coming in or last copy going out touches the sorted list of
+    distinct values, which is bounded by the range of numbers in a puzzle.
+    The sorted list the frontend expects is built lazily by `to_list` and
+    cached per bank version. Compares equal to a list holding the same
+    numbers in sorted order.
+    """
+
+    __slots__ = ('_counts', '_values', '_size', '_version', '_cached')
+
+    def __init__(self, values: Iterable[int] = ()):
+        self._counts: Counter = Counter(values)
+        self._values: List[int] = sorted(self._counts)
+        self._size = sum(self._counts.values())
+        self._version = 0
+        self._cached: Optional[Tuple[int, List[int]]] = None
+
+    def take(self, value: int) -> None:
+        """Remove one copy of value; raises ValueError if none is left."""
+        count = self._counts.get(value, 0)
+        if count == 0:
+            raise ValueError(f'{value} is not in the number bank')
+        if count == 1:
+            del self._counts[value]
+            self._values.remove(value)
+        else:
+            self._counts[value] = count - 1
+        self._size -= 1
+        self._version += 1
+
+    def put(self, value: int) -> None:
+        """Add one copy of value."""
+        count = self._counts[value]
+        if count == 0:
+            insort(self._values, value)
+        self._counts[value] = count + 1
+        self._size += 1
+        self._version += 1
+
+    def count(self, value: int) -> int:
+        return self._counts.get(value, 0)
+
+    def counts(self) -> Dict[int, int]:
+        """Return a copy of the count of each available value."""
+        return dict(self._counts)
+
+    def to_list(self) -> List[int]:
+        """Return the numbers as a sorted list.
+
+        The list is shared until the next change and never modified after,
+        so callers may keep it as a snapshot but must not mutate it.
+        """
+        cached = self._cached
+        if cached is None or cached[0] != self._version:
+            cached = self._cached = (self._version, [value for value in self._values
+                                                     for _ in range(self._counts[value])])
+        return cached[1]
+
+    def __contains__(self, value) -> bool:
+        return value in self._counts
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.to_list())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, NumberBank):
+            return self._counts == other._counts
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'NumberBank({self.to_list()})'
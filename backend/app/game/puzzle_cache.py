@@ -0,0 +1,90 @@
+"""
+Puzzle cache for Math Crossword Game.
+Memoizes generated puzzles by (seed, difficulty, grid_size) so replaying a seed is cheap.
+"""
+
+from typing import Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import replace, is_dataclass, fields
+import sys
+import threading
+
+def copy_puzzle(puzzle: Dict) -> Dict:
+    """Return a copy of a puzzle that a game can mutate without touching the original."""
+    copied = dict(puzzle)
+    copied['grid'] = [[cell.copy() for cell in row] for row in puzzle['grid']]
+    copied['equations'] = [replace(eq) for eq in puzzle['equations']]
+    copied['numberBank'] = list(puzzle['numberBank'])
+    return copied
+
+def estimate_size(obj, _seen: Optional[set] = None) -> int:
+    """Estimate the memory held by an object graph in bytes."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in obj)
+    elif is_dataclass(obj):
+        size += sum(estimate_size(getattr(obj, f.name), _seen) for f in fields(obj))
+    elif hasattr(obj, '__slots__'):
+        size += sum(estimate_size(getattr(obj, attr), _seen) for attr in obj.__slots__)
+    return size
+
+class PuzzleCache:
+    """Thread-safe LRU cache of generated puzzles bounded by estimated bytes."""
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, Tuple[Dict, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        """Return a fresh copy of the cached puzzle, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            puzzle = entry[0]
+        return copy_puzzle(puzzle)
+
+    def put(self, key: Hashable, puzzle: Dict) -> None:
+        """Store a copy of the puzzle, evicting least recently used entries."""
+        stored = copy_puzzle(puzzle)
+        size = estimate_size(stored)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (stored, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def stats(self) -> Dict:
+        """Return cache size and hit/miss counters."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,179 @@
+"""
+Process-pool puzzle generation for Math Crossword Game.
+Runs the CPU-bound generator in worker processes so it never holds the web
+process's GIL; workers ship back a compact puzzle description only.
+"""
+
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
+import logging
+
+from .cell import Cell
+from .puzzle_generator import Equation, GenerationFailed, PuzzleGenerator
+from ..metrics import GENERATION_FAILURES, record_generation, record_generation_failure
+
+logger = logging.getLogger(__name__)
+
+# Cell.to_tuple() of a blank cell; packed grids leave these out
+_BLANK = Cell().to_tuple()
+
+def pack_puzzle(puzzle: Dict) -> Dict:
+    """Return a compact, picklable description of a generated puzzle.
+
+    Only non-blank cells are listed, as [row, col, value, operator, flags].
+    """
+    return {
+        'cells': [
+            [r, c, *cell.to_tuple()]
+            for r, row in enumerate(puzzle['grid'])
+            for c, cell in enumerate(row)
+            if cell.to_tuple() != _BLANK
+        ],
+        'equations': [eq.to_row() for eq in puzzle['equations']],
+        'numberBank': list(puzzle['numberBank']),
+        'gridSize': puzzle['gridSize'],
+        'difficulty': puzzle['difficulty'],
+        'seed': puzzle['seed']
+    }
+
+def unpack_puzzle(packed: Dict) -> Dict:
+    """Rebuild the puzzle dict `PuzzleGenerator.generate_puzzle` returns."""
+    size = packed['gridSize']
+    grid = [[Cell() for _ in range(size)] for _ in range(size)]
+    for r, c, value, operator, flags in packed['cells']:
+        grid[r][c] = Cell.from_tuple((value, operator, flags))
+    return {
+        'grid': grid,
+        'equations': [Equation.from_row(eq) for eq in packed['equations']],
+        'numberBank': list(packed['numberBank']),
+        'gridSize': size,
+        'difficulty': packed['difficulty'],
+        'seed': packed['seed']
+    }
+
+class ExecutorShutdown(RuntimeError):
+    """Raised when a job is submitted after the executor (or the interpreter) shut down."""
+
+# One generator per worker process, created by the pool initializer
+_worker_generator: Optional[PuzzleGenerator] = None
+
+def _init_worker(grid_size: int) -> None:
+    global _worker_generator
+    _worker_generator = PuzzleGenerator(grid_size)
+
+def _generate_packed(difficulty: str, seed: Optional[int], density: Optional[float] = None,
+                     unique: bool = False) -> Dict:
+    packed = pack_puzzle(_worker_generator.generate_puzzle(difficulty, seed=seed, density=density,
+                                                           unique=unique))
+    # Worker metrics are never exported, so report them with the result
+    packed['stats'] = {
+        'attempts': _worker_generator.attempts,
+        'failedPlacements': _worker_generator.failed_placements,
+        'revealed': _worker_generator.revealed
+    }
+    return packed
+
+def _generate_packed_batch(difficulty: str, seeds: List[int], density: Optional[float] = None,
+                           unique: bool = False) -> List[Optional[Dict]]:
+    """Generate one packed puzzle per seed in a single job; None for seeds that fail.
+
+    Only generation failures are per seed; invalid arguments raise out of the job.
+    """
+    results = []
+    for seed in seeds:
+        try:
+            results.append(_generate_packed(difficulty, seed, density, unique))
+        except GenerationFailed:
+            results.append(None)
+    return results
+
+class PuzzleExecutor:
+    """Generates puzzles in a pool of worker processes.
+
+    Workers are started with the 'spawn' method so they do not inherit the
+    web process's threads and locks. If a job exceeds `timeout` seconds
+    `generate` raises TimeoutError; the job can't be interrupted, so the
+    worker stays busy finishing it in the background and its result is
+    dropped. A seeded puzzle found in `cache`
+    is returned without a round trip, and generated seeded puzzles are added
+    to it. With `unique` every puzzle has exactly one solution.
+    """
+
+    def __init__(self, workers: int = 2, timeout: float = 10.0, grid_size: int = 11, cache=None,
+                 unique: bool = False):
+        self.workers = workers
+        self.timeout = timeout
+        self.grid_size = grid_size
+        self.cache = cache
+        self.unique = unique
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._closed:
+                raise ExecutorShutdown('Puzzle executor is shut down')
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.grid_size,)
+                )
+            return self._executor
+
+    def generate(self, difficulty: str, seed: Optional[int] = None) -> Dict:
+        """Generate a puzzle in a worker process and return it as a full puzzle dict."""
+        # Same keys as PuzzleGenerator, so the two can share a cache
+        key = (seed, difficulty, self.grid_size) + (('unique',) if self.unique else ())
+        if seed is not None and self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        executor = self._get_executor()
+        try:
+            try:
+                future = executor.submit(_generate_packed, difficulty, seed, None, self.unique)
+            except RuntimeError as e:
+                # concurrent.futures shuts every executor down at interpreter exit
+                with self._lock:
+                    self._closed = True
+                raise ExecutorShutdown(str(e)) from e
+            packed = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f'Puzzle generation timed out after {self.timeout} seconds')
+        except GenerationFailed as e:
+            # The worker's counters are never exported; record its stats here
+            record_generation_failure(difficulty, e.failed_placements)
+            raise
+        except ValueError:
+            GENERATION_FAILURES.labels(difficulty=difficulty).inc()
+            raise
+        except BrokenProcessPool:
+            logger.error('Puzzle worker pool broke, restarting it')
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+
+        stats = packed.get('stats')
+        if stats is not None:
+            record_generation(difficulty, stats['attempts'], stats['failedPlacements'])
+        puzzle = unpack_puzzle(packed)
+        if seed is not None and self.cache is not None:
+            self.cache.put(key, puzzle)
+        return puzzle
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._closed = True
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -5,10 +5,19 @@ Handles creation of valid math equations and their placement in the grid.
 
 from typing import List, Tuple, Dict, Set, Optional
 from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
 import random
+import secrets
 import time
 import logging
 
+from .cell import Cell
+from .solver import OPERATIONS, PuzzleSolver
+from ..metrics import record_generation, record_generation_failure
+
+logger = logging.getLogger(__name__)
+
 @dataclass
 class Position:
     row: int
@@ -24,58 +33,265 @@ class Equation:
     result: int
     cells: List[Tuple[int, int]]  # List of (row, col) for each cell in equation
 
+    def to_row(self) -> list:
+        """Return the compact [row, col, orientation, a, operator, b, result] form."""
+        return [self.position.row, self.position.col, self.position.orientation,
+                self.a, self.operator, self.b, self.result]
+
+    @classmethod
+    def from_row(cls, data) -> 'Equation':
+        """Build an equation from the form returned by `to_row`."""
+        row, col, orientation, a, operator, b, result = data
+        cells = [(row, col + i) if orientation == 'horizontal' else (row + i, col) for i in range(5)]
+        return cls(Position(row, col, orientation), a, operator, b, result, cells)
+
+class GridMasks:
+    """Bitboard geometry for a square grid.
+
+    Cell (row, col) is bit `row * grid_size + col` of an integer. A slot mask
+    is the precomputed mask of a slot starting at the top-left corner, shifted
+    to the slot's start cell, so checking a slot against an occupancy board
+    is a single shift and AND.
+    """
+
+    def __init__(self, grid_size: int, length: int = 5):
+        self.grid_size = grid_size
+        self.length = length
+        self.full = (1 << (grid_size * grid_size)) - 1
+        self.units = {
+            'horizontal': sum(1 << i for i in range(length)),
+            'vertical': sum(1 << (i * grid_size) for i in range(length))
+        }
+
+    def cell_bit(self, row: int, col: int) -> int:
+        """Return the bit of a single cell."""
+        return 1 << (row * self.grid_size + col)
+
+    def slot_mask(self, position: Position) -> Optional[int]:
+        """Return the mask of an equation slot, or None if it leaves the grid."""
+        row, col = position.row, position.col
+        end_row, end_col = (row, col + self.length - 1) if position.orientation == 'horizontal' \
+            else (row + self.length - 1, col)
+        if not (0 <= row and 0 <= col and end_row < self.grid_size and end_col < self.grid_size):
+            return None
+        return self.units[position.orientation] << (row * self.grid_size + col)
+
+    def cells_mask(self, cells: List[Tuple[int, int]]) -> Optional[int]:
+        """Return the mask of arbitrary cells, or None if any is outside the grid."""
+        mask = 0
+        for row, col in cells:
+            if not (0 <= row < self.grid_size and 0 <= col < self.grid_size):
+                return None
+            mask |= 1 << (row * self.grid_size + col)
+        return mask
+
+    def cells_of(self, mask: int) -> Set[Tuple[int, int]]:
+        """Decode a mask back into a set of (row, col) cells."""
+        # One pass over the binary digits: linear in the grid area, where
+        # peeling off the lowest bit would copy the whole board per cell
+        bits = bin(mask)[:1:-1]
+        cells = set()
+        i = bits.find('1')
+        while i >= 0:
+            cells.add(divmod(i, self.grid_size))
+            i = bits.find('1', i + 1)
+        return cells
+
+@lru_cache(maxsize=None)
+def grid_masks(grid_size: int) -> GridMasks:
+    """Return the shared bitboard geometry for a grid size."""
+    return GridMasks(grid_size)
+
+class SlotIndex:
+    """Index of the 5-cell equation slots that are still free.
+
+    Slots are keyed by their start cell per orientation. Placing an equation
+    only drops the slots that overlap its cells, and a random free slot is
+    picked in O(1) from a list with swap-remove deletion.
+    """
+
+    ORIENTATIONS = ('horizontal', 'vertical')
+
+    def __init__(self, starts: List[Tuple[int, int]], length: int = 5):
+        self.length = length
+        self._slots: Dict[str, List[Tuple[int, int]]] = {}
+        self._index: Dict[str, Dict[Tuple[int, int], int]] = {}
+        for orientation in self.ORIENTATIONS:
+            self._slots[orientation] = list(starts)
+            self._index[orientation] = {start: i for i, start in enumerate(starts)}
+
+    def count(self, orientation: str) -> int:
+        """Return the number of free slots for an orientation."""
+        return len(self._slots[orientation])
+
+    def choice(self, orientation: str, rng=random) -> Optional[Position]:
+        """Return a random free slot, or None if there is none."""
+        slots = self._slots[orientation]
+        if not slots:
+            return None
+        row, col = slots[rng.randrange(len(slots))]
+        return Position(row, col, orientation)
+
+    def occupy(self, cells: List[Tuple[int, int]]) -> None:
+        """Drop every slot that overlaps one of the given cells."""
+        for row, col in cells:
+            for i in range(self.length):
+                self._discard('horizontal', (row, col - i))
+                self._discard('vertical', (row - i, col))
+
+    def _discard(self, orientation: str, start: Tuple[int, int]) -> None:
+        index = self._index[orientation]
+        i = index.pop(start, None)
+        if i is None:
+            return
+        slots = self._slots[orientation]
+        last = slots.pop()
+        if i < len(slots):
+            slots[i] = last
+            index[last] = i
+
+def build_equation_index(valid_equations: Dict[str, Tuple[Tuple[int, int, int], ...]]
+                         ) -> Dict[Tuple[str, int, int], Tuple[Tuple[int, int, int], ...]]:
+    """Index equations by (operator, number slot, value).
+
+    Number slot 0 is the first operand, 1 the second operand and 2 the result,
+    i.e. equation cell index // 2. Candidates keep the order of valid_equations.
+    """
+    index: Dict[Tuple[str, int, int], List[Tuple[int, int, int]]] = {}
+    for operator, equations in valid_equations.items():
+        for equation in equations:
+            for slot, value in enumerate(equation):
+                index.setdefault((operator, slot, value), []).append(equation)
+    return {key: tuple(candidates) for key, candidates in index.items()}
+
+def build_intersection_table(equation_index: Dict[Tuple[str, int, int], Tuple[Tuple[int, int, int], ...]]
+                             ) -> Dict[Tuple[str, int, str, int], Tuple[int, ...]]:
+    """Map (operator1, slot1, operator2, slot2) to the values both equations can share."""
+    values_by_slot: Dict[Tuple[str, int], Set[int]] = {}
+    for operator, slot, value in equation_index:
+        values_by_slot.setdefault((operator, slot), set()).add(value)
+    return {
+        (op1, slot1, op2, slot2): tuple(sorted(values1 & values2))
+        for (op1, slot1), values1 in values_by_slot.items()
+        for (op2, slot2), values2 in values_by_slot.items()
+    }
+
+class GenerationFailed(ValueError):
+    """Raised when no valid pattern is found; carries the work spent on it.
+
+    Picklable, so puzzle worker processes can report the stats with the failure.
+    """
+
+    def __init__(self, message: str, attempts: int = 0, failed_placements: int = 0):
+        super().__init__(message)
+        self.attempts = attempts
+        self.failed_placements = failed_placements
+
+    def __reduce__(self):
+        return type(self), (self.args[0], self.attempts, self.failed_placements)
+
 class PuzzleGenerator:
-    OPERATORS = ['+', '-', '*']
+    OPERATORS = ('+', '-', '*')
     
     # Pre-computed valid equations for each operator with numbers 1-15
     VALID_EQUATIONS = {
-        '+': [(a, b, a + b) for a in range(1, 10) for b in range(1, 10) if a + b <= 15],
-        '-': [(a, b, a - b) for a in range(2, 16) for b in range(1, a) if a - b <= 15],
-        '*': [(a, b, a * b) for a in range(1, 6) for b in range(1, 6) if a * b <= 15]
+        '+': tuple((a, b, a + b) for a in range(1, 10) for b in range(1, 10) if a + b <= 15),
+        '-': tuple((a, b, a - b) for a in range(2, 16) for b in range(1, a) if a - b <= 15),
+        '*': tuple((a, b, a * b) for a in range(1, 6) for b in range(1, 6) if a * b <= 15)
     }
 
-    def __init__(self, grid_size: int = 11):  # Increased to 11x11
+    # Lookup tables: (operator, slot, value) -> equations, and shared values per slot pair.
+    # Shared by every generator, so exposed read-only
+    EQUATION_INDEX = MappingProxyType(build_equation_index(VALID_EQUATIONS))
+    INTERSECTION_VALUES = MappingProxyType(build_intersection_table(EQUATION_INDEX))
+
+    # Equations per puzzle below LARGE_GRID_SIZE
+    EQUATION_TARGETS = {'easy': 3, 'medium': 6, 'hard': 10}
+    # From LARGE_GRID_SIZE up, the share of grid cells covered by equations
+    LARGE_GRID_SIZE = 25
+    DENSITY_TARGETS = {'easy': 0.2, 'medium': 0.3, 'hard': 0.4}
+    MAX_DENSITY = 0.5  # Random packing jams not far above this
+    MIN_GRID_SIZE = 5  # Fits one equation
+
+    def __init__(self, grid_size: int = 11, cache=None):  # Increased to 11x11
         self.grid_size = grid_size
-        self.grid: List[List[Optional[Dict]]] = []
+        self.cache = cache  # Optional PuzzleCache of seeded puzzles, keyed by (seed, difficulty, grid_size)
+        self.seed: Optional[int] = None
+        self._rng = random.Random()
+        self.grid: List[List[Cell]] = []
         self.equations: List[Equation] = []
-        self.empty_cells: Set[Tuple[int, int]] = set()
-        self.intersection_points: Set[Tuple[int, int]] = set()
-        self._used_cells: Set[Tuple[int, int]] = set()
+        self.attempts = 0  # Pattern attempts used by the last generated puzzle
+        self.failed_placements = 0  # Equation placements rejected while generating it
+        self.revealed = 0  # Hidden numbers given back to make the last puzzle unique
+        self._masks = grid_masks(grid_size)
+        # Bitboards of cells used by equations, hidden cells and intersections
+        self._occupied = 0
+        self._empty = 0
+        self._intersections = 0
 
     @property
     def used_cells(self) -> Set[Tuple[int, int]]:
         """Return the set of used cells in the grid."""
-        if not self._used_cells:
-            self._used_cells = set()
-            for row in range(self.grid_size):
-                for col in range(self.grid_size):
-                    if self.grid[row][col] and self.grid[row][col].get('inEquation', False):
-                        self._used_cells.add((row, col))
-        return self._used_cells
-
-    def generate_puzzle(self, difficulty: str) -> Dict:
-        """Generate a complete puzzle based on difficulty level."""
-        logging.info(f"\n{'='*20}\nStarting puzzle generation with difficulty: {difficulty}\n{'='*20}")
+        return self._masks.cells_of(self._occupied)
+
+    @property
+    def empty_cells(self) -> Set[Tuple[int, int]]:
+        """Return the set of hidden (empty) cells in the grid."""
+        return self._masks.cells_of(self._empty)
+
+    @property
+    def intersection_points(self) -> Set[Tuple[int, int]]:
+        """Return the set of cells shared by two equations."""
+        return self._masks.cells_of(self._intersections)
+
+    def generate_puzzle(self, difficulty: str, seed: Optional[int] = None,
+                        density: Optional[float] = None, unique: bool = False) -> Dict:
+        """Generate a complete puzzle based on difficulty level.
+
+        The same seed, difficulty, grid size and density always produce the
+        same puzzle. Without a seed a random one is drawn; either way it is
+        returned as 'seed'. `density` is the share of grid cells to cover
+        with equations; by default small grids get a fixed equation count
+        per difficulty and grids from LARGE_GRID_SIZE up get DENSITY_TARGETS.
+        With `unique` the solver checks the hidden numbers, and while more
+        than one fill is possible an ambiguous cell is revealed again.
+        """
+        if density is not None and not 0 < density <= self.MAX_DENSITY:
+            raise ValueError(f'Density must be in (0, {self.MAX_DENSITY}], got {density}')
+        # A random seed is never asked for again, so only seeded puzzles are cached
+        cache = self.cache if seed is not None else None
+        if seed is None:
+            seed = secrets.randbelow(2 ** 32)
+        self.attempts = 0
+        self.failed_placements = 0
+        self.revealed = 0
+        key = (seed, difficulty, self.grid_size) if density is None else \
+            (seed, difficulty, self.grid_size, density)
+        if unique:
+            key += ('unique',)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                logger.debug('Puzzle cache hit seed=%s difficulty=%s', seed, difficulty)
+                return cached
+
+        logger.debug('Starting puzzle generation difficulty=%s seed=%s', difficulty, seed)
+        self.seed = seed
+        self._rng = random.Random(seed)
         
         # Reset state
-        self.grid = [[{
-            'value': None,
-            'isOperator': False,
-            'operator': None,
-            'isFixed': False,
-            'isResult': False,
-            'isEmpty': False,  # Initialize as not empty
-            'inEquation': False,
-            'isCorrect': False,
-            'isIncorrect': False
-        } for _ in range(self.grid_size)] for _ in range(self.grid_size)]
+        self.grid = [[Cell() for _ in range(self.grid_size)] for _ in range(self.grid_size)]
         self.equations = []
-        self.empty_cells.clear()
-        self.intersection_points.clear()
-        self._used_cells.clear()
+        self._empty = 0
+        self._intersections = 0
+        self._occupied = 0
         
         # 1. Generate crossword pattern
-        self._generate_pattern(difficulty)
+        try:
+            self._generate_pattern(difficulty, self.target_equations(difficulty, density))
+        except ValueError as e:
+            record_generation_failure(difficulty, self.failed_placements)
+            raise GenerationFailed(str(e), self.attempts, self.failed_placements) from e
         
         # 2. Fill numbers
         self._fill_numbers()
@@ -84,120 +300,131 @@ class PuzzleGenerator:
         number_bank = self._hide_numbers(difficulty)
         
         # Log the generated puzzle
-        logging.info("\n=== Generated Puzzle Details ===")
-        logging.info(f"Number of equations: {len(self.equations)}")
-        logging.info(f"Number of intersections: {len(self.intersection_points)}")
-        logging.info(f"Number of empty cells: {len(self.empty_cells)}")
-        logging.info(f"Number bank size: {len(number_bank)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('Generated puzzle difficulty=%s seed=%s equations=%s intersections=%s '
+                        'empty=%s bank=%s', difficulty, seed, len(self.equations),
+                        bin(self._intersections).count('1'), bin(self._empty).count('1'), len(number_bank))
         
         # Verify empty cells match number bank
-        empty_count = sum(1 for row in self.grid for cell in row if cell.get('isEmpty', False))
+        empty_count = sum(1 for row in self.grid for cell in row if cell.is_empty)
         if empty_count != len(number_bank):
-            logging.error(f"Mismatch between empty cells ({empty_count}) and number bank size ({len(number_bank)})")
+            logger.error('Mismatch between empty cells (%s) and number bank size (%s)', empty_count, len(number_bank))
             # Fix empty cells to match number bank
             self._fix_empty_cells(number_bank)
+
+        # 4. Give back numbers until only one fill is possible
+        if unique:
+            number_bank = self._reveal_until_unique(number_bank)
         
-        return {
+        record_generation(difficulty, self.attempts, self.failed_placements)
+        puzzle = {
             'grid': self.grid,
             'equations': self.equations,
             'numberBank': sorted(number_bank),
             'gridSize': self.grid_size,
-            'difficulty': difficulty
+            'difficulty': difficulty,
+            'seed': seed
         }
+        if cache is not None:
+            cache.put(key, puzzle)
+        return puzzle
 
     def _fix_empty_cells(self, number_bank: List[int]):
         """Fix empty cells to match number bank size."""
         # Count current empty cells
         empty_cells = [(r, c) for r in range(self.grid_size) 
                       for c in range(self.grid_size) 
-                      if self.grid[r][c].get('isEmpty', False)]
+                      if self.grid[r][c].is_empty]
         
         # If we have too many empty cells, mark some as fixed
         while len(empty_cells) > len(number_bank):
             row, col = empty_cells.pop()
-            self.grid[row][col]['isEmpty'] = False
-            self.grid[row][col]['isFixed'] = True
-            if (row, col) in self.empty_cells:
-                self.empty_cells.remove((row, col))
+            self.grid[row][col].is_empty = False
+            self.grid[row][col].is_fixed = True
+            self._empty &= ~self._masks.cell_bit(row, col)
+
+    def target_equations(self, difficulty: str, density: Optional[float] = None) -> int:
+        """Return how many equations a puzzle of this difficulty holds at most."""
+        if density is None:
+            if self.grid_size < self.LARGE_GRID_SIZE:
+                return self.EQUATION_TARGETS[difficulty]
+            density = self.DENSITY_TARGETS[difficulty]
+        return max(1, round(density * self.grid_size ** 2 / 5))
 
-    def _generate_pattern(self, difficulty: str) -> None:
-        """Generate the crossword pattern without numbers."""
+    def _generate_pattern(self, difficulty: str, target_equations: int) -> None:
+        """Generate the crossword pattern without numbers.
+
+        Each placement picks a free slot from the SlotIndex and only updates
+        the slots around it, so a pattern costs time linear in the number of
+        equations rather than in the grid area per placement.
+        """
         max_attempts = 30  # Increased attempts for more complex patterns
         
         for attempt in range(max_attempts):
-            logging.info(f"\nAttempt {attempt + 1}/{max_attempts} to generate pattern")
+            logger.debug('Pattern attempt %s/%s', attempt + 1, max_attempts)
+            self.attempts = attempt + 1
             
-            # Reset state for this attempt
+            # Reset state for this attempt, including cells a failed attempt filled
+            if attempt:
+                self.grid = [[Cell() for _ in range(self.grid_size)] for _ in range(self.grid_size)]
             self.equations.clear()
-            self.intersection_points.clear()
-            self._used_cells.clear()
+            self._intersections = 0
+            self._occupied = 0
             
             # Start with a horizontal equation in the middle
             center_row = self.grid_size // 2
             h_pos = Position(center_row, 1, 'horizontal')
             
             if not self._place_first_equation(h_pos):
+                self.failed_placements += 1
                 continue
                 
-            # Add more equations based on difficulty
-            target_equations = {
-                'easy': 3,
-                'medium': 6,
-                'hard': 10
-            }[difficulty]
+            # Index the free slots once; each placement only updates its neighborhood
+            slot_index = SlotIndex([(row, col)
+                                    for row in range(1, self.grid_size - 4)
+                                    for col in range(1, self.grid_size - 4)])
+            slot_index.occupy(self.used_cells)
             
             # Try to place additional equations
             placed_equations = 1
-            max_placement_attempts = 50
+            max_placement_attempts = max(50, 2 * target_equations)
             
             for _ in range(max_placement_attempts):
                 if placed_equations >= target_equations:
                     break
                     
                 # Alternate between horizontal and vertical equations
-                orientation = 'vertical' if len(self.equations) % 2 == 1 else 'horizontal'
-                
-                # Find valid position for new equation
-                valid_positions = []
-                for row in range(1, self.grid_size - 4):
-                    for col in range(1, self.grid_size - 4):
-                        pos = Position(row, col, orientation)
-                        cells = self._get_equation_cells(pos, 5)
-                        if self._is_valid_equation_position(cells):
-                            valid_positions.append(pos)
+                orientation, other = ('vertical', 'horizontal') if len(self.equations) % 2 == 1 \
+                    else ('horizontal', 'vertical')
                 
-                if not valid_positions:
-                    continue
-                    
-                # Try each position until we find one that works
-                random.shuffle(valid_positions)
-                equation_placed = False
+                # Pick a random free slot for the new equation, in either orientation
+                pos = slot_index.choice(orientation, self._rng) or slot_index.choice(other, self._rng)
+                if pos is None:
+                    break  # No free slot left
                 
-                for pos in valid_positions:
-                    if self._place_first_equation(pos):
-                        placed_equations += 1
-                        equation_placed = True
-                        break
-                        
-                if not equation_placed:
-                    continue
+                if self._place_first_equation(pos):
+                    placed_equations += 1
+                    slot_index.occupy(self.equations[-1].cells)
+                else:
+                    self.failed_placements += 1
             
             # If we placed enough equations, we're done
             if placed_equations >= target_equations:
-                logging.info(f"Successfully generated pattern with {placed_equations} equations")
+                logger.debug('Generated pattern with %s equations', placed_equations)
                 break
         else:
             raise ValueError(f"Could not generate valid pattern for {difficulty} difficulty")
 
     def _place_first_equation(self, pos: Position) -> bool:
         """Place first equation with random numbers."""
-        cells = self._get_equation_cells(pos, 5)
-        if not self._is_valid_equation_position(cells):
-            logging.info(f"Invalid position for first equation at {pos}")
+        mask = self._masks.slot_mask(pos)
+        if mask is None or self._occupied & mask:
+            logger.debug('Invalid position for first equation at %s', pos)
             return False
+        cells = self._get_equation_cells(pos, 5)
             
-        operator = random.choice(self.OPERATORS)
-        a, b, result = random.choice(self.VALID_EQUATIONS[operator])
+        operator = self._rng.choice(self.OPERATORS)
+        a, b, result = self._rng.choice(self.VALID_EQUATIONS[operator])
         
         equation = Equation(pos, a, operator, b, result, cells)
         self.equations.append(equation)
@@ -205,28 +432,31 @@ class PuzzleGenerator:
         # Place equation in grid
         values = [a, operator, b, '=', result]
         for i, (row, col) in enumerate(cells):
-            is_operator = i in [1, 3]
-            self.grid[row][col].update({
-                'value': values[i] if not is_operator else None,
-                'isOperator': is_operator,
-                'operator': values[i] if is_operator else None,
-                'isFixed': False,
-                'isResult': i == 4,
-                'isEmpty': False,
-                'inEquation': True,
-                'isCorrect': False,
-                'isIncorrect': False
-            })
-            self._used_cells.add((row, col))
+            self._set_equation_cell(self.grid[row][col], i, values[i])
+        self._occupied |= mask
         
-        logging.info(f"Placed first equation: {a} {operator} {b} = {result}")
+        logger.debug('Placed first equation: %s %s %s = %s', a, operator, b, result)
         return True
 
+    @staticmethod
+    def _set_equation_cell(cell: Cell, index: int, value) -> None:
+        """Reset a cell to hold element `index` of an `A op B = C` equation."""
+        is_operator = index in (1, 3)
+        cell.value = None if is_operator else value
+        cell.is_operator = is_operator
+        cell.operator = value if is_operator else None
+        cell.is_fixed = False
+        cell.is_result = index == 4
+        cell.is_empty = False
+        cell.in_equation = True
+        cell.is_correct = False
+        cell.is_incorrect = False
+
     def _place_second_equation(self, pos: Position, intersection_point: Tuple[int, int], intersection_value: int) -> bool:
         """Place second equation that must use the intersection value."""
         cells = self._get_equation_cells(pos, 5)
         if not self._is_valid_equation_position(cells):
-            logging.info(f"Invalid position for second equation at {pos}")
+            logger.debug('Invalid position for second equation at %s', pos)
             return False
             
         # Find which position in the equation is the intersection point
@@ -237,55 +467,42 @@ class PuzzleGenerator:
                 break
         
         if intersection_idx is None or intersection_idx % 2 != 0:  # Must be a number position (0, 2, or 4)
-            logging.info(f"Invalid intersection index {intersection_idx}")
+            logger.debug('Invalid intersection index %s', intersection_idx)
             return False
             
         # Choose operator
-        operator = random.choice(self.OPERATORS)
+        operator = self._rng.choice(self.OPERATORS)
         
         # Find valid equation that uses intersection_value in the correct position
-        valid_equations = self.VALID_EQUATIONS[operator]
-        random.shuffle(valid_equations)
+        candidates = self.EQUATION_INDEX.get((operator, intersection_idx // 2, intersection_value))
+        if not candidates:
+            logger.debug('Could not find valid equation using %s at position %s', intersection_value, intersection_idx)
+            return False
         
-        for a, b, result in valid_equations:
-            values = [a, b, result]
-            if values[intersection_idx // 2] == intersection_value:
-                # Found a valid equation
-                equation = Equation(pos, a, operator, b, result, cells)
-                self.equations.append(equation)
-                
-                # Place equation in grid
-                values = [a, operator, b, '=', result]
-                for i, (row, col) in enumerate(cells):
-                    if (row, col) != intersection_point:  # Skip intersection point, it's already set
-                        is_operator = i in [1, 3]
-                        self.grid[row][col].update({
-                            'value': values[i] if not is_operator else None,
-                            'isOperator': is_operator,
-                            'operator': values[i] if is_operator else None,
-                            'isFixed': False,
-                            'isResult': i == 4,
-                            'isEmpty': False,
-                            'inEquation': True,
-                            'isCorrect': False,
-                            'isIncorrect': False
-                        })
-                        self._used_cells.add((row, col))
-                logging.info(f"Placed second equation: {a} {operator} {b} = {result}")
-                return True
+        a, b, result = self._rng.choice(candidates)
+        equation = Equation(pos, a, operator, b, result, cells)
+        self.equations.append(equation)
         
-        logging.info(f"Could not find valid equation using {intersection_value} at position {intersection_idx}")
-        return False
+        # Place equation in grid
+        values = [a, operator, b, '=', result]
+        for i, (row, col) in enumerate(cells):
+            if (row, col) != intersection_point:  # Skip intersection point, it's already set
+                self._set_equation_cell(self.grid[row][col], i, values[i])
+                self._occupied |= self._masks.cell_bit(row, col)
+        logger.debug('Placed second equation: %s %s %s = %s', a, operator, b, result)
+        return True
 
     def _fill_numbers(self) -> None:
         """Fill in numbers for all equations ensuring mathematical validity."""
         # First, handle intersecting equations
-        for point in self.intersection_points:
-            # Find equations that share this point
-            shared_equations = []
-            for eq in self.equations:
-                if point in eq.cells:
-                    shared_equations.append(eq)
+        intersection_points = self.intersection_points
+        equations_at: Dict[Tuple[int, int], List[Equation]] = {}
+        for eq in self.equations:
+            for cell in eq.cells:
+                if cell in intersection_points:
+                    equations_at.setdefault(cell, []).append(eq)
+        for point in sorted(intersection_points):
+            shared_equations = equations_at[point]
             
             if len(shared_equations) == 2:
                 self._fill_intersecting_equations(shared_equations[0], shared_equations[1], point)
@@ -297,9 +514,11 @@ class PuzzleGenerator:
 
     def _fill_intersecting_equations(self, eq1: Equation, eq2: Equation, point: Tuple[int, int]) -> None:
         """Fill numbers for two intersecting equations."""
-        # Find valid number for intersection point
-        valid_numbers = set(range(1, 10))
-        for num in valid_numbers:
+        # Find valid number for intersection point among the values both slots share
+        key = (eq1.operator, eq1.cells.index(point) // 2, eq2.operator, eq2.cells.index(point) // 2)
+        for num in self.INTERSECTION_VALUES.get(key, ()):
+            if num > 9:
+                break
             if self._try_fill_equations_with_intersection(eq1, eq2, point, num):
                 break
 
@@ -309,27 +528,25 @@ class PuzzleGenerator:
         pos1 = eq1.cells.index(point)
         pos2 = eq2.cells.index(point)
         
-        # Try valid equations that use this number in the correct position
-        for a1, b1, r1 in self.VALID_EQUATIONS[eq1.operator]:
-            nums1 = [a1, b1, r1]
-            if nums1[pos1 // 2] == num:  # If number fits in correct position
-                for a2, b2, r2 in self.VALID_EQUATIONS[eq2.operator]:
-                    nums2 = [a2, b2, r2]
-                    if nums2[pos2 // 2] == num:  # If number fits in correct position
-                        # Fill equations
-                        eq1.a, eq1.b, eq1.result = a1, b1, r1
-                        eq2.a, eq2.b, eq2.result = a2, b2, r2
-                        
-                        # Update grid
-                        self._update_equation_in_grid(eq1)
-                        self._update_equation_in_grid(eq2)
-                        return True
-        return False
+        # Look up equations that use this number in the correct position
+        candidates1 = self.EQUATION_INDEX.get((eq1.operator, pos1 // 2, num))
+        candidates2 = self.EQUATION_INDEX.get((eq2.operator, pos2 // 2, num))
+        if not candidates1 or not candidates2:
+            return False
+        
+        # Fill equations
+        eq1.a, eq1.b, eq1.result = candidates1[0]
+        eq2.a, eq2.b, eq2.result = candidates2[0]
+        
+        # Update grid
+        self._update_equation_in_grid(eq1)
+        self._update_equation_in_grid(eq2)
+        return True
 
     def _fill_single_equation(self, equation: Equation) -> None:
         """Fill numbers for a single equation."""
         valid_equations = self.VALID_EQUATIONS[equation.operator]
-        a, b, result = random.choice(valid_equations)
+        a, b, result = self._rng.choice(valid_equations)
         equation.a, equation.b, equation.result = a, b, result
         self._update_equation_in_grid(equation)
 
@@ -338,12 +555,12 @@ class PuzzleGenerator:
         values = [equation.a, equation.operator, equation.b, '=', equation.result]
         for (row, col), value in zip(equation.cells, values):
             if not isinstance(value, str):  # If it's a number
-                self.grid[row][col]['value'] = value
+                self.grid[row][col].value = value
 
     def _hide_numbers(self, difficulty: str) -> List[int]:
         """Hide some numbers and return them as number bank."""
         number_bank = []
-        self.empty_cells.clear()
+        self._empty = 0
         
         for equation in self.equations:
             # Determine which positions to hide (0=first number, 2=second number, 4=result)
@@ -353,20 +570,66 @@ class PuzzleGenerator:
             for i, cell in enumerate(equation.cells):
                 row, col = cell
                 if i in hide_positions:
-                    value = self.grid[row][col]['value']
+                    cell_state = self.grid[row][col]
+                    value = cell_state.value
                     if value is not None:  # Only add non-None values
-                        self.grid[row][col]['value'] = None
-                        self.grid[row][col]['isEmpty'] = True
-                        self.grid[row][col]['isFixed'] = False
+                        cell_state.value = None
+                        cell_state.is_empty = True
+                        cell_state.is_fixed = False
                         number_bank.append(value)
-                        self.empty_cells.add(cell)
-                elif not self.grid[row][col]['isOperator']:
+                        self._empty |= self._masks.cell_bit(row, col)
+                elif not self.grid[row][col].is_operator:
                     # Mark non-operator cells as fixed if they're not hidden
-                    self.grid[row][col]['isFixed'] = True
-                    self.grid[row][col]['isEmpty'] = False
+                    self.grid[row][col].is_fixed = True
+                    self.grid[row][col].is_empty = False
         
         return sorted(number_bank)
 
+    def _reveal_until_unique(self, number_bank: List[int]) -> List[int]:
+        """Reveal hidden numbers until the puzzle has one solution; return the rest of the bank.
+
+        Two hidden numbers of one equation that can trade places (_ + _ = 7)
+        are ambiguous whatever the rest of the grid holds, so one of them is
+        revealed up front. After that each round asks the solver for two
+        solutions and reveals a cell they disagree on, which rules the
+        second one out, so only cells that are actually ambiguous are given away.
+        """
+        answers = {cell: value for equation in self.equations
+                   for cell, value in zip(equation.cells[::2], (equation.a, equation.b, equation.result))}
+        for equation in self.equations:
+            hidden = [i for i in range(3) if (self._empty & ~self._intersections) &
+                      self._masks.cell_bit(*equation.cells[2 * i])]
+            if len(hidden) != 2:
+                continue
+            numbers = [equation.a, equation.b, equation.result]
+            i, j = hidden
+            if numbers[i] == numbers[j]:
+                continue
+            numbers[i], numbers[j] = numbers[j], numbers[i]
+            if OPERATIONS[equation.operator](numbers[0], numbers[1]) == numbers[2]:
+                self._reveal(equation.cells[2 * self._rng.choice(hidden)], answers, number_bank)
+
+        while True:
+            solutions = PuzzleSolver(self.equations, self.empty_cells, number_bank).solutions(limit=2)
+            assert solutions, 'the generator\'s own fill always solves the puzzle'
+            if len(solutions) == 1:
+                return number_bank
+            first, second = solutions
+            self._reveal(self._rng.choice(sorted(cell for cell in first if first[cell] != second[cell])),
+                         answers, number_bank)
+
+    def _reveal(self, cell_pos: Tuple[int, int], answers: Dict[Tuple[int, int], int],
+                number_bank: List[int]) -> None:
+        """Give a hidden cell its value back and take that value out of the bank."""
+        row, col = cell_pos
+        cell = self.grid[row][col]
+        cell.value = answers[cell_pos]
+        cell.is_empty = False
+        cell.is_fixed = True
+        number_bank.remove(cell.value)
+        self._empty &= ~self._masks.cell_bit(row, col)
+        self.revealed += 1
+
     def _get_positions_to_hide(self, equation: Equation, difficulty: str) -> List[int]:
         """Determine which positions to hide based on difficulty."""
         candidates = [0, 2, 4]  # Possible positions to hide (first number, second number, result)
@@ -374,12 +637,12 @@ class PuzzleGenerator:
         # For medium/hard, don't hide intersection points
         if difficulty != 'easy':
             candidates = [pos for pos in candidates 
-                        if equation.cells[pos] not in self.intersection_points]
+                        if not self._intersections & self._masks.cell_bit(*equation.cells[pos])]
         
         # Always hide exactly 2 positions per equation
         # If we can't hide 2 positions (due to intersections), hide just 1
         num_to_hide = min(2, len(candidates))
-        return random.sample(candidates, num_to_hide)
+        return self._rng.sample(candidates, num_to_hide)
 
     def _get_equation_cells(self, position: Position, length: int) -> List[Tuple[int, int]]:
         """Get the cells that would be used by an equation."""
@@ -393,38 +656,17 @@ class PuzzleGenerator:
 
     def _is_valid_equation_position(self, cells: List[Tuple[int, int]]) -> bool:
         """Check if an equation can be placed at the given position."""
-        # Check if all cells are within grid bounds
-        if not all(0 <= row < self.grid_size and 0 <= col < self.grid_size for row, col in cells):
-            return False
-            
-        # Check if any cell is already used by another equation
-        if any((row, col) in self._used_cells for row, col in cells):
-            return False
-            
-        # Check if there's enough space around the equation
-        for row, col in cells:
-            # Check adjacent cells (not including diagonals)
-            for dr, dc in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                adj_row, adj_col = row + dr, col + dc
-                if (0 <= adj_row < self.grid_size and 
-                    0 <= adj_col < self.grid_size and 
-                    (adj_row, adj_col) in self._used_cells):
-                    # Allow adjacent cells only for intersections at number positions
-                    if (row, col) not in cells:
-                        # Check if this is a potential intersection point
-                        if cells.index((row, col)) % 2 == 0:  # Number position
-                            continue
-                        return False
-        
-        return True
+        # Cells must be within grid bounds and not used by another equation
+        mask = self._masks.cells_mask(cells)
+        return mask is not None and not self._occupied & mask
 
     def _used_operators(self) -> Set[str]:
         """Return the set of used operators in the grid."""
         used_operators = set()
         for row in range(self.grid_size):
             for col in range(self.grid_size):
-                if self.grid[row][col] and self.grid[row][col].get('isOperator', False):
-                    used_operators.add(self.grid[row][col]['operator'])
+                if self.grid[row][col].is_operator:
+                    used_operators.add(self.grid[row][col].operator)
         return used_operators
 
     def _used_numbers(self) -> Set[int]:
@@ -432,8 +674,8 @@ class PuzzleGenerator:
         used_numbers = set()
         for row in range(self.grid_size):
             for col in range(self.grid_size):
-                if self.grid[row][col] and not self.grid[row][col].get('isOperator', False):
-                    used_numbers.add(self.grid[row][col]['value'])
+                if not self.grid[row][col].is_operator:
+                    used_numbers.add(self.grid[row][col].value)
         return used_numbers
 
     def _score_puzzle(self, equations_placed: int, intersections: int, difficulty: str) -> int:
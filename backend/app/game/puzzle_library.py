@@ -0,0 +1,197 @@
+"""
+Binary puzzle library for Math Crossword Game.
+Pre-generated puzzles stored as fixed-size records and read through mmap, so
+a server can pick any puzzle by index without holding the library as Python
+objects, and worker processes share the file through the page cache.
+"""
+
+from typing import Dict, List, Optional
+import mmap
+import os
+import random
+import struct
+
+from .cell import Cell
+from .puzzle_generator import Equation, Position, PuzzleGenerator
+
+MAGIC = b'MCPL'
+FORMAT_VERSION = 1
+DIFFICULTIES = ('easy', 'medium', 'hard')
+OPERATORS = PuzzleGenerator.OPERATORS
+
+# magic, format version, difficulty, grid size, equations per record, record count
+HEADER = struct.Struct('<4sBBHHI')
+HEADER_SIZE = 16  # HEADER padded, so records start aligned
+# seed, equation count
+RECORD_HEAD = struct.Struct('<IH')
+MAX_SEED = 2 ** 32 - 1  # Largest seed a record can hold
+# row, col, vertical, a, operator index, b, result, hidden positions (bit 0 = a, 1 = b, 2 = result)
+EQUATION = struct.Struct('<8B')
+# Equation cell index of each hidden-mask bit
+HIDDEN_INDEXES = (0, 2, 4)
+
+def record_size(max_equations: int) -> int:
+    return RECORD_HEAD.size + max_equations * EQUATION.size
+
+def encode_puzzle(puzzle: Dict, max_equations: int) -> bytes:
+    """Encode a puzzle dict as one fixed-size record.
+
+    Hidden cells are the equation cells left empty for the player; every
+    other number is given.
+    """
+    equations = puzzle['equations']
+    if len(equations) > max_equations:
+        raise ValueError(f'Puzzle has {len(equations)} equations, records hold {max_equations}')
+    grid = puzzle['grid']
+    parts = [RECORD_HEAD.pack(puzzle['seed'], len(equations))]
+    for equation in equations:
+        hidden = 0
+        for bit, index in enumerate(HIDDEN_INDEXES):
+            row, col = equation.cells[index]
+            if grid[row][col].is_empty:
+                hidden |= 1 << bit
+        position = equation.position
+        parts.append(EQUATION.pack(position.row, position.col, position.orientation == 'vertical',
+                                   equation.a, OPERATORS.index(equation.operator), equation.b,
+                                   equation.result, hidden))
+    record = b''.join(parts)
+    return record + bytes(record_size(max_equations) - len(record))
+
+def decode_puzzle(data, offset: int, grid_size: int, difficulty: str) -> Dict:
+    """Rebuild the puzzle dict `PuzzleGenerator.generate_puzzle` returns from a record."""
+    seed, count = RECORD_HEAD.unpack_from(data, offset)
+    grid = [[Cell() for _ in range(grid_size)] for _ in range(grid_size)]
+    equations: List[Equation] = []
+    number_bank: List[int] = []
+    start = offset + RECORD_HEAD.size
+    for row, col, vertical, a, operator, b, result, hidden in \
+            EQUATION.iter_unpack(data[start:start + count * EQUATION.size]):
+        equation = Equation.from_row((row, col, 'vertical' if vertical else 'horizontal',
+                                      a, OPERATORS[operator], b, result))
+        equations.append(equation)
+        values = (a, equation.operator, b, '=', result)
+        for index, (r, c) in enumerate(equation.cells):
+            cell = grid[r][c]
+            PuzzleGenerator._set_equation_cell(cell, index, values[index])
+            if index % 2:
+                continue
+            if hidden & (1 << (index // 2)):
+                cell.value = None
+                cell.is_empty = True
+                number_bank.append(values[index])
+            else:
+                cell.is_fixed = True
+    return {
+        'grid': grid,
+        'equations': equations,
+        'numberBank': sorted(number_bank),
+        'gridSize': grid_size,
+        'difficulty': difficulty,
+        'seed': seed
+    }
+
+class PuzzleLibraryWriter:
+    """Appends puzzles to a new library file; the record count is written on close."""
+
+    def __init__(self, path: str, difficulty: str, grid_size: int, max_equations: int):
+        if not 0 < grid_size <= 255:
+            raise ValueError(f'Library records address grids up to 255 cells per side, got {grid_size}')
+        self.path = path
+        self.difficulty = difficulty
+        self.grid_size = grid_size
+        self.max_equations = max_equations
+        self.count = 0
+        self._file = open(path, 'wb')
+        self._write_header()
+
+    def _write_header(self) -> None:
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, DIFFICULTIES.index(self.difficulty),
+                             self.grid_size, self.max_equations, self.count)
+        self._file.seek(0)
+        self._file.write(header + bytes(HEADER_SIZE - HEADER.size))
+
+    def append(self, puzzle: Dict) -> None:
+        if puzzle['gridSize'] != self.grid_size or puzzle['difficulty'] != self.difficulty:
+            raise ValueError(f"Puzzle is {puzzle['difficulty']} {puzzle['gridSize']}x{puzzle['gridSize']}, "
+                             f'library is {self.difficulty} {self.grid_size}x{self.grid_size}')
+        if not 0 <= puzzle['seed'] <= MAX_SEED:
+            raise ValueError(f"Library records hold seeds 0 to {MAX_SEED}, got {puzzle['seed']}")
+        self._file.write(encode_puzzle(puzzle, self.max_equations))
+        self.count += 1
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._write_header()
+        self._file.close()
+
+    def __enter__(self) -> 'PuzzleLibraryWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class PuzzleLibrary:
+    """Read-only, memory-mapped puzzle library.
+
+    Record i starts at HEADER_SIZE + i * record_size, so a lookup decodes
+    just that record; nothing is read or parsed up front beyond the header.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise ValueError(f'Not a puzzle library: {path}')
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, difficulty, self.grid_size, self.max_equations, self.count = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._map.close()
+            raise ValueError(f'Not a puzzle library (or unsupported version): {path}')
+        self.difficulty = DIFFICULTIES[difficulty]
+        self.record_size = record_size(self.max_equations)
+        if size < HEADER_SIZE + self.count * self.record_size:
+            self._map.close()
+            raise ValueError(f'Truncated puzzle library: {path}')
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, index: int) -> Dict:
+        """Return puzzle `index` as a puzzle dict."""
+        if not 0 <= index < self.count:
+            raise IndexError(f'Puzzle index {index} out of range')
+        return decode_puzzle(self._map, HEADER_SIZE + index * self.record_size,
+                             self.grid_size, self.difficulty)
+
+    def random(self, rng=random) -> Dict:
+        """Return a random puzzle."""
+        return self.get(rng.randrange(self.count))
+
+    def close(self) -> None:
+        self._map.close()
+
+def open_libraries(directory: str, grid_size: Optional[int] = None) -> Dict[str, PuzzleLibrary]:
+    """Open the non-empty `<difficulty>.puzzles` libraries found in a directory.
+
+    With `grid_size`, a library of any other grid size is rejected.
+    """
+    libraries = {}
+    for difficulty in DIFFICULTIES:
+        path = os.path.join(directory, f'{difficulty}.puzzles')
+        if os.path.exists(path):
+            library = PuzzleLibrary(path)
+            if library.difficulty != difficulty:
+                library.close()
+                raise ValueError(f'{path} holds {library.difficulty} puzzles')
+            if grid_size is not None and library.grid_size != grid_size:
+                library.close()
+                raise ValueError(f'{path} holds {library.grid_size}x{library.grid_size} puzzles, '
+                                 f'expected {grid_size}x{grid_size}')
+            if len(library):
+                libraries[difficulty] = library
+            else:
+                library.close()
+    return libraries
@@ -0,0 +1,167 @@
+"""
+Pre-generated puzzle pool for Math Crossword Game.
+Keeps a buffer of ready puzzles per difficulty, refilled by a background thread.
+"""
+
+from typing import Dict, Deque, Optional, Iterable
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+import threading
+import logging
+
+from .puzzle_executor import ExecutorShutdown
+from .puzzle_generator import PuzzleGenerator
+
+logger = logging.getLogger(__name__)
+
+class PuzzlePool:
+    """Buffer of ready puzzles per difficulty.
+
+    `get` pops a puzzle in O(1) when one is ready and only generates inline
+    when the pool for that difficulty is empty. Whenever a pool drops below
+    `low_watermark`, the refill thread tops it up to `high_watermark`.
+
+    With an `executor` (a PuzzleExecutor) both refills and inline
+    generation run in worker processes instead of the calling thread.
+    With `unique` the pool's own generators only make puzzles with exactly
+    one solution; an executor is configured with its own `unique`.
+    """
+
+    DIFFICULTIES = ('easy', 'medium', 'hard')
+
+    def __init__(self, grid_size: int = 11, low_watermark: int = 2, high_watermark: int = 8,
+                 difficulties: Iterable[str] = DIFFICULTIES, cache=None, executor=None,
+                 unique: bool = False):
+        self.grid_size = grid_size
+        self.executor = executor
+        self.unique = unique
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self._pools: Dict[str, Deque[Dict]] = {d: deque() for d in difficulties}
+        self._hits: Dict[str, int] = {d: 0 for d in self._pools}
+        self._misses: Dict[str, int] = {d: 0 for d in self._pools}
+        self._stats_lock = threading.Lock()
+
+        # Generators keep per-call state, so the refill thread and request
+        # threads must never share one.
+        self._refill_generator = PuzzleGenerator(grid_size, cache=cache)
+        self._inline_generator = PuzzleGenerator(grid_size, cache=cache)
+        self._inline_lock = threading.Lock()
+
+        self._refill_needed = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, low_watermark: int, high_watermark: int) -> None:
+        """Update the watermarks (low must not exceed high)."""
+        if not 0 <= low_watermark <= high_watermark:
+            raise ValueError('Pool watermarks must satisfy 0 <= low <= high')
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self._refill_needed.set()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the background refill thread (no-op if already running)."""
+        if self.is_running:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._refill_loop, name='puzzle-pool-refill', daemon=True)
+        self._thread.start()
+        self._refill_needed.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background refill thread."""
+        self._stopped.set()
+        self._refill_needed.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def get(self, difficulty: str, seed: Optional[int] = None) -> Dict:
+        """Return a puzzle for the difficulty, generating inline if the pool is empty.
+
+        A seeded request always bypasses the pool and is served by the
+        generator (and its cache, if one is configured).
+        """
+        if seed is not None:
+            return self._generate_inline(difficulty, seed)
+
+        pool = self._pools[difficulty]
+        try:
+            puzzle = pool.popleft()
+        except IndexError:
+            puzzle = None
+
+        with self._stats_lock:
+            if puzzle is not None:
+                self._hits[difficulty] += 1
+            else:
+                self._misses[difficulty] += 1
+
+        if len(pool) < self.low_watermark:
+            self._refill_needed.set()
+
+        if puzzle is None:
+            logger.info('Puzzle pool empty for %s, generating inline', difficulty)
+            puzzle = self._generate_inline(difficulty)
+        return puzzle
+
+    def _generate_inline(self, difficulty: str, seed: Optional[int] = None) -> Dict:
+        if self.executor is not None:
+            return self.executor.generate(difficulty, seed=seed)
+        with self._inline_lock:
+            return self._inline_generator.generate_puzzle(difficulty, seed=seed, unique=self.unique)
+
+    def fill(self, difficulty: Optional[str] = None) -> int:
+        """Synchronously top up one (or every) pool to the high watermark.
+
+        Returns the number of puzzles added.
+        """
+        difficulties = [difficulty] if difficulty else list(self._pools)
+        added = 0
+        for name in difficulties:
+            pool = self._pools[name]
+            while len(pool) < self.high_watermark and not self._stopped.is_set():
+                try:
+                    if self.executor is not None:
+                        pool.append(self.executor.generate(name))
+                    else:
+                        pool.append(self._refill_generator.generate_puzzle(name, unique=self.unique))
+                    added += 1
+                except ExecutorShutdown:
+                    logger.debug('Puzzle executor shut down, refill for %s skipped', name)
+                    break
+                except (ValueError, TimeoutError, BrokenProcessPool) as e:
+                    logger.error('Puzzle pool refill failed for %s: %s', name, e)
+                    break
+        return added
+
+    def stats(self) -> Dict:
+        """Return pool sizes and hit/miss counters per difficulty."""
+        with self._stats_lock:
+            return {
+                name: {
+                    'size': len(pool),
+                    'hits': self._hits[name],
+                    'misses': self._misses[name]
+                }
+                for name, pool in self._pools.items()
+            }
+
+    def _refill_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._refill_needed.wait()
+            self._refill_needed.clear()
+            if self._stopped.is_set():
+                break
+            for name, pool in self._pools.items():
+                if len(pool) < self.low_watermark or len(pool) == 0:
+                    try:
+                        self.fill(name)
+                    except Exception:
+                        # Keep the thread alive; the next get() asks for another refill
+                        logger.exception('Puzzle pool refill crashed for %s', name)
@@ -0,0 +1,238 @@
+"""
+Puzzle solver for Math Crossword Game.
+Counts the ways a puzzle's hidden cells can be filled from its number bank,
+so the generator can reject puzzles with more than one solution.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from collections import Counter
+from math import factorial
+import operator
+
+Cell = Tuple[int, int]
+
+OPERATIONS = {'+': operator.add, '-': operator.sub, '*': operator.mul}
+
+def _second_operand(op: str, a: int, result: int) -> Optional[int]:
+    """Return b such that `a op b == result`, or None if there is no integer b."""
+    if op == '+':
+        return result - a
+    if op == '-':
+        return a - result
+    if a and not result % a:
+        return result // a
+    return None
+
+def equation_fills(op: str, a: Optional[int], b: Optional[int], result: Optional[int],
+                   values: Sequence[int]) -> List[Tuple[int, ...]]:
+    """Return the values for the unknown (None) numbers of `a op b = result`.
+
+    Unknowns range over `values`; each fill lists them in a, b, result order.
+    With a known result one operand is solved for instead of enumerated, so
+    equations with up to two unknowns cost O(len(values)).
+    """
+    apply = OPERATIONS[op]
+    allowed = set(values)
+    triples = []
+    for x in ((a,) if a is not None else values):
+        if b is not None:
+            z = apply(x, b)
+            if result is None and z in allowed or z == result:
+                triples.append((x, b, z))
+        elif result is not None:
+            y = _second_operand(op, x, result)
+            if y in allowed:
+                triples.append((x, y, result))
+        else:
+            triples.extend((x, y, z) for y in values for z in (apply(x, y),) if z in allowed)
+    unknown = [i for i, known in enumerate((a, b, result)) if known is None]
+    if len(unknown) == 3:
+        return triples
+    if len(unknown) == 2:
+        i, j = unknown
+        return [(triple[i], triple[j]) for triple in triples]
+    i, = unknown
+    return [(triple[i],) for triple in triples]
+
+class PuzzleSolver:
+    """Counts the fills of a puzzle's hidden cells from its number bank.
+
+    Each equation is a table of fills for its hidden cells. Search assigns
+    one equation at a time, tightest first, keeping the remaining bank as a
+    packed bitset of value counts; a cell shared with an earlier equation is
+    limited to the value already assigned to it. Equations only interact
+    through the bank and shared cells, so subtrees are memoized on those and
+    the same remaining bank is never searched twice, which keeps proving a
+    solution unique cheap.
+
+    The bank is packed into one integer, `field_bits` bits per value: the
+    count of value v sits at bit field_bits * v, below a guard bit that is
+    always set. Subtracting a fill clears a guard exactly when it takes more
+    copies of a value than are left, so one subtraction and one AND check a
+    whole fill. Fields are sized per puzzle to hold the largest count the
+    bank or the capacity bound below can reach.
+    """
+
+    def __init__(self, equations: Iterable, hidden: Iterable[Cell], number_bank: Iterable[int]):
+        self.cells = sorted(set(hidden))
+        index = {cell: i for i, cell in enumerate(self.cells)}
+        counts = Counter(number_bank)
+        if sum(counts.values()) != len(self.cells):
+            raise ValueError(f'{len(self.cells)} hidden cells but {sum(counts.values())} numbers in the bank')
+        if min(counts, default=0) < 0:
+            raise ValueError('Bank values must be non-negative')
+        values = sorted(counts)
+
+        constraints = []
+        for equation in equations:
+            slots = (equation.cells[0], equation.cells[2], equation.cells[4])
+            known = [None if slot in index else value
+                     for slot, value in zip(slots, (equation.a, equation.b, equation.result))]
+            variables = tuple(index[slot] for slot in slots if slot in index)
+            if variables:
+                # The generator's own fill first: the first descent then finds a
+                # solution at once and the search is left proving there's no other
+                truth = tuple(value for value, k in zip((equation.a, equation.b, equation.result), known) if k is None)
+                fills = equation_fills(equation.operator, *known, values)
+                fills.remove(truth)
+                fills.insert(0, truth)
+                constraints.append((variables, fills))
+        constraints.sort(key=lambda constraint: len(constraint[1]))
+        self._free = len(self.cells) - len({v for variables, _ in constraints for v in variables})
+
+        # No count gets above the cells the capacity bound sums over (shared
+        # cells once per equation), which is at least the bank size
+        most = self._free + sum(len(variables) for variables, _ in constraints)
+        self.field_bits = most.bit_length() + 1
+        self._guard = 1 << (self.field_bits - 1)
+        unit = {value: 1 << self.field_bits * value for value in values}
+        ones = sum(1 << self.field_bits * value for value in range(max(values, default=0) + 1))
+        self._guards = self._guard * ones
+        self._bank = self._guards + sum(count * unit[value] for value, count in counts.items())
+
+        # Per equation: its cells, the positions of cells an earlier equation
+        # assigns, and each fill with the packed numbers it takes from the bank
+        self._steps: List[Tuple[Tuple[int, ...], Tuple[int, ...], List[Tuple[Tuple[int, ...], int]]]] = []
+        first_use: Dict[int, int] = {}
+        last_use: Dict[int, int] = {}
+        for depth, (variables, fills) in enumerate(constraints):
+            shared = tuple(i for i, v in enumerate(variables) if v in first_use)
+            taken = [i for i, v in enumerate(variables) if v not in first_use]
+            if shared:
+                packed = [sum(unit[fill[i]] for i in taken) for fill in fills]
+            else:
+                packed = [sum(map(unit.__getitem__, fill)) for fill in fills]
+            self._steps.append((variables, shared, list(zip(fills, packed))))
+            for v in variables:
+                first_use.setdefault(v, depth)
+                last_use[v] = depth
+
+        # Cells assigned before depth i that later equations still read; part of the memo key
+        self._frontier: List[Tuple[int, ...]] = [()] * (len(constraints) + 1)
+        for v in first_use:
+            for depth in range(first_use[v] + 1, last_use[v] + 1):
+                self._frontier[depth] += (v,)
+
+        # Most copies of each value the equations from depth i on can take,
+        # packed like the bank; a bank needing more than that is a dead end
+        capacity = self._guards + self._free * ones
+        self._capacity = [capacity] * (len(constraints) + 1)
+        for depth in reversed(range(len(constraints))):
+            fills = constraints[depth][1]
+            capacity += sum(map(unit.__getitem__, set().union(*fills)))
+            # Fills repeating a value (3 + 3 = 6) can take more than one copy
+            repeats: Dict[int, int] = {}
+            for fill in fills:
+                if len(fill) > 1 and (fill[0] == fill[1] or fill[-1] in fill[:-1]):
+                    for value in set(fill):
+                        repeats[value] = max(repeats.get(value, 0), fill.count(value) - 1)
+            capacity += sum(extra * unit[value] for value, extra in repeats.items())
+            self._capacity[depth] = capacity
+
+    def count_solutions(self, limit: int = 2) -> int:
+        """Return the number of solutions, counting no further than `limit`."""
+        return self._count(0, self._bank, [-1] * len(self.cells), limit, {})
+
+    def is_unique(self) -> bool:
+        return self.count_solutions(limit=2) == 1
+
+    def solutions(self, limit: int = 2) -> List[Dict[Cell, int]]:
+        """Return up to `limit` solutions as {cell: value} for the cells inside equations."""
+        found: List[Dict[Cell, int]] = []
+        self._collect(0, self._bank, [-1] * len(self.cells), limit, {}, found)
+        return found
+
+    def _leaf(self, bank: int, limit: int) -> int:
+        # Cells outside every equation take the leftover numbers in any order
+        arrangements = factorial(self._free)
+        bank -= self._guards
+        while bank:
+            arrangements //= factorial(bank & (self._guard - 1))
+            bank >>= self.field_bits
+        return min(arrangements, limit)
+
+    def _fills(self, depth: int, bank: int, assignment: List[int]):
+        """Yield (fill, bank after it) for the fills the bank and shared cells allow."""
+        variables, shared, fills = self._steps[depth]
+        guards = self._guards
+        for fill, taken in fills:
+            rest = bank - taken
+            if rest & guards != guards:
+                continue
+            if shared and any(assignment[variables[i]] != fill[i] for i in shared):
+                continue
+            yield fill, rest
+
+    def _count(self, depth: int, bank: int, assignment: List[int], limit: int, memo: Dict) -> int:
+        if depth == len(self._steps):
+            return self._leaf(bank, limit)
+        frontier = self._frontier[depth]
+        key = (depth, bank, tuple(assignment[v] for v in frontier)) if frontier else (depth, bank)
+        found = memo.get(key)
+        if found is not None:
+            return found
+        found = 0
+        if (self._capacity[depth] - bank + self._guards) & self._guards == self._guards:
+            variables = self._steps[depth][0]
+            for fill, rest in self._fills(depth, bank, assignment):
+                previous = [assignment[v] for v in variables]
+                for v, value in zip(variables, fill):
+                    assignment[v] = value
+                found += self._count(depth + 1, rest, assignment, limit, memo)
+                for v, value in zip(variables, previous):
+                    assignment[v] = value
+                if found >= limit:
+                    found = limit
+                    break
+        memo[key] = found
+        return found
+
+    def _collect(self, depth: int, bank: int, assignment: List[int], limit: int, memo: Dict,
+                 found: List[Dict[Cell, int]]) -> None:
+        if depth == len(self._steps):
+            found.append({cell: value for cell, value in zip(self.cells, assignment) if value >= 0})
+            return
+        variables = self._steps[depth][0]
+        for fill, rest in self._fills(depth, bank, assignment):
+            previous = [assignment[v] for v in variables]
+            for v, value in zip(variables, fill):
+                assignment[v] = value
+            # Only descend into subtrees the memoized count says hold a solution
+            if self._count(depth + 1, rest, assignment, limit, memo):
+                self._collect(depth + 1, rest, assignment, limit, memo, found)
+            for v, value in zip(variables, previous):
+                assignment[v] = value
+            if len(found) >= limit:
+                return
+
+def hidden_cells(grid) -> List[Cell]:
+    """Return the cells of a grid the player has to fill."""
+    return [(r, c) for r, row in enumerate(grid) for c, cell in enumerate(row) if cell.is_empty]
+
+def count_solutions(puzzle: Dict, limit: int = 2) -> int:
+    """Count the solutions of a puzzle dict as returned by `generate_puzzle`."""
+    solver = PuzzleSolver(puzzle['equations'], hidden_cells(puzzle['grid']), puzzle['numberBank'])
+    return solver.count_solutions(limit)
+
+def has_unique_solution(puzzle: Dict) -> bool:
+    return count_solutions(puzzle, limit=2) == 1
@@ -0,0 +1,123 @@
+"""
+Durable game storage for Math Crossword Game.
+Backends persist game records so any worker process can serve any game and
+games survive restarts; GameStateManager keeps a hot in-process cache in front.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from abc import ABC, abstractmethod
+import json
+import sqlite3
+import threading
+
+class GameStore(ABC):
+    """Interface for durable game storage.
+
+    Records are the dicts produced by `GameState.to_record`. Writes are
+    optimistic: each record comes with the stored version its changes were
+    based on and is only written if the store still holds that version.
+    """
+
+    @abstractmethod
+    def load(self, game_id: str) -> Optional[Dict]:
+        """Return the stored record for a game, or None."""
+
+    @abstractmethod
+    def load_version(self, game_id: str) -> Optional[int]:
+        """Return the stored version of a game, or None if it is not stored."""
+
+    @abstractmethod
+    def save_many(self, records: Iterable[Tuple[Dict, Optional[int]]]) -> List[str]:
+        """Store (record, base version) pairs in one batch; return the ids that conflicted.
+
+        A record is written only if its game's stored version equals the
+        base version, or with a base of None, if the game is not stored yet.
+        Conflicting records are skipped; the rest of the batch is written.
+        """
+
+    @abstractmethod
+    def delete_expired(self, cutoff: float) -> int:
+        """Delete games last active before `cutoff`; return how many."""
+
+    def close(self) -> None:
+        """Release resources held by the store."""
+
+class SQLiteGameStore(GameStore):
+    """SQLite-backed game store in WAL mode.
+
+    WAL lets readers in other processes proceed while one writer commits, and
+    `synchronous=NORMAL` only fsyncs at checkpoints, so a batched flush of many
+    games costs about one disk sync. Connections are per thread.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS games (
+            id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            last_activity REAL NOT NULL,
+            data TEXT NOT NULL
+        )
+    '''
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        with conn:
+            conn.execute(self.SCHEMA)
+            conn.execute('CREATE INDEX IF NOT EXISTS games_last_activity ON games (last_activity)')
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def load(self, game_id: str) -> Optional[Dict]:
+        row = self._connection().execute('SELECT data FROM games WHERE id = ?', (game_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_version(self, game_id: str) -> Optional[int]:
+        row = self._connection().execute('SELECT version FROM games WHERE id = ?', (game_id,)).fetchone()
+        return row[0] if row else None
+
+    def save_many(self, records: Iterable[Tuple[Dict, Optional[int]]]) -> List[str]:
+        conflicts = []
+        conn = self._connection()
+        with conn:  # One transaction for the whole batch
+            for record, base in records:
+                row = (record['version'], record['lastActivity'],
+                       json.dumps(record, separators=(',', ':')), record['id'])
+                if base is None:
+                    cursor = conn.execute('''
+                        INSERT INTO games (version, last_activity, data, id) VALUES (?, ?, ?, ?)
+                        ON CONFLICT(id) DO NOTHING
+                    ''', row)
+                else:
+                    cursor = conn.execute('''
+                        UPDATE games SET version = ?, last_activity = ?, data = ?
+                        WHERE id = ? AND version = ?
+                    ''', (*row, base))
+                if not cursor.rowcount:
+                    conflicts.append(record['id'])
+        return conflicts
+
+    def delete_expired(self, cutoff: float) -> int:
+        conn = self._connection()
+        with conn:
+            return conn.execute('DELETE FROM games WHERE last_activity < ?', (cutoff,)).rowcount
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
@@ -0,0 +1,62 @@
+"""
+Logging setup for Math Crossword Game.
+Per-subsystem log levels and sampled logging for per-move events.
+"""
+
+from typing import Dict, Optional
+import itertools
+import logging
+import weakref
+
+# Subsystem name used in config -> logger name
+SUBSYSTEMS = {
+    'generator': 'app.game.puzzle_generator',
+    'game_state': 'app.game.game_state',
+    'pool': 'app.game.puzzle_pool',
+    'routes': 'app.routes.game'
+}
+
+# Every live SampledLogger, so their rate can be configured in one place.
+# Weak, so samplers created per test or per app do not pile up
+_samplers: 'weakref.WeakSet[SampledLogger]' = weakref.WeakSet()
+
+def configure_logging(levels: Dict[str, str], sample_every: Optional[int] = None) -> None:
+    """Set the level of each subsystem logger, e.g. {'generator': 'WARNING'}.
+
+    `sample_every` sets how many per-move events are counted for each one logged.
+    """
+    for subsystem, level in levels.items():
+        if subsystem not in SUBSYSTEMS:
+            raise ValueError(f'Unknown logging subsystem: {subsystem}')
+        logging.getLogger(SUBSYSTEMS[subsystem]).setLevel(level)
+    if sample_every is not None:
+        if sample_every < 1:
+            raise ValueError('sample_every must be at least 1')
+        for sampler in list(_samplers):
+            sampler.every = sample_every
+
+class SampledLogger:
+    """Logs only every `every`-th event of a high-frequency kind.
+
+    Level checks come first, so when the level is disabled an event costs a
+    single call and the message is never formatted. Arguments are formatted
+    lazily by logging itself, as with a plain logger.
+    """
+
+    def __init__(self, logger: logging.Logger, every: int = 1):
+        self.logger = logger
+        self.every = every
+        self._counter = itertools.count()
+        _samplers.add(self)
+
+    def log(self, level: int, msg: str, *args) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        if next(self._counter) % self.every == 0:
+            self.logger.log(level, msg, *args)
+
+    def debug(self, msg: str, *args) -> None:
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg: str, *args) -> None:
+        self.log(logging.INFO, msg, *args)
@@ -0,0 +1,220 @@
+"""
+In-process metrics for Math Crossword Game.
+Counters, gauges and histograms rendered in the Prometheus text exposition
+format by /api/metrics.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+import math
+import threading
+
+class _ThreadCells:
+    """Per-thread slots of numbers, summed when read.
+
+    Each thread only ever writes its own slots, so updates take no lock; the
+    lock is only taken the first time a thread id is seen and when reading.
+    Slots are keyed by thread id, so a thread started after another one
+    exited may reuse its slots; they are never written by two live threads.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._cells: Dict[int, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self) -> List[float]:
+        ident = threading.get_ident()
+        cell = self._cells.get(ident)
+        if cell is None:
+            with self._lock:
+                cell = self._cells.setdefault(ident, [0] * self._size)
+        return cell
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            cells = list(self._cells.values())
+        return [sum(cell[i] for cell in cells) for i in range(self._size)]
+
+class Counter:
+    """Monotonically increasing value."""
+
+    def __init__(self):
+        self._cells = _ThreadCells(1)
+
+    def inc(self, amount: float = 1) -> None:
+        self._cells.get()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._cells.totals()[0]
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        return [f'{name}{labels} {_format(self.value)}']
+
+class Gauge:
+    """Value that can go up and down, or be read from a callback."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the gauge from `function` at render time."""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        return self._function() if self._function is not None else self._value
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        return [f'{name}{labels} {_format(self.value)}']
+
+class Histogram:
+    """Distribution of observed values over cumulative `le` buckets."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        # One slot per bucket plus +Inf, then the sum of observed values
+        self._cells = _ThreadCells(len(self.buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        cell = self._cells.get()
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        totals = self._cells.totals()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), totals[:-1]):
+            cumulative += count
+            lines.append(f'{name}_bucket{_with_label(labels, "le", _format(bound))} {_format(cumulative)}')
+        lines.append(f'{name}_sum{labels} {_format(totals[-1])}')
+        lines.append(f'{name}_count{labels} {_format(cumulative)}')
+        return lines
+
+class MetricFamily:
+    """A named metric with optional labels; each label combination is a child metric."""
+
+    def __init__(self, name: str, help_text: str, kind: str, factory: Callable, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.label_names:
+            self._children[()] = factory()
+
+    def labels(self, **labels):
+        """Return the child metric for the given label values."""
+        key = tuple(str(labels[name]) for name in self.label_names)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def __getattr__(self, attr):
+        # Unlabelled families act as their single metric (counter.inc(), gauge.set(...))
+        if not self.label_names and not attr.startswith('_'):
+            return getattr(self._children[()], attr)
+        raise AttributeError(attr)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key))
+            lines.extend(child.samples(self.name, f'{{{labels}}}' if labels else ''))
+        return lines
+
+class Registry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        with self._lock:
+            if family.name in self._families:
+                raise ValueError(f'Metric already registered: {family.name}')
+            self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, help_text, 'counter', Counter, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, help_text, 'gauge', Gauge, labels))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float],
+                  labels: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, help_text, 'histogram', lambda: Histogram(buckets), labels))
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            families = list(self._families.values())
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _with_label(labels: str, name: str, value: str) -> str:
+    extra = f'{name}="{value}"'
+    return f'{labels[:-1]},{extra}}}' if labels else f'{{{extra}}}'
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    'mathcrossword_request_duration_seconds', 'API request latency by route',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    labels=('route',))
+ACTIVE_GAMES = registry.gauge(
+    'mathcrossword_active_games', 'Games held by the game manager')
+PUZZLES_GENERATED = registry.counter(
+    'mathcrossword_puzzles_generated_total', 'Puzzles generated', labels=('difficulty',))
+PATTERN_ATTEMPTS = registry.histogram(
+    'mathcrossword_pattern_attempts', 'Pattern attempts per generated puzzle',
+    buckets=(1, 2, 3, 5, 10, 20, 30), labels=('difficulty',))
+FAILED_PLACEMENTS = registry.counter(
+    'mathcrossword_failed_placements_total', 'Equation placements rejected while generating patterns',
+    labels=('difficulty',))
+GENERATION_FAILURES = registry.counter(
+    'mathcrossword_generation_failures_total', 'Generations that found no valid pattern',
+    labels=('difficulty',))
+STORE_CONFLICTS = registry.counter(
+    'mathcrossword_store_conflicts_total',
+    'Games reloaded with local moves pending because another worker stored the game first')
+DROPPED_MOVES = registry.counter(
+    'mathcrossword_dropped_moves_total',
+    'Acknowledged moves that no longer applied when replayed after a store conflict')
+
+def record_generation(difficulty: str, attempts: int, failed_placements: int) -> None:
+    """Record one successfully generated puzzle."""
+    PUZZLES_GENERATED.labels(difficulty=difficulty).inc()
+    PATTERN_ATTEMPTS.labels(difficulty=difficulty).observe(attempts)
+    FAILED_PLACEMENTS.labels(difficulty=difficulty).inc(failed_placements)
+
+def record_generation_failure(difficulty: str, failed_placements: int) -> None:
+    """Record one generation that found no valid pattern."""
+    GENERATION_FAILURES.labels(difficulty=difficulty).inc()
+    FAILED_PLACEMENTS.labels(difficulty=difficulty).inc(failed_placements)
@@ -1,44 +1,173 @@
-from flask import Blueprint, jsonify, request
-from ..game.puzzle_generator import PuzzleGenerator
+from flask import Blueprint, Response, current_app, g, jsonify, request
+from ..game.puzzle_pool import PuzzlePool
+from ..game.puzzle_cache import PuzzleCache
+from ..game.events import EventBroker, sse_frame
 from ..game.game_state import GameStateManager, Move
+from ..game.puzzle_executor import PuzzleExecutor
+from ..game.puzzle_library import open_libraries
+from ..game.storage import SQLiteGameStore
+from ..log import SampledLogger, configure_logging
+from ..metrics import ACTIVE_GAMES, REQUEST_LATENCY, registry
+import atexit
 import logging
+import time
+
+logger = logging.getLogger(__name__)
+move_log = SampledLogger(logger)
 
 bp = Blueprint('game', __name__, url_prefix='/api')
-puzzle_generator = PuzzleGenerator()
+puzzle_cache = PuzzleCache()
+puzzle_pool = PuzzlePool(cache=puzzle_cache)
 game_manager = GameStateManager()
+event_broker = EventBroker()
+puzzle_libraries = {}  # difficulty -> PuzzleLibrary
+
+def init_app(app):
+    """Configure the module-level game services from the app config."""
+    configure_logging(app.config.get('LOG_LEVELS', {}), app.config.get('MOVE_LOG_SAMPLE_EVERY'))
+    ACTIVE_GAMES.set_function(lambda: len(game_manager))
+    event_broker.max_pending = app.config.get('GAME_EVENTS_MAX_PENDING', 64)
+    if publish_update not in game_manager.game_listeners:
+        game_manager.game_listeners.append(publish_update)
+    puzzle_cache.max_bytes = app.config.get('PUZZLE_CACHE_MAX_BYTES', puzzle_cache.max_bytes)
+    puzzle_pool.configure(
+        low_watermark=app.config.get('PUZZLE_POOL_LOW_WATERMARK', 2),
+        high_watermark=app.config.get('PUZZLE_POOL_HIGH_WATERMARK', 8)
+    )
+    puzzle_pool.unique = app.config.get('PUZZLE_UNIQUE', False)
+    workers = app.config.get('PUZZLE_WORKERS', 0)
+    if workers > 0 and puzzle_pool.executor is None:
+        puzzle_pool.executor = PuzzleExecutor(
+            workers=workers,
+            timeout=app.config.get('PUZZLE_JOB_TIMEOUT', 10.0),
+            grid_size=puzzle_pool.grid_size,
+            cache=puzzle_cache,
+            unique=puzzle_pool.unique
+        )
+        atexit.register(puzzle_pool.executor.shutdown)
+    if app.config.get('PUZZLE_POOL_ENABLED', True) and not puzzle_pool.is_running:
+        puzzle_pool.start()
+        atexit.register(puzzle_pool.stop, 1.0)  # Runs before the executor shuts down
+    game_manager.cleanup_threshold = app.config.get('GAME_CLEANUP_THRESHOLD', 3600)
+    sweep_interval = app.config.get('GAME_SWEEP_INTERVAL', 0)
+    if sweep_interval > 0:
+        game_manager.start_sweeper(sweep_interval)
+    library_dir = app.config.get('PUZZLE_LIBRARY_DIR')
+    if library_dir and not puzzle_libraries:
+        puzzle_libraries.update(open_libraries(library_dir, puzzle_pool.grid_size))
+        logger.info('Serving puzzle libraries: %s', ', '.join(
+            f'{difficulty}={len(library)}' for difficulty, library in puzzle_libraries.items()))
+    store_path = app.config.get('GAME_STORE_PATH')
+    if store_path and game_manager.store is None:
+        game_manager.revalidate_interval = app.config.get('GAME_STORE_REVALIDATE_INTERVAL', 1.0)
+        game_manager.attach_store(SQLiteGameStore(store_path),
+                                  flush_interval=app.config.get('GAME_STORE_FLUSH_INTERVAL', 0.5))
+        atexit.register(game_manager.close)
+
+@bp.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@bp.before_request
+def limit_body():
+    """Answer bodies over MAX_CONTENT_LENGTH with a 413 before a view's error handling sees them."""
+    limit = current_app.config.get('MAX_CONTENT_LENGTH')
+    if limit is not None and (request.content_length or 0) > limit:
+        return jsonify({'error': 'Request body too large'}), 413
+
+@bp.after_request
+def record_latency(response):
+    """Observe the request latency under its route path."""
+    start = g.get('request_start')
+    if start is not None and request.url_rule is not None and request.endpoint != 'game.metrics':
+        REQUEST_LATENCY.labels(route=request.url_rule.rule).observe(time.perf_counter() - start)
+    return response
+
+def publish_update(game, result):
+    """Push a mutation to the game's event subscribers as a delta."""
+    if event_broker.has_subscribers(game.id):
+        event_broker.publish(game.id, 'update', result['version'], serialize_result(result, delta=True))
+
+def serialize_grid(grid):
+    """Return the JSON form of a grid of cells, as the frontend expects it."""
+    return [[cell.to_dict() for cell in row] for row in grid]
+
+def serialize_result(result, delta=False):
+    """Return the JSON form of a move/clear result.
+
+    The full form carries the whole grid and number bank. The delta form
+    only carries the cells whose value or correctness flags changed and the
+    new count of each touched bank value; clients apply it on top of the
+    previous version and resync via /api/gameState if they detect a gap.
+    """
+    if not result.get('valid'):
+        return result
+    if delta:
+        return {
+            'valid': True,
+            'delta': True,
+            'version': result['version'],
+            'cells': [dict(row=row, col=col, **result['grid'][row][col].to_dict())
+                      for row, col in result['changes']],
+            'bankChanges': [{'value': value, 'count': count}
+                            for value, count in sorted(result['bankChanges'].items())],
+            'affectedEquations': result['affectedEquations'],
+            'isComplete': result['isComplete']
+        }
+    return {
+        'valid': True,
+        'version': result['version'],
+        'grid': serialize_grid(result['grid']),
+        'numberBank': result['numberBank'].to_list(),
+        'affectedEquations': result['affectedEquations'],
+        'isComplete': result['isComplete']
+    }
 
 @bp.route('/newGame', methods=['GET'])
 def new_game():
     """Generate a new game with specified difficulty."""
     difficulty = request.args.get('difficulty', 'medium')
-    logging.info(f'=== New game requested with difficulty: {difficulty} ===')
-    
+    logger.info('New game requested difficulty=%s', difficulty)
+
     if difficulty not in ['easy', 'medium', 'hard']:
-        logging.error(f'Invalid difficulty level: {difficulty}')
+        logger.warning('Invalid difficulty level: %s', difficulty)
         return jsonify({'error': 'Invalid difficulty level'}), 400
 
+    seed = request.args.get('seed')
+    if seed is not None:
+        # isdigit alone also accepts non-ASCII digits such as '²', which int() rejects
+        if not (seed.isascii() and seed.isdigit()) or int(seed) >= 2 ** 32:
+            logger.warning('Invalid seed: %s', seed)
+            return jsonify({'error': 'Invalid seed'}), 400
+        seed = int(seed)
+
     try:
-        # Generate new puzzle
-        logging.info('Generating new puzzle...')
-        puzzle = puzzle_generator.generate_puzzle(difficulty)
-        logging.info(f'Puzzle generated successfully')
-        
+        library = puzzle_libraries.get(difficulty) if seed is None else None
+        if library is not None:
+            # Decode one random pre-generated record
+            puzzle = library.random()
+        else:
+            # Take a ready puzzle from the pool (generates inline when empty)
+            puzzle = puzzle_pool.get(difficulty, seed=seed)
+
         # Create new game state
         game = game_manager.create_game(puzzle, difficulty)
         
         # Create response
         response = {
             'gameId': game.id,
-            'grid': puzzle['grid'],
+            'grid': serialize_grid(game.grid),
             'numberBank': puzzle['numberBank'],
             'difficulty': difficulty,
-            'gridSize': puzzle['gridSize']
+            'gridSize': puzzle['gridSize'],
+            'seed': puzzle['seed'],
+            'version': game.version
         }
         
         return jsonify(response)
         
     except Exception as e:
-        logging.error(f'Error generating puzzle: {str(e)}')
+        logger.error('Error generating puzzle: %s', e)
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/validateMove', methods=['POST'])
@@ -54,16 +183,53 @@ def validate_move():
             return jsonify({'error': 'Game not found'}), 404
 
         move = Move(data['row'], data['col'], data['value'])
-        result = game.validate_move(move)
-        
-        # Log the move and result
-        logging.info(f'Move validation: row={move.row}, col={move.col}, value={move.value}')
-        logging.info(f'Validation result: {result}')
-        
-        return jsonify(result)
+        with game.lock:  # Serialize the state this move produced, not a later one
+            result = game.validate_move(move)
+            move_log.info('validateMove game=%s row=%s col=%s value=%s valid=%s version=%s',
+                          game.id, move.row, move.col, move.value, result['valid'], game.version)
+            payload = serialize_result(result, delta=bool(data.get('delta')))
+        return jsonify(payload)
         
     except Exception as e:
-        logging.error(f'Error validating move: {str(e)}')
+        logger.error('Error validating move: %s', e)
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/validateMoves', methods=['POST'])
+def validate_moves():
+    """Apply an ordered batch of moves and clears atomically."""
+    try:
+        data = request.get_json()
+        if not data or 'gameId' not in data or not isinstance(data.get('moves'), list):
+            return jsonify({'error': 'Invalid batch data'}), 400
+
+        max_moves = current_app.config.get('MAX_BATCH_MOVES', 500)
+        if len(data['moves']) > max_moves:
+            return jsonify({'error': f'Batch exceeds {max_moves} moves'}), 400
+
+        moves = []
+        for item in data['moves']:
+            if not isinstance(item, dict) or not all(k in item for k in ['row', 'col']):
+                return jsonify({'error': 'Invalid batch data'}), 400
+            if item.get('clear'):
+                moves.append(Move(item['row'], item['col'], None))
+            elif item.get('value') is not None:
+                moves.append(Move(item['row'], item['col'], item['value']))
+            else:
+                return jsonify({'error': 'Invalid batch data'}), 400
+
+        game = game_manager.get_game(data['gameId'])
+        if not game:
+            return jsonify({'error': 'Game not found'}), 404
+
+        with game.lock:
+            result = game.apply_moves(moves)
+            move_log.info('validateMoves game=%s moves=%s valid=%s version=%s',
+                          game.id, len(moves), result['valid'], game.version)
+            payload = serialize_result(result, delta=bool(data.get('delta')))
+        return jsonify(payload)
+
+    except Exception as e:
+        logger.error('Error validating moves: %s', e)
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/clearCell', methods=['POST'])
@@ -78,21 +244,25 @@ def clear_cell():
         if not game:
             return jsonify({'error': 'Game not found'}), 404
 
-        result = game.clear_cell(data['row'], data['col'])
-        
-        # Log the clear operation and result
-        logging.info(f'Clear cell: row={data["row"]}, col={data["col"]}')
-        logging.info(f'Clear result: {result}')
-        
-        return jsonify(result)
+        with game.lock:
+            result = game.clear_cell(data['row'], data['col'])
+            move_log.info('clearCell game=%s row=%s col=%s valid=%s version=%s',
+                          game.id, data['row'], data['col'], result['valid'], game.version)
+            payload = serialize_result(result, delta=bool(data.get('delta')))
+        return jsonify(payload)
         
     except Exception as e:
-        logging.error(f'Error clearing cell: {str(e)}')
+        logger.error('Error clearing cell: %s', e)
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/gameState', methods=['GET'])
 def get_game_state():
-    """Get the current game state."""
+    """Get the current game state.
+
+    The response carries an ETag for the game version and honours
+    If-None-Match, so a poll with nothing new returns 304 without reading
+    the grid. The body is serialized once per version and reused.
+    """
     try:
         game_id = request.args.get('gameId')
         if not game_id:
@@ -102,13 +272,95 @@ def get_game_state():
         if not game:
             return jsonify({'error': 'Game not found'}), 404
 
-        return jsonify({
-            'gameId': game.id,
-            'grid': game.grid,
-            'numberBank': game.number_bank,
-            'difficulty': game.difficulty
-        })
+        etag = game.etag
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            with game.lock:
+                _, body = game_state_body(game)
+                etag = game.etag
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
-        logging.error(f'Error getting game state: {str(e)}')
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        logger.error('Error getting game state: %s', e)
+        return jsonify({'error': str(e)}), 500
+
+def game_state_body(game):
+    """Return (version, serialized state) of a game, cached per version."""
+    with game.lock:
+        cached = game.state_cache
+        if cached is None or cached[0] != game.version:
+            state = {
+                'gameId': game.id,
+                'grid': serialize_grid(game.grid),
+                'numberBank': game.number_bank.to_list(),
+                'difficulty': game.difficulty,
+                'version': game.version,
+                'isComplete': game.is_complete
+            }
+            cached = game.state_cache = (game.version, current_app.json.dumps(state).encode())
+        return cached
+
+@bp.route('/gameEvents', methods=['GET'])
+def game_events():
+    """Stream a game's updates as Server-Sent Events.
+
+    The stream opens with a 'state' event holding the full game state, then
+    sends an 'update' event with the delta of every move or clear (the SSE
+    id is the game version). Comment lines keep idle connections open.
+    """
+    game_id = request.args.get('gameId')
+    if not game_id:
+        return jsonify({'error': 'Game ID is required'}), 400
+
+    game = game_manager.get_game(game_id)
+    if not game:
+        return jsonify({'error': 'Game not found'}), 404
+
+    subscription, version, first = open_event_stream(game)
+    keepalive = current_app.config.get('GAME_EVENTS_KEEPALIVE', 15)
+
+    def stream():
+        try:
+            yield first
+            yield from subscription.frames(version, keepalive)
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return event_stream_response(stream())
+
+def open_event_stream(game, loop=None):
+    """Subscribe to a game and return (subscription, version, opening 'state' frame).
+
+    The subscription is taken before the snapshot so no update falls in
+    between. Pass the running event loop to get an AsyncSubscription.
+    """
+    subscription = event_broker.subscribe(game.id, loop=loop)
+    try:
+        version, body = game_state_body(game)
+    except Exception:
+        event_broker.unsubscribe(subscription)
+        raise
+    return subscription, version, sse_frame('state', body, version)
+
+def event_stream_response(frames):
+    """Wrap SSE frames in a response with the event stream headers."""
+    response = Response(frames, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Keep reverse proxies from buffering the stream
+    return response
+
+@bp.route('/poolStats', methods=['GET'])
+def pool_stats():
+    """Get puzzle pool sizes and hit/miss counters per difficulty, plus cache counters."""
+    stats = puzzle_pool.stats()
+    stats['cache'] = puzzle_cache.stats()
+    return jsonify(stats)
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose request latency, game and generator metrics in Prometheus text format."""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,4 @@
+"""
+Benchmarks for Math Crossword Game.
+Run from the backend directory: `python -m benchmarks.run` for the suite.
+"""
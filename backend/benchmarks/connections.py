@@ -0,0 +1,162 @@
+"""
+Idle connection benchmark.
+Starts the API in a subprocess, either on the threaded Werkzeug server or in
+ASGI mode, holds N idle /api/gameEvents streams open and measures the
+server's threads and memory and the move latency while they are held. All
+streams watch the game being played, so each move is also fanned out to them.
+"""
+
+from typing import Dict, List, Optional
+import argparse
+import http.client
+import json
+import os
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from .stats import Results, percentiles
+
+MODES = ('threaded', 'asgi')
+
+def _raise_file_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def serve(mode: str, port: int) -> None:
+    """Run the API in `mode` on localhost:`port` until killed."""
+    import logging
+    from app import create_app
+
+    _raise_file_limit()
+    app = create_app()
+    logging.disable(logging.INFO)  # Request logs would dominate the timings
+    if mode == 'asgi':
+        from app.asgi import GameASGI, serve as serve_asgi
+        serve_asgi(GameASGI(app), '127.0.0.1', port)
+    else:
+        from werkzeug.serving import make_server
+        server = make_server('127.0.0.1', port, app, threaded=True)
+        server.socket.listen(4096)
+        server.serve_forever()
+
+def _process_stats(pid: int) -> Dict[str, float]:
+    """Return the thread count and resident memory (MB) of a process, where /proc has them."""
+    stats = {}
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key == 'Threads':
+                    stats['threads'] = int(value)
+                elif key == 'VmRSS':
+                    stats['rss_mb'] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return stats
+
+def _wait_for_port(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'Server on port {port} did not start')
+
+def _request(port: int, method: str, path: str, body: Optional[Dict] = None) -> Dict:
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        payload = json.dumps(body) if body is not None else None
+        connection.request(method, path, payload, {'Content-Type': 'application/json'} if payload else {})
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+def _open_stream(port: int, game_id: str) -> socket.socket:
+    sock = socket.create_connection(('127.0.0.1', port), 30)
+    sock.sendall(f'GET /api/gameEvents?gameId={game_id} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    return sock
+
+def _read_snapshot(sock: socket.socket) -> None:
+    """Read until the first SSE frame (the state snapshot) has arrived."""
+    data = b''
+    while b'\n\n' not in data.partition(b'event: state')[2]:
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise RuntimeError('Event stream closed before the snapshot')
+        data += chunk
+
+def bench_connections(mode: str, connections: int = 1000, requests: int = 200,
+                      port: int = 5099) -> Results:
+    """Return server resources and move latency (ms) for `mode` holding `connections` streams."""
+    _raise_file_limit()
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.connections', '--serve', mode, '--port', str(port)],
+        cwd=backend_dir, start_new_session=True)
+    streams: List[socket.socket] = []
+    try:
+        _wait_for_port(port)
+        game = _request(port, 'GET', '/api/newGame?difficulty=medium')
+        baseline = _process_stats(server.pid)
+
+        start = time.perf_counter()
+        streams = [_open_stream(port, game['gameId']) for _ in range(connections)]
+        for sock in streams:
+            _read_snapshot(sock)
+        connect_s = time.perf_counter() - start
+
+        row, col = next((r, c) for r, cells in enumerate(game['grid'])
+                        for c, cell in enumerate(cells) if cell['isEmpty'])
+        move = {'gameId': game['gameId'], 'row': row, 'col': col, 'value': game['numberBank'][0]}
+        clear = {'gameId': game['gameId'], 'row': row, 'col': col}
+        times = []
+        for i in range(requests):
+            begin = time.perf_counter()
+            if i % 2:
+                _request(port, 'POST', '/api/clearCell', clear)
+            else:
+                _request(port, 'POST', '/api/validateMove', move)
+            times.append((time.perf_counter() - begin) * 1000)
+
+        metrics = {f'{key}_ms': value for key, value in percentiles(times).items()}
+        metrics['connect_ms'] = connect_s * 1000
+        held = _process_stats(server.pid)
+        for key in held:
+            metrics[key] = held[key]
+            metrics[f'{key}_per_connection'] = (held[key] - baseline.get(key, 0)) / connections
+        return {f'connections/{mode}/{connections}': metrics}
+    finally:
+        for sock in streams:
+            sock.close()
+        os.killpg(server.pid, signal.SIGKILL)  # The server and its puzzle workers
+        server.wait()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Compare idle connection cost of the serving modes.')
+    parser.add_argument('--serve', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--mode', choices=MODES, nargs='+', default=list(MODES))
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return 0
+
+    from .run import print_results
+    results: Results = {}
+    for mode in args.mode:
+        results.update(bench_connections(mode, args.connections, args.requests, args.port))
+    print_results(results)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Puzzle generation benchmark.
+Times PuzzleGenerator.generate_puzzle per difficulty and grid size over a
+fixed range of seeds and records how many pattern attempts each needed.
+Large grids are timed separately, with the equations placed and peak memory.
+"""
+
+from typing import Iterable
+import logging
+import time
+import tracemalloc
+
+from app.game.puzzle_generator import PuzzleGenerator
+
+from .stats import Results, percentiles
+
+def bench_generation(difficulties: Iterable[str] = ('easy', 'medium', 'hard'),
+                     grid_sizes: Iterable[int] = (11, 13, 15), runs: int = 50) -> Results:
+    """Return timing percentiles (ms), attempt counts and failures per difficulty and size."""
+    logging.getLogger('app.game.puzzle_generator').setLevel(logging.WARNING)
+    results: Results = {}
+    for grid_size in grid_sizes:
+        generator = PuzzleGenerator(grid_size)
+        for difficulty in difficulties:
+            timings, attempts, failures = [], [], 0
+            for seed in range(runs):
+                start = time.perf_counter()
+                try:
+                    generator.generate_puzzle(difficulty, seed=seed)
+                except ValueError:
+                    failures += 1
+                    continue
+                timings.append((time.perf_counter() - start) * 1000)
+                attempts.append(generator.attempts)
+
+            metrics = {'failures': failures}
+            if timings:
+                metrics.update({f'{key}_ms': value for key, value in percentiles(timings).items()})
+                metrics['mean_ms'] = sum(timings) / len(timings)
+                metrics['attempts_mean'] = sum(attempts) / len(attempts)
+                metrics['attempts_max'] = max(attempts)
+                metrics['puzzles_per_s'] = len(timings) / (sum(timings) / 1000)
+            results[f'generate/{difficulty}/{grid_size}'] = metrics
+    return results
+
+def bench_large_generation(difficulties: Iterable[str] = ('easy', 'medium', 'hard'),
+                           grid_sizes: Iterable[int] = (25, 50, 100), runs: int = 10) -> Results:
+    """Return timings (ms), equation counts, density and peak memory (KB) on large grids."""
+    logging.getLogger('app.game.puzzle_generator').setLevel(logging.WARNING)
+    results: Results = {}
+    for grid_size in grid_sizes:
+        generator = PuzzleGenerator(grid_size)
+        for difficulty in difficulties:
+            timings, equations = [], 0
+            for seed in range(runs):
+                start = time.perf_counter()
+                puzzle = generator.generate_puzzle(difficulty, seed=seed)
+                timings.append((time.perf_counter() - start) * 1000)
+                equations = len(puzzle['equations'])
+
+            # Memory is traced in a separate run, tracing slows generation down
+            tracemalloc.start()
+            generator.generate_puzzle(difficulty, seed=0)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            metrics = {f'{key}_ms': value for key, value in percentiles(timings).items()}
+            metrics['equations'] = equations
+            metrics['density'] = equations * 5 / grid_size ** 2
+            metrics['peak_kb'] = peak / 1024
+            metrics['equations_per_s'] = equations * len(timings) / (sum(timings) / 1000)
+            results[f'generate_large/{difficulty}/{grid_size}'] = metrics
+    return results
@@ -0,0 +1,72 @@
+"""
+Logging overhead benchmark.
+Times move/clear cycles on a GameState and through the Flask test client
+with the subsystem loggers at INFO (every event logged) and at WARNING.
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+
+from app import create_app
+from app.game.game_state import GameState, Move
+from app.log import configure_logging
+
+def _game() -> GameState:
+    """A single-equation game (2 + _ = 5) with 3 and 4 in the bank."""
+    def number(value):
+        return {'value': value, 'isFixed': value is not None, 'isEmpty': value is None,
+                'inEquation': True}
+
+    def operator(symbol):
+        return {'isOperator': True, 'operator': symbol, 'inEquation': True}
+
+    grid = [[number(2), operator('+'), number(None), operator('='), number(5)]]
+    return GameState(grid=grid, equations=[], number_bank=[3, 4], difficulty='easy')
+
+def bench_game_state(cycles: int) -> float:
+    """Return move+clear cycles per second on a GameState."""
+    game = _game()
+    start = time.perf_counter()
+    for _ in range(cycles):
+        game.validate_move(Move(0, 2, 3))
+        game.clear_cell(0, 2)
+    return cycles / (time.perf_counter() - start)
+
+def bench_routes(client, cycles: int) -> float:
+    """Return validateMove+clearCell request pairs per second via the test client."""
+    game = json.loads(client.get('/api/newGame?difficulty=easy').data)
+    row, col = next((r, c) for r, row in enumerate(game['grid'])
+                    for c, cell in enumerate(row) if cell['isEmpty'])
+    value = game['numberBank'][0]
+    move = json.dumps({'gameId': game['gameId'], 'row': row, 'col': col, 'value': value})
+    clear = json.dumps({'gameId': game['gameId'], 'row': row, 'col': col})
+    start = time.perf_counter()
+    for _ in range(cycles):
+        client.post('/api/validateMove', data=move, content_type='application/json')
+        client.post('/api/clearCell', data=clear, content_type='application/json')
+    return cycles / (time.perf_counter() - start)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cycles', type=int, default=2000)
+    args = parser.parse_args()
+
+    # Real formatting and I/O, without flooding the terminal
+    handler = logging.FileHandler(os.devnull)
+    logging.getLogger().addHandler(handler)
+    logging.getLogger().setLevel(logging.DEBUG)
+
+    app = create_app()
+    client = app.test_client()
+    subsystems = ('generator', 'game_state', 'pool', 'routes')
+    for level in ('INFO', 'WARNING'):
+        configure_logging({name: level for name in subsystems}, sample_every=1)
+        state_rate = bench_game_state(args.cycles)
+        route_rate = bench_routes(client, args.cycles // 4)
+        print(f'{level:8} game_state {state_rate:10.0f} cycles/s   routes {route_rate:8.0f} cycles/s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Move validation benchmarks.
+Measures GameState move/clear throughput on a generated puzzle and the
+end-to-end request rate through the Flask test client.
+"""
+
+import json
+import logging
+import time
+
+from app.game.game_state import GameState, Move
+from app.game.puzzle_generator import PuzzleGenerator
+
+from .stats import Results, percentiles
+
+def _quiet() -> None:
+    for name in ('app.game.puzzle_generator', 'app.game.game_state', 'app.routes.game'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+def bench_game_state(cycles: int = 5000, difficulty: str = 'medium', seed: int = 1) -> Results:
+    """Return move and clear timings (us) and rates for GameState."""
+    _quiet()
+    puzzle = PuzzleGenerator().generate_puzzle(difficulty, seed=seed)
+    game = GameState(puzzle['grid'], puzzle['equations'], puzzle['numberBank'], difficulty)
+    empty = [(r, c) for r, row in enumerate(game.grid) for c, cell in enumerate(row) if cell.is_empty]
+    value = puzzle['numberBank'][0]
+
+    move_times, clear_times = [], []
+    for i in range(cycles):
+        row, col = empty[i % len(empty)]
+        start = time.perf_counter()
+        game.validate_move(Move(row, col, value))
+        middle = time.perf_counter()
+        game.clear_cell(row, col)
+        end = time.perf_counter()
+        move_times.append((middle - start) * 1e6)
+        clear_times.append((end - middle) * 1e6)
+
+    results: Results = {}
+    for name, times in (('move', move_times), ('clear', clear_times)):
+        metrics = {f'{key}_us': value for key, value in percentiles(times).items()}
+        metrics['ops_per_s'] = len(times) / (sum(times) / 1e6)
+        results[f'game_state/{name}'] = metrics
+    return results
+
+def bench_routes(client, cycles: int = 500) -> Results:
+    """Return request rates and latency percentiles (ms) through the test client."""
+    _quiet()
+    game = json.loads(client.get('/api/newGame?difficulty=medium').data)
+    row, col = next((r, c) for r, cells in enumerate(game['grid'])
+                    for c, cell in enumerate(cells) if cell['isEmpty'])
+    move = json.dumps({'gameId': game['gameId'], 'row': row, 'col': col,
+                       'value': game['numberBank'][0]})
+    clear = json.dumps({'gameId': game['gameId'], 'row': row, 'col': col})
+    requests = {
+        'validateMove': lambda: client.post('/api/validateMove', data=move, content_type='application/json'),
+        'clearCell': lambda: client.post('/api/clearCell', data=clear, content_type='application/json'),
+        'gameState': lambda: client.get(f'/api/gameState?gameId={game["gameId"]}')
+    }
+
+    times = {name: [] for name in requests}
+    for _ in range(cycles):
+        for name, send in requests.items():
+            start = time.perf_counter()
+            send()
+            times[name].append((time.perf_counter() - start) * 1000)
+
+    results: Results = {}
+    for name, samples in times.items():
+        metrics = {f'{key}_ms': value for key, value in percentiles(samples).items()}
+        metrics['requests_per_s'] = len(samples) / (sum(samples) / 1000)
+        results[f'routes/{name}'] = metrics
+    return results
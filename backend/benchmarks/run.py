@@ -0,0 +1,75 @@
+"""
+Benchmark suite runner.
+
+    python -m benchmarks.run                       # run and print
+    python -m benchmarks.run --save benchmarks/baselines/local.json
+    python -m benchmarks.run --compare benchmarks/baselines/local.json --threshold 0.2
+
+With --compare the exit status is 1 when any metric regressed by more than
+the threshold, so it can gate CI on a fixed machine.
+"""
+
+import argparse
+import sys
+
+from app import create_app
+
+from .generation import bench_generation, bench_large_generation
+from .moves import bench_game_state, bench_routes
+from .solver import bench_solver
+from .stats import compare, load_baseline, save_baseline
+
+SUITES = ('generation', 'large', 'solver', 'game_state', 'routes')
+
+def run_suite(quick: bool = False, only=None):
+    """Run the selected benchmarks and return their combined results."""
+    only = set(only or SUITES)
+    results = {}
+    if 'generation' in only:
+        results.update(bench_generation(runs=10 if quick else 50))
+    if 'large' in only:
+        results.update(bench_large_generation(runs=2 if quick else 10))
+    if 'solver' in only:
+        results.update(bench_solver(runs=20 if quick else 200))
+    if 'game_state' in only:
+        results.update(bench_game_state(cycles=500 if quick else 5000))
+    if 'routes' in only:
+        app = create_app()
+        app.config['TESTING'] = True
+        results.update(bench_routes(app.test_client(), cycles=50 if quick else 500))
+    return results
+
+def print_results(results) -> None:
+    for name in sorted(results):
+        metrics = '  '.join(f'{metric}={value:.4g}' for metric, value in sorted(results[name].items()))
+        print(f'{name:28} {metrics}')
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Run the backend benchmark suite.')
+    parser.add_argument('--quick', action='store_true', help='fewer runs, for a smoke check')
+    parser.add_argument('--only', nargs='+', choices=SUITES)
+    parser.add_argument('--save', metavar='PATH', help='write results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed slowdown as a fraction (default 0.1 = 10%%)')
+    args = parser.parse_args(argv)
+
+    results = run_suite(quick=args.quick, only=args.only)
+    print_results(results)
+
+    if args.save:
+        save_baseline(args.save, results)
+        print(f'Saved baseline to {args.save}')
+
+    if args.compare:
+        regressions = compare(load_baseline(args.compare), results, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+        print(f'\nNo regressions beyond {args.threshold:.0%}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
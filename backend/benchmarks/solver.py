@@ -0,0 +1,52 @@
+"""
+Puzzle solver benchmark.
+Times a uniqueness check (PuzzleSolver construction plus count_solutions up
+to two) on generated puzzles per difficulty and grid size, and the cost
+unique=True adds to generate_puzzle. The solver has to stay well under a
+millisecond on 11x11 hard puzzles to run inside the generation loop.
+"""
+
+from typing import Iterable
+import logging
+import time
+
+from app.game.puzzle_generator import PuzzleGenerator
+from app.game.solver import PuzzleSolver, hidden_cells
+
+from .stats import Results, percentiles
+
+def bench_solver(difficulties: Iterable[str] = ('easy', 'medium', 'hard'),
+                 grid_sizes: Iterable[int] = (11, 15), runs: int = 200) -> Results:
+    """Return check timings (us), the share of unique puzzles and unique generation cost (ms)."""
+    logging.getLogger('app.game.puzzle_generator').setLevel(logging.WARNING)
+    results: Results = {}
+    for grid_size in grid_sizes:
+        generator = PuzzleGenerator(grid_size)
+        for difficulty in difficulties:
+            timings, unique = [], 0
+            generate_ms, unique_ms, revealed = 0.0, 0.0, 0
+            for seed in range(runs):
+                start = time.perf_counter()
+                puzzle = generator.generate_puzzle(difficulty, seed=seed)
+                generate_ms += (time.perf_counter() - start) * 1000
+
+                args = (puzzle['equations'], hidden_cells(puzzle['grid']), puzzle['numberBank'])
+                start = time.perf_counter()
+                count = PuzzleSolver(*args).count_solutions(limit=2)
+                timings.append((time.perf_counter() - start) * 1e6)
+                unique += count == 1
+
+                start = time.perf_counter()
+                generator.generate_puzzle(difficulty, seed=seed, unique=True)
+                unique_ms += (time.perf_counter() - start) * 1000
+                revealed += generator.revealed
+
+            metrics = {f'{key}_us': value for key, value in percentiles(timings).items()}
+            metrics['max_us'] = max(timings)
+            metrics['checks_per_s'] = len(timings) / (sum(timings) / 1e6)
+            metrics['unique_share'] = unique / runs
+            metrics['generate_mean_ms'] = generate_ms / runs
+            metrics['generate_unique_mean_ms'] = unique_ms / runs
+            metrics['revealed_mean'] = revealed / runs
+            results[f'solve/{difficulty}/{grid_size}'] = metrics
+    return results
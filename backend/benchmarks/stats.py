@@ -0,0 +1,75 @@
+"""
+Timing statistics and baselines for the benchmarks.
+Results are {benchmark name: {metric: value}}. Metrics ending in `_per_s`
+(rates) and those listed in HIGHER_IS_BETTER are higher-is-better; every
+other metric is lower-is-better.
+"""
+
+from typing import Dict, List, Sequence
+import json
+import os
+import platform
+import time
+
+Results = Dict[str, Dict[str, float]]
+
+def percentiles(samples: Sequence[float], points: Sequence[int] = (50, 90, 99)) -> Dict[str, float]:
+    """Return nearest-rank percentiles of samples as {'p50': ..., ...}."""
+    ordered = sorted(samples)
+    result = {}
+    for point in points:
+        rank = max(0, min(len(ordered) - 1, -(-point * len(ordered) // 100) - 1))
+        result[f'p{point}'] = ordered[rank]
+    return result
+
+# Metrics other than rates where a rise is an improvement: generated puzzle
+# size (generation), and the share of plain puzzles that are already unique (solver)
+HIGHER_IS_BETTER = frozenset({'equations', 'density', 'unique_share'})
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith('_per_s') or metric in HIGHER_IS_BETTER
+
+def compare(baseline: Results, current: Results, threshold: float = 0.1) -> List[str]:
+    """List metrics that got worse than the baseline by more than `threshold` (a fraction).
+
+    Benchmarks or metrics missing from either side are skipped. A metric
+    with a zero baseline (no failures, say) has no relative change, so any
+    worsening from zero counts as a regression.
+    """
+    regressions = []
+    for name, metrics in current.items():
+        for metric, value in metrics.items():
+            base = baseline.get(name, {}).get(metric)
+            if base is None:
+                continue
+            if base == 0:
+                worse = value > 0 if not higher_is_better(metric) else value < 0
+                if worse:
+                    regressions.append(f'{name} {metric}: 0 -> {value:g} (worse than a zero baseline)')
+                continue
+            change = (value - base) / abs(base)
+            if higher_is_better(metric):
+                change = -change
+            if change > threshold:
+                regressions.append(f'{name} {metric}: {base:g} -> {value:g} ({change:+.0%} worse)')
+    return regressions
+
+def save_baseline(path: str, results: Results) -> None:
+    """Write results to a JSON baseline along with where they were measured."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    document = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'results': results
+    }
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+def load_baseline(path: str) -> Results:
+    with open(path) as f:
+        return json.load(f)['results']
@@ -16,6 +16,11 @@ VALID_OPERATORS = ['+', '-', '*']  # Removed division for simplicity
 MIN_NUMBER = 1
 MAX_NUMBER = 15  # Adjusted based on example
 
+# Maximum moves accepted by /api/validateMoves in one request
+MAX_BATCH_MOVES = 500
+# Request body cap in bytes; a full batch of MAX_BATCH_MOVES moves is about 20 KB
+MAX_CONTENT_LENGTH = 64 * 1024
+
 # Equation counts per difficulty
 EQUATION_COUNTS = {
     'easy': 3,
@@ -28,4 +33,49 @@ PREFILL_PERCENTAGES = {
     'easy': 0.7,    # 70% of numbers pre-filled
     'medium': 0.5,  # 50% of numbers pre-filled
     'hard': 0.3     # 30% of numbers pre-filled
-} 
\ No newline at end of file
+}
+
+# Puzzle pool settings (ready puzzles kept per difficulty)
+PUZZLE_POOL_ENABLED = True
+PUZZLE_POOL_LOW_WATERMARK = 2   # Refill starts below this many puzzles
+PUZZLE_POOL_HIGH_WATERMARK = 8  # Refill stops at this many puzzles
+# Generate only puzzles with exactly one solution (the solver reveals cells
+# until the fill is unique). Library puzzles are unique only if exported with --unique.
+PUZZLE_UNIQUE = os.environ.get('PUZZLE_UNIQUE', '1') == '1'
+
+# Log level per subsystem (see app/log.py)
+LOG_LEVELS = {
+    'generator': 'WARNING',  # Per-attempt details are DEBUG, the generated puzzle summary INFO
+    'game_state': 'WARNING',
+    'pool': 'INFO',
+    'routes': 'INFO'
+}
+MOVE_LOG_SAMPLE_EVERY = 100  # Log one in this many per-move events
+
+# Puzzle generation worker processes (0 = generate in the web process).
+# Off by default so every app, including test apps, doesn't start processes.
+PUZZLE_WORKERS = int(os.environ.get('PUZZLE_WORKERS', 0))
+# Seconds before a request stops waiting for a generation job. The job is not
+# killed: its worker stays busy until the job finishes.
+PUZZLE_JOB_TIMEOUT = 10.0
+
+# Pre-generated puzzle libraries: a directory of <difficulty>.puzzles files
+# written by `export.py --library`. Unseeded new games are drawn from them.
+PUZZLE_LIBRARY_DIR = os.environ.get('PUZZLE_LIBRARY_DIR')
+
+# Puzzle cache settings (seeded puzzles memoized by seed, difficulty and grid size)
+PUZZLE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Game expiry settings
+GAME_CLEANUP_THRESHOLD = 3600  # Seconds of inactivity before a game is removed
+GAME_SWEEP_INTERVAL = 60       # Background sweep period in seconds (0 = sweep on each lookup)
+
+# Durable game store (SQLite in WAL mode, shared by all worker processes).
+# Unset keeps games in process memory only.
+GAME_STORE_PATH = os.environ.get('GAME_STORE_PATH')
+GAME_STORE_FLUSH_INTERVAL = 0.5       # Seconds between write-behind batches
+GAME_STORE_REVALIDATE_INTERVAL = 1.0  # Max seconds a cached game goes unchecked against the store
+
+# Game event streams (/api/gameEvents)
+GAME_EVENTS_KEEPALIVE = 15     # Seconds between keep-alive comments on idle streams
+GAME_EVENTS_MAX_PENDING = 64   # Queued updates per subscriber before it is dropped
@@ -0,0 +1,165 @@
+"""Bulk puzzle export to JSONL.
+
+    python export.py -n 1000 --difficulty medium -o puzzles.jsonl
+    python export.py -n 200 --grid-size 50 --seed 1 > poster-pack.jsonl
+    python export.py -n 50000 --difficulty easy --library puzzles/easy.puzzles --unique
+
+Each line is a puzzle in the packed form of `pack_puzzle` (load it back with
+`unpack_puzzle`). With --library puzzles are written to a binary puzzle
+library instead, which the server reads from PUZZLE_LIBRARY_DIR. Puzzles are
+generated on every core and written in seed order as they finish, so memory
+stays flat however many are exported. With --seed the pack is reproducible:
+puzzle i uses seed + i.
+"""
+
+from typing import Callable, Dict, Iterable, Optional
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import secrets
+import sys
+import time
+
+from app.game.puzzle_executor import _generate_packed_batch, _init_worker, unpack_puzzle
+from app.game.puzzle_generator import PuzzleGenerator
+from app.game.puzzle_library import MAX_SEED, PuzzleLibraryWriter
+
+BATCH_SIZE = 64  # Seeds per worker job
+
+def fingerprint(packed: Dict) -> bytes:
+    """Return a digest of a packed puzzle's content, ignoring its seed."""
+    content = json.dumps([packed['cells'], packed['equations']], separators=(',', ':'))
+    return hashlib.blake2b(content.encode(), digest_size=16).digest()
+
+def export_puzzles(write: Callable[[Dict], None], count: int, difficulty: str = 'medium', grid_size: int = 11,
+                   seeds: Optional[Iterable[int]] = None, density: Optional[float] = None,
+                   workers: Optional[int] = None, unique: bool = False,
+                   batch_size: int = BATCH_SIZE) -> Dict[str, float]:
+    """Pass `count` distinct packed puzzles to `write` and return export statistics.
+
+    Seeds are taken from `seeds` in order (random seeds when None) until
+    `count` puzzles were written; puzzles identical to an earlier one and
+    seeds the generator fails on are skipped. Stops early if `seeds` runs out
+    or `max(count, 100)` seeds in a row give nothing new. With `unique` every
+    puzzle has exactly one solution. Each worker job generates up to
+    `batch_size` seeds, so the per-job round trip is paid once per batch.
+    """
+    workers = workers or os.cpu_count() or 1
+    if seeds is None:
+        seeds = iter(lambda: secrets.randbelow(2 ** 32), None)
+    seeds = iter(seeds)
+    # Small exports still spread over every worker
+    batch_size = max(1, min(batch_size, -(-count // workers)))
+
+    stats = {'written': 0, 'duplicates': 0, 'failures': 0}
+    seen = set()  # 16-byte digests; the puzzles themselves are never kept
+    misses, max_misses = 0, max(count, 100)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(grid_size,)) as executor:
+        # A bounded window of batches keeps every worker busy without queueing
+        # the whole run; batches are consumed in submission order, so puzzles
+        # are written in seed order
+        pending = deque()
+        queued = 0  # Seeds in pending batches
+
+        def submit() -> bool:
+            nonlocal queued
+            batch = list(itertools.islice(seeds, batch_size))
+            if not batch:
+                return False
+            pending.append((executor.submit(_generate_packed_batch, difficulty, batch, density, unique),
+                            len(batch)))
+            queued += len(batch)
+            return True
+
+        while len(pending) < workers * 2 and queued < count and submit():
+            pass
+        while pending and stats['written'] < count and misses < max_misses:
+            future, size = pending.popleft()
+            queued -= size
+            for packed in future.result():
+                if stats['written'] >= count or misses >= max_misses:
+                    break
+                if packed is None:
+                    stats['failures'] += 1
+                else:
+                    digest = fingerprint(packed)
+                    if digest in seen:
+                        packed = None
+                        stats['duplicates'] += 1
+                    else:
+                        seen.add(digest)
+                if packed is None:
+                    misses += 1
+                else:
+                    misses = 0
+                    del packed['stats']
+                    write(packed)
+                    stats['written'] += 1
+            while len(pending) < workers * 2 and stats['written'] + queued < count and submit():
+                pass
+        for future, _ in pending:
+            future.cancel()
+
+    stats['seconds'] = time.perf_counter() - start
+    stats['puzzles_per_s'] = stats['written'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Generate puzzles in bulk as JSONL.')
+    parser.add_argument('-n', '--count', type=int, required=True, help='number of puzzles')
+    parser.add_argument('--difficulty', choices=('easy', 'medium', 'hard'), default='medium')
+    parser.add_argument('--grid-size', type=int, default=11)
+    parser.add_argument('--density', type=float, help='share of cells covered by equations')
+    parser.add_argument('--seed', type=int, help='first seed; puzzle i uses seed + i')
+    parser.add_argument('--workers', type=int, help='worker processes (default: all cores)')
+    parser.add_argument('--unique', action='store_true', help='only puzzles with exactly one solution')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('-o', '--output', default='-', help='JSONL file, or - for stdout')
+    output.add_argument('--library', metavar='PATH', help='write a binary puzzle library instead')
+    args = parser.parse_args(argv)
+
+    # Bad arguments would otherwise only show up as every seed failing in the workers
+    if args.grid_size < PuzzleGenerator.MIN_GRID_SIZE:
+        parser.error(f'--grid-size must be at least {PuzzleGenerator.MIN_GRID_SIZE}')
+    if args.density is not None and not 0 < args.density <= PuzzleGenerator.MAX_DENSITY:
+        parser.error(f'--density must be in (0, {PuzzleGenerator.MAX_DENSITY}]')
+
+    logging.basicConfig(level=logging.WARNING)
+    seeds = itertools.count(args.seed) if args.seed is not None else None
+    if args.library:
+        if args.seed is not None:
+            if not 0 <= args.seed <= MAX_SEED:
+                parser.error(f'--seed must be in 0..{MAX_SEED} with --library')
+            seeds = iter(range(args.seed, MAX_SEED + 1))  # Library records hold 32-bit seeds
+        max_equations = PuzzleGenerator(args.grid_size).target_equations(args.difficulty, args.density)
+        out = PuzzleLibraryWriter(args.library, args.difficulty, args.grid_size, max_equations)
+
+        def write(packed: Dict) -> None:
+            out.append(unpack_puzzle(packed))
+    else:
+        out = sys.stdout if args.output == '-' else open(args.output, 'w')
+
+        def write(packed: Dict) -> None:
+            out.write(json.dumps(packed, separators=(',', ':')) + '\n')
+    try:
+        stats = export_puzzles(write, args.count, args.difficulty, args.grid_size,
+                               seeds, args.density, args.workers, args.unique)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Exported {stats['written']} puzzles in {stats['seconds']:.2f}s "
+          f"({stats['puzzles_per_s']:.1f} puzzles/s), skipped {stats['duplicates']} duplicates "
+          f"and {stats['failures']} failed seeds", file=sys.stderr)
+    return 0 if stats['written'] == args.count else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
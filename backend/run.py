@@ -1,8 +1,35 @@
-"""Main entry point for the Flask application."""
+"""Main entry point for the Flask application.
+
+    python run.py            # threaded Flask development server
+    python run.py --asgi     # async serving mode (uvicorn if installed)
+"""
+
+import argparse
+import logging
 
 from app import create_app
 
+logging.basicConfig(level=logging.INFO)
+
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Run the Math Crossword API.')
+    parser.add_argument('--asgi', action='store_true', help='serve from an asyncio event loop')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--threads', type=int, default=32,
+                        help='threads running Flask views in ASGI mode')
+    args = parser.parse_args()
+
+    if args.asgi:
+        from app.asgi import GameASGI, serve
+        application = GameASGI(app, threads=args.threads)
+        try:
+            import uvicorn
+        except ImportError:
+            serve(application, args.host, args.port)
+        else:
+            uvicorn.run(application, host=args.host, port=args.port)
+    else:
+        app.run(host=args.host, port=args.port, debug=True)
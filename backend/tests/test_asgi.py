@@ -0,0 +1,196 @@
+import asyncio
+import json
+from app.asgi import GameASGI, _environ, _handle_connection
+from app.metrics import registry
+from app.routes import game as routes
+
+async def _request(application, method, path, query=b'', body=b''):
+    """Drive a buffered request through the ASGI app; return (status, headers, body)."""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    headers = [(b'content-type', b'application/json')] if body else []
+    await application({'type': 'http', 'method': method, 'path': path, 'query_string': query,
+                       'headers': headers}, receive, send)
+    return (messages[0]['status'], dict(messages[0]['headers']),
+            b''.join(m.get('body', b'') for m in messages[1:]))
+
+class _Stream:
+    """A client holding a /api/gameEvents response open until `disconnect` is called."""
+
+    def __init__(self, application, game_id, headers=()):
+        self.frames = asyncio.Queue()
+        self.start = None
+        self._gone = asyncio.Event()
+        self._sent_request = False
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/gameEvents',
+                 'query_string': f'gameId={game_id}'.encode(), 'headers': list(headers)}
+        self.task = asyncio.ensure_future(application(scope, self._receive, self._send))
+
+    async def _receive(self):
+        if not self._sent_request:
+            self._sent_request = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self._gone.wait()
+        return {'type': 'http.disconnect'}
+
+    async def _send(self, message):
+        if message['type'] == 'http.response.start':
+            self.start = message
+        elif message.get('body'):
+            await self.frames.put(message['body'])
+
+    async def next_event(self):
+        fields = dict(line.split(': ', 1) for line in
+                      (await asyncio.wait_for(self.frames.get(), 5)).decode().strip().split('\n'))
+        return fields['event'], int(fields['id']), json.loads(fields['data'])
+
+    def disconnect(self):
+        self._gone.set()
+
+def test_bridge_serves_flask_routes(app):
+    """Test that ordinary requests run the Flask views, with their status codes and headers."""
+    application = GameASGI(app, threads=2)
+
+    async def scenario():
+        status, headers, body = await _request(application, 'GET', '/api/newGame', b'difficulty=medium')
+        assert status == 200
+        assert headers[b'content-type'] == b'application/json'
+        assert 'gameId' in json.loads(body)
+
+        status, _, _ = await _request(application, 'POST', '/api/validateMove', body=b'{}')
+        assert status == 400
+        status, _, _ = await _request(application, 'GET', '/api/gameEvents', b'gameId=missing')
+        assert status == 404
+
+    asyncio.run(scenario())
+
+def test_event_streams_run_on_the_loop(app):
+    """Test that event streams get the snapshot and every update, then unsubscribe on disconnect."""
+    application = GameASGI(app, threads=2)
+
+    async def scenario():
+        _, _, body = await _request(application, 'GET', '/api/newGame', b'difficulty=medium')
+        puzzle = json.loads(body)
+        game_id = puzzle['gameId']
+        streams = [_Stream(application, game_id) for _ in range(2)]
+        for stream in streams:
+            event, version, _ = await stream.next_event()
+            assert (event, version) == ('state', 0)
+            assert stream.start['status'] == 200
+        assert routes.event_broker.subscriber_count(game_id) == 2
+
+        row, col = next((r, c) for r, cells in enumerate(puzzle['grid'])
+                        for c, cell in enumerate(cells) if cell['isEmpty'])
+        move = {'gameId': game_id, 'row': row, 'col': col, 'value': puzzle['numberBank'][0]}
+        status, _, _ = await _request(application, 'POST', '/api/validateMove',
+                                      body=json.dumps(move).encode())
+        assert status == 200
+        for stream in streams:
+            event, version, data = await stream.next_event()
+            assert (event, version) == ('update', 1)
+            assert (row, col) in [(cell['row'], cell['col']) for cell in data['cells']]
+
+        for stream in streams:
+            stream.disconnect()
+        await asyncio.wait_for(asyncio.gather(*(stream.task for stream in streams)), 5)
+        assert routes.event_broker.subscriber_count(game_id) == 0
+
+    asyncio.run(scenario())
+
+def _stream_requests() -> int:
+    prefix = 'mathcrossword_request_duration_seconds_count{route="/api/gameEvents"} '
+    return next((int(line[len(prefix):]) for line in registry.render().splitlines()
+                 if line.startswith(prefix)), 0)
+
+def test_event_streams_match_flask(app, client):
+    """Test that loop streams send the Flask view's headers and record the request latency."""
+    application = GameASGI(app, threads=2)
+    game_id = client.get('/api/newGame?difficulty=easy').get_json()['gameId']
+    response = client.get(f'/api/gameEvents?gameId={game_id}', headers={'Origin': 'http://example.com'})
+    flask_headers = response.headers
+    response.close()
+    before = _stream_requests()
+
+    async def scenario():
+        stream = _Stream(application, game_id, [(b'origin', b'http://example.com')])
+        await stream.next_event()
+        stream.disconnect()
+        await asyncio.wait_for(stream.task, 5)
+        return dict(stream.start['headers'])
+
+    headers = asyncio.run(scenario())
+    for name in ('Content-Type', 'Cache-Control', 'X-Accel-Buffering', 'Access-Control-Allow-Origin'):
+        assert headers[name.lower().encode()] == flask_headers[name].encode()
+    assert _stream_requests() == before + 1
+
+def test_request_hooks_can_answer_event_streams(app):
+    """Test that a before_request response is sent instead of opening the stream, as in Flask."""
+    app.before_request(lambda: ({'error': 'blocked'}, 403))
+    application = GameASGI(app, threads=2)
+    game_id = routes.game_manager.create_game(
+        {'grid': [[{'value': None}]], 'equations': [], 'numberBank': []}, 'easy').id
+
+    async def scenario():
+        return await _request(application, 'GET', '/api/gameEvents', f'gameId={game_id}'.encode())
+
+    status, _, body = asyncio.run(scenario())
+    assert status == 403
+    assert json.loads(body) == {'error': 'blocked'}
+    assert routes.event_broker.subscriber_count(game_id) == 0
+
+def test_request_bodies_are_capped(app, client):
+    """Test that bodies over MAX_CONTENT_LENGTH get a 413 on the Flask, ASGI and built-in server paths."""
+    app.config['MAX_CONTENT_LENGTH'] = 100
+    body = json.dumps({'gameId': 'x', 'moves': [{'row': 0, 'col': 0, 'value': 1}] * 20}).encode()
+    assert client.post('/api/validateMoves', data=body, content_type='application/json').status_code == 413
+
+    application = GameASGI(app, threads=2)
+    called = []
+
+    async def record(scope, receive, send):
+        called.append(scope)
+
+    class Writer:
+        data = b''
+
+        def write(self, data):
+            self.data += data
+
+        async def drain(self):
+            pass
+
+        def close(self):
+            pass
+
+        def get_extra_info(self, name):
+            return None
+
+    async def scenario():
+        status, _, _ = await _request(application, 'POST', '/api/validateMoves', body=body)
+        reader, writer = asyncio.StreamReader(), Writer()
+        reader.feed_data(b'POST /api/validateMoves HTTP/1.1\r\nContent-Length: 1000000000\r\n\r\n')
+        await _handle_connection(record, reader, writer, max_body=application.max_body)
+        return status, writer.data
+
+    status, response = asyncio.run(scenario())
+    assert status == 413
+    assert response.startswith(b'HTTP/1.1 413 ')
+    assert not called
+
+def test_environ_from_scope():
+    """Test the WSGI environ built for an ASGI request."""
+    environ = _environ({'method': 'POST', 'path': '/api/validateMove', 'query_string': b'a=1',
+                        'headers': [(b'content-type', b'application/json'), (b'x-a', b'1'),
+                                    (b'x-a', b'2'), (b'content-length', b'99')]}, b'{}')
+    assert environ['PATH_INFO'] == '/api/validateMove'
+    assert environ['QUERY_STRING'] == 'a=1'
+    assert environ['CONTENT_TYPE'] == 'application/json'
+    assert environ['CONTENT_LENGTH'] == '2'
+    assert environ['HTTP_X_A'] == '1,2'
+    assert environ['wsgi.input'].read() == b'{}'
@@ -0,0 +1,47 @@
+from benchmarks.stats import compare, load_baseline, percentiles, save_baseline
+
+def test_percentiles_nearest_rank():
+    """Test nearest-rank percentiles."""
+    samples = list(range(1, 101))
+    assert percentiles(samples) == {'p50': 50, 'p90': 90, 'p99': 99}
+    assert percentiles([7]) == {'p50': 7, 'p90': 7, 'p99': 7}
+
+def test_compare_flags_regressions_by_direction():
+    """Test that slower timings and lower rates beyond the threshold are flagged."""
+    baseline = {'bench': {'p50_ms': 10.0, 'ops_per_s': 1000.0, 'attempts_mean': 1.0}}
+    current = {'bench': {'p50_ms': 10.5, 'ops_per_s': 800.0, 'attempts_mean': 2.0},
+               'new': {'p50_ms': 1.0}}
+
+    regressions = compare(baseline, current, threshold=0.1)
+    assert len(regressions) == 2
+    assert any('ops_per_s' in line for line in regressions)
+    assert any('attempts_mean' in line for line in regressions)
+
+    faster = {'bench': {'p50_ms': 5.0, 'ops_per_s': 2000.0, 'attempts_mean': 1.0}}
+    assert compare(baseline, faster) == []
+
+def test_compare_flags_worsening_from_zero():
+    """Test that a lower-is-better metric rising from a zero baseline is flagged."""
+    baseline = {'bench': {'failures': 0, 'attempts_max': 0, 'ops_per_s': 0}}
+    current = {'bench': {'failures': 3, 'attempts_max': 0, 'ops_per_s': 50.0}}
+
+    regressions = compare(baseline, current)
+    assert len(regressions) == 1
+    assert 'failures' in regressions[0]
+
+def test_compare_puzzle_shape_metrics_are_higher_is_better():
+    """Test that drops in equations, density and unique share are flagged and rises are not."""
+    baseline = {'bench': {'equations': 100, 'density': 0.5, 'unique_share': 0.8, 'revealed_mean': 2.0}}
+    better = {'bench': {'equations': 120, 'density': 0.6, 'unique_share': 0.9, 'revealed_mean': 1.0}}
+    assert compare(baseline, better) == []
+
+    worse = {'bench': {'equations': 80, 'density': 0.4, 'unique_share': 0.6, 'revealed_mean': 3.0}}
+    flagged = {line.split()[1].rstrip(':') for line in compare(baseline, worse)}
+    assert flagged == {'equations', 'density', 'unique_share', 'revealed_mean'}
+
+def test_baseline_round_trip(tmp_path):
+    """Test that saved baselines load back."""
+    path = str(tmp_path / 'baselines' / 'local.json')
+    results = {'bench': {'p50_ms': 1.5}}
+    save_baseline(path, results)
+    assert load_baseline(path) == results
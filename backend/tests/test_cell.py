@@ -0,0 +1,56 @@
+import pytest
+import sys
+from app.game.cell import Cell
+
+def test_cell_round_trip():
+    """Test that a cell converts to and from its JSON form."""
+    data = {
+        'value': 4,
+        'isOperator': False,
+        'operator': None,
+        'isFixed': True,
+        'isResult': True,
+        'isEmpty': False,
+        'inEquation': True,
+        'isCorrect': False,
+        'isIncorrect': False
+    }
+    cell = Cell.from_dict(data)
+    assert cell.value == 4
+    assert cell.is_fixed and cell.is_result and cell.in_equation
+    assert cell.to_dict() == data
+    assert list(cell.to_dict()) == list(data)
+
+def test_cell_partial_dict_uses_defaults():
+    """Test that missing fields fall back to defaults."""
+    cell = Cell.from_dict({'value': None, 'isOperator': True, 'operator': '+'})
+    assert cell.is_operator
+    assert cell.operator == '+'
+    assert cell.is_fixed is False
+    assert cell.in_equation is False
+
+def test_cell_mapping_access():
+    """Test dict-style access by JSON field name."""
+    cell = Cell(value=3)
+    assert cell['value'] == 3
+    assert cell.get('isFixed', True) is False
+    assert cell.get('unknown', 'default') == 'default'
+
+    cell['isEmpty'] = True
+    assert cell.is_empty is True
+
+def test_cell_copy_is_independent():
+    """Test that copies do not share state."""
+    cell = Cell(value=3, in_equation=True)
+    copy = cell.copy()
+    assert copy == cell
+
+    copy.value = 5
+    assert cell.value == 3
+    assert copy != cell
+
+def test_cell_is_smaller_than_dict():
+    """Test that the slotted cell takes less memory than its dict form."""
+    cell = Cell()
+    assert not hasattr(cell, '__dict__')
+    assert sys.getsizeof(cell) < sys.getsizeof(cell.to_dict())
@@ -0,0 +1,102 @@
+import json
+import threading
+from app.game.events import KEEPALIVE, EventBroker, sse_frame
+
+def _parse(frame):
+    fields = dict(line.split(': ', 1) for line in frame.decode().strip().split('\n'))
+    return fields['event'], int(fields['id']), json.loads(fields['data'])
+
+def test_fan_out_to_many_subscribers():
+    """Test that every subscriber receives every update once, in order."""
+    broker = EventBroker()
+    subscriptions = [broker.subscribe('game') for _ in range(10)]
+    received = [[] for _ in subscriptions]
+
+    def consume(index, subscription):
+        for frame in subscription.frames(after_version=0, keepalive=5):
+            received[index].append(_parse(frame)[1])
+            if len(received[index]) == 3:
+                return
+
+    threads = [threading.Thread(target=consume, args=(i, s)) for i, s in enumerate(subscriptions)]
+    for thread in threads:
+        thread.start()
+    for version in (1, 2, 3):
+        assert broker.publish('game', 'update', version, {'version': version}) == 10
+    for thread in threads:
+        thread.join(5)
+
+    assert received == [[1, 2, 3]] * 10
+    assert broker.publish('other', 'update', 1, {}) == 0
+
+def test_frames_skip_versions_in_snapshot_and_keep_alive():
+    """Test that updates older than the snapshot are skipped and idle streams keep alive."""
+    broker = EventBroker()
+    subscription = broker.subscribe('game')
+    broker.publish('game', 'update', 4, {})
+    broker.publish('game', 'update', 5, {})
+
+    frames = subscription.frames(after_version=4, keepalive=0.01)
+    assert _parse(next(frames))[1] == 5
+    assert next(frames) == KEEPALIVE
+
+    broker.unsubscribe(subscription)
+    assert list(frames) == []
+    assert broker.subscriber_count() == 0
+
+def test_slow_subscriber_is_dropped():
+    """Test that a subscriber with a full queue is closed instead of blocking."""
+    broker = EventBroker(max_pending=2)
+    slow = broker.subscribe('game')
+    for version in (1, 2, 3):
+        broker.publish('game', 'update', version, {})
+    assert slow.closed
+    assert not broker.has_subscribers('game')
+
+def test_sse_frame_format():
+    """Test the wire format of a frame."""
+    assert sse_frame('update', {'a': 1}, 7) == b'id: 7\nevent: update\ndata: {"a":1}\n\n'
+    assert sse_frame('state', b'{"b":2}') == b'event: state\ndata: {"b":2}\n\n'
+
+def _next_event(stream):
+    for chunk in stream:
+        if chunk != KEEPALIVE:
+            return _parse(chunk)
+
+def test_game_events_endpoint_with_two_players(client):
+    """Test that two subscribers each get a snapshot and then the move delta."""
+    from app.routes.game import event_broker
+    game_data = json.loads(client.get('/api/newGame?difficulty=easy').data)
+    game_id = game_data['gameId']
+
+    streams = []
+    for _ in range(2):
+        response = client.get(f'/api/gameEvents?gameId={game_id}', buffered=False)
+        assert response.mimetype == 'text/event-stream'
+        streams.append(response)
+    iterators = [iter(response.response) for response in streams]
+    for stream in iterators:
+        event, version, data = _next_event(stream)
+        assert (event, version, data['gameId']) == ('state', 0, game_id)
+    assert event_broker.subscriber_count(game_id) == 2
+
+    row, col = next((r, c) for r, cells in enumerate(game_data['grid'])
+                    for c, cell in enumerate(cells) if cell['isEmpty'])
+    client.post('/api/validateMove',
+                data=json.dumps({'gameId': game_id, 'row': row, 'col': col,
+                                 'value': game_data['numberBank'][0]}),
+                content_type='application/json')
+
+    for stream in iterators:
+        event, version, data = _next_event(stream)
+        assert (event, version, data['delta']) == ('update', 1, True)
+        assert (row, col) in [(cell['row'], cell['col']) for cell in data['cells']]
+
+    for response in streams:
+        response.close()
+    assert event_broker.subscriber_count(game_id) == 0
+
+def test_game_events_unknown_game(client):
+    """Test that subscribing to a missing game is rejected."""
+    assert client.get('/api/gameEvents?gameId=missing').status_code == 404
+    assert client.get('/api/gameEvents').status_code == 400
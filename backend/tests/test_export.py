@@ -0,0 +1,53 @@
+import json
+import pytest
+from app.game.puzzle_executor import _generate_packed_batch, _init_worker, unpack_puzzle
+from export import export_puzzles, main
+
+def test_export_skips_duplicates_and_round_trips():
+    """Test that exported lines are distinct puzzles that unpack back in seed order."""
+    written = []
+    stats = export_puzzles(written.append, count=3, difficulty='easy', seeds=[1, 2, 1, 3], workers=1)
+
+    assert stats['written'] == 3
+    assert stats['duplicates'] == 1
+    assert stats['puzzles_per_s'] > 0
+    puzzles = [unpack_puzzle(json.loads(json.dumps(packed))) for packed in written]
+    assert [puzzle['seed'] for puzzle in puzzles] == [1, 2, 3]
+    assert all(len(puzzle['grid']) == 11 for puzzle in puzzles)
+
+def test_export_stops_when_seeds_run_out():
+    """Test that the export ends early when the seeds run out."""
+    written = []
+    stats = export_puzzles(written.append, count=5, difficulty='easy', seeds=[4, 4], workers=1)
+    assert stats['written'] == 1
+    assert len(written) == 1
+
+def test_batches_are_written_in_seed_order():
+    """Test that puzzles generated in batches across workers come out in seed order."""
+    written = []
+    stats = export_puzzles(written.append, count=7, difficulty='easy', seeds=range(10, 30),
+                           workers=2, batch_size=3)
+    assert stats['written'] == 7
+    assert [packed['seed'] for packed in written] == list(range(10, 17))
+
+def test_cli_writes_file(tmp_path):
+    """Test that the CLI writes a reproducible JSONL file."""
+    first, second = tmp_path / 'a.jsonl', tmp_path / 'b.jsonl'
+    assert main(['-n', '4', '--seed', '7', '--workers', '2', '-o', str(first)]) == 0
+    assert main(['-n', '4', '--seed', '7', '--workers', '1', '-o', str(second)]) == 0
+    assert first.read_text() == second.read_text()
+    assert len(first.read_text().splitlines()) == 4
+
+def test_cli_rejects_bad_arguments(capsys):
+    """Test that an invalid density or grid size is reported before any worker starts."""
+    for argv in (['-n', '3', '--density', '5'], ['-n', '3', '--grid-size', '3']):
+        with pytest.raises(SystemExit) as info:
+            main(argv)
+        assert info.value.code == 2
+    assert '--grid-size must be at least' in capsys.readouterr().err
+
+def test_batch_raises_on_invalid_arguments():
+    """Test that a worker job only turns generation failures into per-seed misses."""
+    _init_worker(11)
+    with pytest.raises(ValueError):
+        _generate_packed_batch('easy', [1, 2], density=5)
@@ -129,4 +129,241 @@ def test_equation_validation(game_state):
     game_state.clear_cell(0, 2)
     move = Move(0, 2, 4)  # Makes 2 + 4 = 5 (incorrect)
     result = game_state.validate_move(move)
-    assert result['affectedEquations'][0]['isValid'] is False 
\ No newline at end of file
+    assert result['affectedEquations'][0]['isValid'] is False 
+@pytest.fixture
+def equation_game():
+    """A single-equation game (2 + _ = 5) with complete cell data."""
+    def number(value, is_result=False):
+        return {'value': value, 'isOperator': False, 'isFixed': value is not None,
+                'isEmpty': value is None, 'isResult': is_result, 'inEquation': True}
+
+    def operator(symbol):
+        return {'value': None, 'isOperator': True, 'operator': symbol, 'inEquation': True}
+
+    grid = [[number(2), operator('+'), number(None), operator('='), number(5, is_result=True)]]
+    return GameState(grid=grid, equations=[], number_bank=[3, 4], difficulty='easy')
+
+def test_version_and_changes(equation_game):
+    """Test that mutations bump the version and report only changed cells."""
+    assert equation_game.version == 0
+
+    result = equation_game.validate_move(Move(0, 2, 3))
+    assert result['valid'] is True
+    assert result['version'] == 1
+    assert result['changes'] == [(0, 0), (0, 2), (0, 4)]  # Value plus correctness flags
+    assert result['bankChanges'] == {3: 0}
+
+    result = equation_game.clear_cell(0, 2)
+    assert result['version'] == 2
+    assert result['changes'] == [(0, 2)]  # Flags of fixed cells are left untouched
+    assert result['bankChanges'] == {3: 1}
+
+def test_failed_move_keeps_version(equation_game):
+    """Test that rejected moves do not bump the version."""
+    result = equation_game.validate_move(Move(0, 1, 3))
+    assert result['valid'] is False
+    assert equation_game.version == 0
+
+def test_apply_moves_batch(equation_game):
+    """Test applying a batch of moves and clears in one version."""
+    result = equation_game.apply_moves([Move(0, 2, 4), Move(0, 2, None), Move(0, 2, 3)])
+
+    assert result['valid'] is True
+    assert result['version'] == 1
+    assert equation_game.grid[0][2]['value'] == 3
+    assert equation_game.number_bank == [4]
+    assert len(result['affectedEquations']) == 1
+    assert result['affectedEquations'][0]['isValid'] is True
+
+def test_apply_moves_is_atomic(equation_game):
+    """Test that an invalid move rejects the whole batch."""
+    result = equation_game.apply_moves([Move(0, 2, 3), Move(0, 2, None), Move(0, 2, 9)])
+
+    assert result['valid'] is False
+    assert result['index'] == 2
+    assert equation_game.grid[0][2]['value'] is None
+    assert equation_game.number_bank == [3, 4]
+    assert equation_game.version == 0
+
+def test_apply_moves_tracks_bank_in_dry_run(equation_game):
+    """Test that a number used earlier in the batch is no longer available."""
+    result = equation_game.apply_moves([Move(0, 2, 3), Move(0, 2, 3)])
+    assert result['valid'] is False
+    assert result['index'] == 1
+
+def _tiny_puzzle():
+    return {'grid': [[{'value': None}]], 'equations': [], 'numberBank': [1]}
+
+def test_expiry_only_removes_inactive_games():
+    """Test that heap-based expiry removes idle games and keeps touched ones."""
+    manager = GameStateManager()
+    manager.cleanup_threshold = 10
+    idle = manager.create_game(_tiny_puzzle(), 'easy')
+    touched = manager.create_game(_tiny_puzzle(), 'easy')
+
+    now = time.time()
+    idle.last_activity = now - 20
+    touched.last_activity = now
+    # Simulate both stamped deadlines having passed
+    for game in (idle, touched):
+        manager._shard_for(game.id).expiry_heap.clear()
+    for game in (idle, touched):
+        manager._shard_for(game.id).expiry_heap.append((now - 5, game.id))
+
+    assert manager._expire_games() == 1
+    assert idle.id not in manager.active_games
+    assert manager.get_game(touched.id) is touched
+    # The touched game was re-queued with its new deadline
+    assert (touched.last_activity + 10, touched.id) in manager._shard_for(touched.id).expiry_heap
+
+def test_get_game_hides_expired_game_before_sweep():
+    """Test that an expired game is not returned while waiting for the sweeper."""
+    manager = GameStateManager()
+    manager.sweep_on_access = False
+    game = manager.create_game(_tiny_puzzle(), 'easy')
+    game.last_activity = time.time() - manager.cleanup_threshold - 1
+
+    assert manager.get_game(game.id) is None
+
+def test_background_sweeper():
+    """Test that the background sweeper expires games without lookups."""
+    manager = GameStateManager()
+    manager.cleanup_threshold = 0.01
+    game = manager.create_game(_tiny_puzzle(), 'easy')
+
+    manager.start_sweeper(0.01)
+    try:
+        assert manager.sweep_on_access is False
+        for _ in range(100):
+            if game.id not in manager.active_games:
+                break
+            time.sleep(0.01)
+        assert game.id not in manager.active_games
+    finally:
+        manager.stop_sweeper(timeout=5)
+    assert manager.sweep_on_access is True
+
+def test_move_onto_filled_cell_returns_old_value(equation_game):
+    """Test that overwriting a placed number puts the old number back in the bank."""
+    equation_game.validate_move(Move(0, 2, 4))
+    result = equation_game.validate_move(Move(0, 2, 3))
+
+    assert result['valid'] is True
+    assert equation_game.number_bank == [4]
+    assert result['bankChanges'] == {3: 0, 4: 1}
+
+def test_concurrent_moves_preserve_bank_invariant():
+    """Stress test: concurrent moves and clears on one game keep bank and grid consistent."""
+    from collections import Counter
+    from app.game.puzzle_generator import PuzzleGenerator
+    import random
+    import threading
+
+    puzzle = PuzzleGenerator().generate_puzzle('hard', seed=3)
+    game = GameState(puzzle['grid'], puzzle['equations'], puzzle['numberBank'], 'hard')
+    initial_bank = Counter(game.number_bank)
+    empty_cells = [(r, c) for r, row in enumerate(game.grid) for c, cell in enumerate(row) if cell.is_empty]
+    successes = []
+
+    # Yield between the checks and the mutation to make interleavings likely;
+    # without the game lock this breaks the invariant on every run
+    for name in ('_place', '_clear'):
+        def yielding(*args, _original=getattr(game, name)):
+            time.sleep(0)
+            return _original(*args)
+        setattr(game, name, yielding)
+
+    def player(seed):
+        rng = random.Random(seed)
+        count = 0
+        for _ in range(300):
+            row, col = rng.choice(empty_cells)
+            if rng.random() < 0.5:
+                result = game.validate_move(Move(row, col, rng.choice(sorted(initial_bank))))
+            else:
+                result = game.clear_cell(row, col)
+            count += result['valid']
+        successes.append(count)
+
+    threads = [threading.Thread(target=player, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    placed = Counter(game.grid[r][c].value for r, c in empty_cells if game.grid[r][c].value is not None)
+    assert Counter(game.number_bank) + placed == initial_bank
+    assert game.number_bank == sorted(game.number_bank)
+    assert game.version == sum(successes)
+    for r, c in empty_cells:
+        assert game.grid[r][c].is_empty == (game.grid[r][c].value is None)
+
+def test_sharded_manager_concurrent_access():
+    """Stress test: many threads creating and looking up games across shards."""
+    import threading
+
+    manager = GameStateManager(shard_count=4)
+    created = []
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(200):
+                game = manager.create_game(_tiny_puzzle(), 'easy')
+                created.append(game.id)
+                assert manager.get_game(game.id) is game
+        except AssertionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(manager) == 1600
+    assert set(manager.active_games) == set(created)
+
+def test_cell_equation_index_from_generator():
+    """Test that each equation cell maps to exactly the equations containing it."""
+    from app.game.puzzle_generator import PuzzleGenerator
+    puzzle = PuzzleGenerator().generate_puzzle('hard', seed=3)
+    game = GameState(puzzle['grid'], puzzle['equations'], puzzle['numberBank'], 'hard')
+
+    expected = {}
+    for eq in puzzle['equations']:
+        for position in eq.cells:
+            expected.setdefault(position, set()).add((eq.position.row, eq.position.col, eq.position.orientation))
+    assert {
+        position: {slot[:3] for slot in slots} for position, slots in game._cell_equations.items()
+    } == expected
+
+def test_cell_equation_index_found_from_grid(equation_game):
+    """Test that a game built without equations finds them in the grid."""
+    assert equation_game._cell_equations[(0, 2)] == [(0, 0, 'horizontal', ((0, 0), (0, 1), (0, 2), (0, 3), (0, 4)))]
+    result = equation_game.validate_move(Move(0, 2, 3))
+    assert result['affectedEquations'] == [{'start': {'row': 0, 'col': 0}, 'orientation': 'horizontal', 'isValid': True}]
+
+def test_completion_tracking(equation_game):
+    """Test that isComplete follows moves and clears."""
+    assert equation_game.is_complete is False
+    assert equation_game.validate_move(Move(0, 2, 4))['isComplete'] is False  # Filled but wrong
+    assert equation_game.validate_move(Move(0, 2, 3))['isComplete'] is True
+    assert equation_game.clear_cell(0, 2)['isComplete'] is False
+
+def test_solving_generated_puzzle_completes_it():
+    """Test that filling in the generator's solution completes the game."""
+    from app.game.puzzle_generator import PuzzleGenerator
+    puzzle = PuzzleGenerator().generate_puzzle('medium', seed=21)
+    game = GameState(puzzle['grid'], puzzle['equations'], puzzle['numberBank'], 'medium')
+
+    solution = {}
+    for eq in puzzle['equations']:
+        for (row, col), value in zip(eq.cells[::2], (eq.a, eq.b, eq.result)):
+            solution[(row, col)] = value
+    moves = [Move(row, col, value) for (row, col), value in solution.items() if game.grid[row][col].is_empty]
+
+    *first, last = moves
+    assert game.apply_moves(first)['isComplete'] is False
+    assert game.validate_move(last)['isComplete'] is True
@@ -0,0 +1,51 @@
+import gc
+import pytest
+import logging
+from app import log
+from app.log import SampledLogger, configure_logging
+
+class _Counted:
+    """Counts how often it is formatted."""
+    calls = 0
+
+    def __str__(self):
+        _Counted.calls += 1
+        return 'counted'
+
+def test_sampled_logger_logs_every_nth(caplog):
+    """Test that only every n-th event is logged."""
+    sampler = SampledLogger(logging.getLogger('test.sampled'), every=3)
+    with caplog.at_level(logging.INFO, logger='test.sampled'):
+        for i in range(7):
+            sampler.info('event %s', i)
+    assert [r.getMessage() for r in caplog.records] == ['event 0', 'event 3', 'event 6']
+
+def test_disabled_level_is_never_formatted(caplog):
+    """Test that arguments are not formatted when the level is disabled."""
+    logger = logging.getLogger('test.disabled')
+    logger.setLevel(logging.WARNING)
+    _Counted.calls = 0
+    SampledLogger(logger).info('value %s', _Counted())
+    logger.info('value %s', _Counted())
+    assert _Counted.calls == 0
+    assert not caplog.records
+
+def test_configure_logging_levels():
+    """Test that subsystem levels and sampling are applied."""
+    sampler = SampledLogger(logging.getLogger('test.configured'))
+    configure_logging({'generator': 'DEBUG'}, sample_every=50)
+    assert logging.getLogger('app.game.puzzle_generator').level == logging.DEBUG
+    assert sampler.every == 50
+    configure_logging({'generator': 'WARNING'}, sample_every=1)
+
+    with pytest.raises(ValueError):
+        configure_logging({'unknown': 'INFO'})
+
+def test_samplers_are_not_kept_alive():
+    """Test that the sampler registry drops samplers nobody references."""
+    sampler = SampledLogger(logging.getLogger('test.dropped'))
+    assert sampler in log._samplers
+    count = len(log._samplers)
+    del sampler
+    gc.collect()
+    assert len(log._samplers) == count - 1
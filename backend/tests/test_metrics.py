@@ -0,0 +1,53 @@
+import threading
+from app.metrics import Registry
+
+def test_counter_sums_across_threads():
+    """Test that per-thread counter slots add up."""
+    counter = Registry().counter('test_total', 'Test counter')
+
+    def work():
+        for _ in range(1000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.value == 8000
+
+def test_histogram_exposition():
+    """Test cumulative buckets, sum and count in the text format."""
+    registry = Registry()
+    histogram = registry.histogram('test_seconds', 'Test histogram', buckets=(0.1, 1), labels=('route',))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.labels(route='/a').observe(value)
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ['# HELP test_seconds Test histogram', '# TYPE test_seconds histogram']
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{route="/a",le="1"} 3' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'test_seconds_sum{route="/a"} 3.65' in lines
+    assert 'test_seconds_count{route="/a"} 4' in lines
+
+def test_gauge_function():
+    """Test that a gauge can be read from a callback."""
+    registry = Registry()
+    gauge = registry.gauge('test_items', 'Test gauge')
+    items = [1, 2, 3]
+    gauge.set_function(lambda: len(items))
+    assert 'test_items 3' in registry.render().splitlines()
+
+def test_metrics_endpoint(client):
+    """Test that /api/metrics reports route latency, active games and generation."""
+    client.get('/api/newGame?difficulty=easy&seed=77')
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+    text = response.data.decode()
+    assert 'mathcrossword_request_duration_seconds_count{route="/api/newGame"}' in text
+    assert 'mathcrossword_active_games ' in text
+    assert 'mathcrossword_pattern_attempts_count{difficulty="easy"}' in text
+    assert '# TYPE mathcrossword_generation_failures_total counter' in text
@@ -0,0 +1,42 @@
+import pytest
+from app.game.number_bank import NumberBank
+
+def test_take_and_put():
+    """Test that take and put keep counts and size in step."""
+    bank = NumberBank([3, 1, 3, 2])
+    assert len(bank) == 4
+    assert bank.count(3) == 2
+
+    bank.take(3)
+    assert bank.count(3) == 1
+    bank.take(3)
+    assert 3 not in bank
+    bank.put(3)
+    assert 3 in bank
+    assert len(bank) == 3
+
+def test_take_missing_value_raises():
+    """Test that taking an unavailable value is rejected."""
+    bank = NumberBank([1])
+    with pytest.raises(ValueError):
+        bank.take(2)
+    assert bank == [1]
+
+def test_serializes_sorted():
+    """Test that the bank serializes to the sorted list the frontend expects."""
+    bank = NumberBank([5, 2, 9, 2])
+    assert bank.to_list() == [2, 2, 5, 9]
+    bank.put(1)
+    assert list(bank) == [1, 2, 2, 5, 9]
+    assert bank == [1, 2, 2, 5, 9]
+    assert bank == NumberBank([9, 5, 2, 2, 1])
+    assert bank.counts() == {1: 1, 2: 2, 5: 1, 9: 1}
+
+def test_list_is_a_snapshot():
+    """Test that lists from to_list keep their contents while the bank changes."""
+    bank = NumberBank([4, 1, 4])
+    before = bank.to_list()
+    bank.take(4)
+    bank.put(2)
+    assert before == [1, 4, 4]
+    assert bank.to_list() == [1, 2, 4]
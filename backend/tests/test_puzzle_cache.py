@@ -0,0 +1,75 @@
+import pytest
+import json
+from app.game.puzzle_cache import PuzzleCache, estimate_size
+from app.game.puzzle_generator import PuzzleGenerator
+
+def test_same_seed_generates_same_puzzle():
+    """Test that generation is reproducible from a seed."""
+    first = PuzzleGenerator().generate_puzzle('medium', seed=42)
+    second = PuzzleGenerator().generate_puzzle('medium', seed=42)
+
+    assert first['seed'] == 42
+    assert first['grid'] == second['grid']
+    assert first['numberBank'] == second['numberBank']
+    assert first['equations'] == second['equations']
+
+def test_unseeded_generation_reports_seed():
+    """Test that an unseeded puzzle can be replayed from its reported seed."""
+    puzzle = PuzzleGenerator().generate_puzzle('easy')
+    replay = PuzzleGenerator().generate_puzzle('easy', seed=puzzle['seed'])
+    assert replay['grid'] == puzzle['grid']
+
+def test_cache_hit_returns_independent_copy():
+    """Test that replaying a seed hits the cache and returns a fresh copy."""
+    cache = PuzzleCache()
+    generator = PuzzleGenerator(cache=cache)
+
+    first = generator.generate_puzzle('hard', seed=7)
+    first['grid'][0][0]['value'] = 99
+    second = generator.generate_puzzle('hard', seed=7)
+
+    assert cache.stats()['hits'] == 1
+    assert second['grid'][0][0]['value'] is None
+    assert second['seed'] == 7
+
+def test_unseeded_puzzles_are_not_cached():
+    """Test that puzzles generated from a random seed stay out of the cache."""
+    cache = PuzzleCache()
+    generator = PuzzleGenerator(cache=cache)
+    for _ in range(3):
+        generator.generate_puzzle('easy')
+    assert len(cache) == 0
+    assert cache.stats()['misses'] == 0
+
+    generator.generate_puzzle('easy', seed=1)
+    assert len(cache) == 1
+
+def test_cache_respects_memory_bound():
+    """Test that the cache evicts least recently used puzzles to stay under max_bytes."""
+    generator = PuzzleGenerator()
+    puzzles = [generator.generate_puzzle('easy', seed=seed) for seed in range(3)]
+    size = estimate_size(puzzles[0])
+    cache = PuzzleCache(max_bytes=int(size * 2.5))
+
+    for seed, puzzle in enumerate(puzzles):
+        cache.put((seed, 'easy', 11), puzzle)
+
+    assert len(cache) == 2
+    assert cache.get((0, 'easy', 11)) is None
+    assert cache.get((2, 'easy', 11)) is not None
+    assert cache.stats()['bytes'] <= cache.max_bytes
+
+def test_new_game_with_seed(client):
+    """Test that /api/newGame replays a seed and reports it."""
+    response = client.get('/api/newGame?difficulty=easy&seed=1234')
+    assert response.status_code == 200
+    first = json.loads(response.data)
+    assert first['seed'] == 1234
+
+    second = json.loads(client.get('/api/newGame?difficulty=easy&seed=1234').data)
+    assert second['grid'] == first['grid']
+    assert second['gameId'] != first['gameId']
+
+    for seed in ('abc', '-1', '\u00b2', str(2 ** 32)):
+        response = client.get('/api/newGame', query_string={'difficulty': 'easy', 'seed': seed})
+        assert response.status_code == 400
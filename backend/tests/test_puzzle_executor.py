@@ -0,0 +1,93 @@
+import pytest
+import pickle
+from app.game.puzzle_cache import PuzzleCache
+from app.game.puzzle_executor import PuzzleExecutor, pack_puzzle, unpack_puzzle
+from app.game.puzzle_generator import GenerationFailed, PuzzleGenerator
+from app.game.puzzle_pool import PuzzlePool
+from app.metrics import FAILED_PLACEMENTS, GENERATION_FAILURES
+
+@pytest.fixture
+def executor():
+    executor = PuzzleExecutor(workers=1, timeout=30)
+    yield executor
+    executor.shutdown()
+
+def test_pack_round_trip():
+    """Test that a packed puzzle unpacks to the same puzzle."""
+    puzzle = PuzzleGenerator().generate_puzzle('medium', seed=11)
+    packed = pack_puzzle(puzzle)
+    unpacked = unpack_puzzle(pickle.loads(pickle.dumps(packed)))
+
+    assert unpacked['grid'] == puzzle['grid']
+    assert unpacked['equations'] == puzzle['equations']
+    assert unpacked['numberBank'] == puzzle['numberBank']
+    assert unpacked['seed'] == 11
+    assert len(pickle.dumps(packed)) < len(pickle.dumps(puzzle)) / 2
+
+def test_executor_matches_local_generation(executor):
+    """Test that a worker process produces the same seeded puzzle."""
+    local = PuzzleGenerator().generate_puzzle('easy', seed=5)
+    remote = executor.generate('easy', seed=5)
+
+    assert remote['grid'] == local['grid']
+    assert remote['equations'] == local['equations']
+    assert remote['numberBank'] == local['numberBank']
+
+def test_unique_executor_matches_local_generation():
+    """Test that a unique executor produces the unique puzzle and caches it under the unique key."""
+    cache = PuzzleCache()
+    executor = PuzzleExecutor(workers=1, timeout=30, cache=cache, unique=True)
+    try:
+        remote = executor.generate('hard', seed=7)
+    finally:
+        executor.shutdown()
+
+    local = PuzzleGenerator(cache=cache).generate_puzzle('hard', seed=7, unique=True)
+    assert remote['numberBank'] == local['numberBank']
+    assert cache.hits == 1  # The generator found the executor's puzzle
+
+def test_executor_uses_cache(executor):
+    """Test that seeded puzzles are cached in the web process."""
+    executor.cache = PuzzleCache()
+    executor.generate('easy')
+    assert len(executor.cache) == 0  # Unseeded puzzles are not cached
+    executor.generate('easy', seed=9)
+
+    # A shut down executor fails any round trip, so this must be served by the cache
+    cached = PuzzleExecutor(workers=1, cache=executor.cache)
+    cached.shutdown()
+    assert cached.generate('easy', seed=9)['seed'] == 9
+
+def test_executor_timeout():
+    """Test that a job exceeding the timeout raises TimeoutError."""
+    executor = PuzzleExecutor(workers=1, timeout=0)
+    try:
+        with pytest.raises(TimeoutError):
+            executor.generate('hard')
+    finally:
+        executor.shutdown()
+
+def test_worker_failure_reports_stats():
+    """Test that a failed generation in a worker records its failed placements here."""
+    executor = PuzzleExecutor(workers=1, timeout=30, grid_size=5)  # Too small for any pattern
+    failures = GENERATION_FAILURES.labels(difficulty='hard')
+    placements = FAILED_PLACEMENTS.labels(difficulty='hard')
+    before = failures.value, placements.value
+    try:
+        with pytest.raises(GenerationFailed) as info:
+            executor.generate('hard', seed=1)
+    finally:
+        executor.shutdown()
+
+    assert info.value.failed_placements > 0
+    assert failures.value == before[0] + 1
+    assert placements.value == before[1] + info.value.failed_placements
+
+def test_pool_generates_through_executor(executor):
+    """Test that the pool fills and serves misses through the executor."""
+    pool = PuzzlePool(low_watermark=1, high_watermark=1, difficulties=('easy',), executor=executor)
+    pool._inline_generator = pool._refill_generator = None  # Must not generate in-process
+
+    assert pool.fill('easy') == 1
+    assert pool.get('easy')['difficulty'] == 'easy'
+    assert pool.get('easy', seed=3)['seed'] == 3
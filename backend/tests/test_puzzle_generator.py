@@ -1,5 +1,5 @@
 import pytest
-from app.game.puzzle_generator import PuzzleGenerator, Position, Equation
+from app.game.puzzle_generator import PuzzleGenerator, Position, Equation, SlotIndex, grid_masks
 
 def test_puzzle_initialization():
     """Test basic puzzle generator initialization."""
@@ -138,4 +138,106 @@ def test_positive_numbers():
         assert eq.result > 0
     
     # Check number bank
-    assert all(num > 0 for num in puzzle['numberBank']) 
\ No newline at end of file
+    assert all(num > 0 for num in puzzle['numberBank']) 
+
+def test_slot_index_occupy():
+    """Test that occupying cells drops exactly the overlapping slots."""
+    starts = [(row, col) for row in range(1, 7) for col in range(1, 7)]
+    index = SlotIndex(starts)
+    assert index.count('horizontal') == 36
+    assert index.count('vertical') == 36
+
+    index.occupy([(3, col) for col in range(1, 6)])  # Horizontal equation at (3, 1)
+
+    generator = PuzzleGenerator()
+    generator._occupied = generator._masks.cells_mask([(3, col) for col in range(1, 6)])
+    for orientation in SlotIndex.ORIENTATIONS:
+        expected = {start for start in starts
+                    if generator._is_valid_equation_position(
+                        generator._get_equation_cells(Position(*start, orientation), 5))}
+        assert set(index._slots[orientation]) == expected
+        assert index.count(orientation) == len(expected)
+
+def test_hard_pattern_uses_free_slots():
+    """Test that generated equations never overlap."""
+    generator = PuzzleGenerator()
+    puzzle = generator.generate_puzzle('hard')
+
+    cells = [cell for eq in puzzle['equations'] for cell in eq.cells]
+    assert len(cells) == len(set(cells))
+
+def test_grid_masks_round_trip():
+    """Test that bitboard masks match the cells of a slot."""
+    masks = grid_masks(11)
+    for orientation in ['horizontal', 'vertical']:
+        pos = Position(2, 3, orientation)
+        cells = PuzzleGenerator()._get_equation_cells(pos, 5)
+        assert masks.slot_mask(pos) == masks.cells_mask(cells)
+        assert masks.cells_of(masks.slot_mask(pos)) == set(cells)
+
+    assert masks.slot_mask(Position(0, 7, 'horizontal')) is None
+    assert masks.slot_mask(Position(7, 0, 'vertical')) is None
+
+def test_equation_index_lookup():
+    """Test that indexed lookups match a linear scan over VALID_EQUATIONS."""
+    for operator, equations in PuzzleGenerator.VALID_EQUATIONS.items():
+        assert isinstance(equations, tuple)
+        for slot in range(3):
+            for value in range(0, 16):
+                expected = tuple(eq for eq in equations if eq[slot] == value)
+                assert PuzzleGenerator.EQUATION_INDEX.get((operator, slot, value), ()) == expected
+
+    shared = PuzzleGenerator.INTERSECTION_VALUES[('+', 2, '*', 0)]
+    assert 5 in shared        # 1 + 4 = 5 and 5 * 2 = 10
+    assert 15 not in shared   # 15 can be a sum but never a factor
+
+    with pytest.raises(TypeError):
+        PuzzleGenerator.EQUATION_INDEX[('+', 0, 1)] = ()
+    with pytest.raises(TypeError):
+        PuzzleGenerator.INTERSECTION_VALUES[('+', 2, '*', 0)] = ()
+
+def test_place_second_equation_uses_intersection_value():
+    """Test that the second equation uses the value at the intersection."""
+    generator = PuzzleGenerator()
+    generator.generate_puzzle('easy')
+    before = PuzzleGenerator.VALID_EQUATIONS['+']
+
+    pos = Position(1, 0, 'vertical')
+    generator._occupied = 0
+    assert generator._place_second_equation(pos, (3, 0), 2)
+
+    equation = generator.equations[-1]
+    assert equation.b == 2
+    assert PuzzleGenerator.VALID_EQUATIONS['+'] is before
+
+def test_large_grid_meets_density_target():
+    """Test that large grids are filled to the difficulty's density without overlaps."""
+    generator = PuzzleGenerator(grid_size=50)
+    puzzle = generator.generate_puzzle('hard', seed=5)
+
+    expected = round(PuzzleGenerator.DENSITY_TARGETS['hard'] * 50 * 50 / 5)
+    assert len(puzzle['equations']) == expected
+    cells = [cell for equation in puzzle['equations'] for cell in equation.cells]
+    assert len(cells) == len(set(cells))
+    empty = sum(cell.is_empty for row in puzzle['grid'] for cell in row)
+    assert empty == len(puzzle['numberBank'])
+
+def test_explicit_density():
+    """Test that an explicit density sets the equation count and is validated."""
+    generator = PuzzleGenerator(grid_size=25)
+    puzzle = generator.generate_puzzle('easy', seed=1, density=PuzzleGenerator.MAX_DENSITY)
+    assert len(puzzle['equations']) == round(PuzzleGenerator.MAX_DENSITY * 25 * 25 / 5)
+
+    with pytest.raises(ValueError):
+        generator.generate_puzzle('easy', seed=1, density=0.9)
+
+def test_failed_attempts_leave_no_cells_behind():
+    """Test that only the final attempt's equations fill the grid."""
+    generator = PuzzleGenerator()
+    seed = next(seed for seed in range(200)
+                if generator.generate_puzzle('hard', seed=seed) and generator.attempts > 1)
+    puzzle = generator.generate_puzzle('hard', seed=seed)
+    equation_cells = {cell for equation in puzzle['equations'] for cell in equation.cells}
+    filled = {(r, c) for r, row in enumerate(puzzle['grid']) for c, cell in enumerate(row)
+              if cell.value is not None or cell.is_operator or cell.is_empty}
+    assert filled <= equation_cells
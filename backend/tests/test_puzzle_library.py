@@ -0,0 +1,87 @@
+import pytest
+from app.game.puzzle_generator import PuzzleGenerator
+from app.game.puzzle_library import MAX_SEED, PuzzleLibrary, PuzzleLibraryWriter, open_libraries
+from app.routes import game as routes
+from export import main as export_main
+
+def _puzzles(difficulty, grid_size=11, count=5):
+    generator = PuzzleGenerator(grid_size)
+    return [generator.generate_puzzle(difficulty, seed=seed) for seed in range(count)]
+
+def test_records_round_trip(tmp_path):
+    """Test that every record decodes to the puzzle that was written."""
+    for difficulty, grid_size in (('easy', 11), ('hard', 11), ('medium', 25)):
+        puzzles = _puzzles(difficulty, grid_size)
+        path = str(tmp_path / f'{difficulty}.puzzles')
+        max_equations = PuzzleGenerator(grid_size).target_equations(difficulty)
+        with PuzzleLibraryWriter(path, difficulty, grid_size, max_equations) as writer:
+            for puzzle in puzzles:
+                writer.append(puzzle)
+
+        library = PuzzleLibrary(path)
+        assert len(library) == len(puzzles)
+        assert (library.difficulty, library.grid_size) == (difficulty, grid_size)
+        for index in reversed(range(len(puzzles))):
+            puzzle, loaded = puzzles[index], library.get(index)
+            assert loaded['grid'] == puzzle['grid']
+            assert loaded['numberBank'] == puzzle['numberBank']
+            assert [eq.to_row() for eq in loaded['equations']] == [eq.to_row() for eq in puzzle['equations']]
+            assert loaded['seed'] == puzzle['seed']
+        with pytest.raises(IndexError):
+            library.get(len(puzzles))
+        library.close()
+
+def test_rejects_other_files(tmp_path):
+    """Test that files that are not libraries, or too short for their header, are rejected."""
+    path = tmp_path / 'easy.puzzles'
+    path.write_bytes(b'not a puzzle library')
+    with pytest.raises(ValueError):
+        PuzzleLibrary(str(path))
+
+    with PuzzleLibraryWriter(str(path), 'easy', 11, 3) as writer:
+        writer.append(_puzzles('easy', count=1)[0])
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        PuzzleLibrary(str(path))
+
+def test_new_game_draws_from_library(tmp_path, client, monkeypatch):
+    """Test that unseeded new games come from the library written by the export CLI."""
+    assert export_main(['-n', '3', '--difficulty', 'easy', '--seed', '100', '--workers', '1',
+                        '--library', str(tmp_path / 'easy.puzzles')]) == 0
+    libraries = open_libraries(str(tmp_path))
+    assert list(libraries) == ['easy']
+    monkeypatch.setattr(routes, 'puzzle_libraries', libraries)
+
+    for _ in range(5):
+        data = client.get('/api/newGame?difficulty=easy').get_json()
+        assert data['seed'] in (100, 101, 102)
+        assert len(data['numberBank']) == sum(cell['isEmpty'] for row in data['grid'] for cell in row)
+
+    # Seeded requests still generate
+    assert client.get('/api/newGame?difficulty=easy&seed=7').get_json()['seed'] == 7
+    libraries['easy'].close()
+
+def test_rejects_other_grid_sizes(tmp_path):
+    """Test that a library for another grid size is not served."""
+    with PuzzleLibraryWriter(str(tmp_path / 'easy.puzzles'), 'easy', 25, 25) as writer:
+        writer.append(_puzzles('easy', grid_size=25, count=1)[0])
+    assert list(open_libraries(str(tmp_path), 25)) == ['easy']
+    with pytest.raises(ValueError):
+        open_libraries(str(tmp_path), 11)
+
+def test_seeds_must_fit_records(tmp_path):
+    """Test that seeds beyond 32 bits are refused up front instead of mid-export."""
+    puzzle = _puzzles('easy', count=1)[0]
+    with PuzzleLibraryWriter(str(tmp_path / 'easy.puzzles'), 'easy', 11, 3) as writer:
+        with pytest.raises(ValueError):
+            writer.append(dict(puzzle, seed=MAX_SEED + 1))
+
+    path = str(tmp_path / 'export.puzzles')
+    with pytest.raises(SystemExit):
+        export_main(['-n', '1', '--difficulty', 'easy', '--seed', str(MAX_SEED + 1), '--library', path])
+    # The last seeds end the run early rather than overflowing a record
+    assert export_main(['-n', '3', '--difficulty', 'easy', '--seed', str(MAX_SEED - 1),
+                        '--workers', '1', '--library', path]) == 1
+    library = PuzzleLibrary(path)
+    assert len(library) == 2
+    library.close()
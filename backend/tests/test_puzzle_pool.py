@@ -0,0 +1,124 @@
+import pytest
+import json
+from concurrent.futures.process import BrokenProcessPool
+from app.game.puzzle_executor import ExecutorShutdown
+from app.game.puzzle_generator import PuzzleGenerator
+from app.game.solver import count_solutions
+from app.game.puzzle_pool import PuzzlePool
+
+@pytest.fixture
+def pool():
+    return PuzzlePool(low_watermark=1, high_watermark=2, difficulties=('easy',))
+
+def test_get_falls_back_to_inline_generation(pool):
+    """Test that an empty pool still returns a puzzle and counts a miss."""
+    puzzle = pool.get('easy')
+
+    assert puzzle['difficulty'] == 'easy'
+    assert pool.stats()['easy']['misses'] == 1
+    assert pool.stats()['easy']['hits'] == 0
+
+def test_get_pops_from_filled_pool(pool):
+    """Test that a filled pool serves puzzles as hits."""
+    assert pool.fill('easy') == 2
+    assert pool.stats()['easy']['size'] == 2
+
+    first = pool.get('easy')
+    second = pool.get('easy')
+
+    assert first is not second
+    stats = pool.stats()['easy']
+    assert stats['hits'] == 2
+    assert stats['misses'] == 0
+    assert stats['size'] == 0
+
+def test_background_refill(pool):
+    """Test that the refill thread tops the pool up to the high watermark."""
+    pool.start()
+    try:
+        pool.get('easy')
+        for _ in range(100):
+            if pool.stats()['easy']['size'] == pool.high_watermark:
+                break
+            pool._stopped.wait(0.05)
+        assert pool.stats()['easy']['size'] == pool.high_watermark
+    finally:
+        pool.stop(timeout=5)
+
+def test_invalid_watermarks(pool):
+    """Test that watermarks are validated."""
+    with pytest.raises(ValueError):
+        pool.configure(low_watermark=5, high_watermark=1)
+
+class _FailingExecutor:
+    """Raises `error` for the first `failures` jobs, then generates in-process."""
+
+    def __init__(self, error, failures=None):
+        self.error = error
+        self.failures = failures
+        self._generator = PuzzleGenerator()
+
+    def generate(self, difficulty, seed=None):
+        if self.failures is None or self.failures > 0:
+            if self.failures is not None:
+                self.failures -= 1
+            raise self.error
+        return self._generator.generate_puzzle(difficulty, seed=seed)
+
+def test_refill_stops_on_executor_failures():
+    """Test that a broken or shut down executor ends the refill without raising."""
+    for error in (BrokenProcessPool('worker died'), ExecutorShutdown('shut down')):
+        pool = PuzzlePool(difficulties=('easy',), executor=_FailingExecutor(error))
+        assert pool.fill('easy') == 0
+
+def test_refill_does_not_hide_programming_errors():
+    """Test that unexpected errors from the executor propagate."""
+    pool = PuzzlePool(difficulties=('easy',), executor=_FailingExecutor(RuntimeError('bug')))
+    with pytest.raises(RuntimeError):
+        pool.fill('easy')
+
+def test_refill_thread_survives_unexpected_errors():
+    """Test that the refill thread logs an unexpected error and refills on the next request."""
+    executor = _FailingExecutor(OSError('cannot spawn'), failures=1)
+    pool = PuzzlePool(low_watermark=1, high_watermark=1, difficulties=('easy',), executor=executor)
+    pool.start()
+    try:
+        for _ in range(100):
+            if executor.failures == 0:
+                break
+            pool._stopped.wait(0.05)
+        assert pool.is_running
+
+        pool.get('easy')
+        for _ in range(100):
+            if pool.stats()['easy']['size'] == 1:
+                break
+            pool._stopped.wait(0.05)
+        assert pool.stats()['easy']['size'] == 1
+    finally:
+        pool.stop(timeout=5)
+
+def test_unique_pool_serves_unique_puzzles():
+    """Test that a unique pool serves puzzles with one solution, from the pool and inline."""
+    pool = PuzzlePool(low_watermark=1, high_watermark=1, difficulties=('hard',), unique=True)
+    assert pool.fill('hard') == 1
+    for puzzle in (pool.get('hard'), pool.get('hard'), pool.get('hard', seed=4)):
+        assert count_solutions(puzzle) == 1
+
+def test_new_games_are_unique_by_default(client):
+    """Test that /api/newGame serves unique puzzles under the default config."""
+    from app.routes import game as routes
+
+    assert routes.puzzle_pool.unique
+    game_id = client.get('/api/newGame?difficulty=hard&seed=5').get_json()['gameId']
+    game = routes.game_manager.get_game(game_id)
+    assert count_solutions({'grid': game.grid, 'equations': game.equations,
+                            'numberBank': game.number_bank.to_list()}) == 1
+
+def test_pool_stats_endpoint(client):
+    """Test the pool statistics endpoint."""
+    response = client.get('/api/poolStats')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    for difficulty in ['easy', 'medium', 'hard']:
+        assert set(data[difficulty]) == {'size', 'hits', 'misses'}
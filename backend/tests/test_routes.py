@@ -284,4 +284,135 @@ def test_new_game_equation_validity(client):
                     elif operator == '-':
                         assert values[0] - values[1] == values[2]
                     elif operator == '*':
-                        assert values[0] * values[1] == values[2] 
\ No newline at end of file
+                        assert values[0] * values[1] == values[2] 
+
+def test_grid_serialization_shape(client):
+    """Test that grid cells are serialized with every field the frontend expects."""
+    response = client.get('/api/newGame?difficulty=easy')
+    data = json.loads(response.data)
+    expected_keys = {'value', 'isOperator', 'operator', 'isFixed', 'isResult',
+                     'isEmpty', 'inEquation', 'isCorrect', 'isIncorrect'}
+    for row in data['grid']:
+        for cell in row:
+            assert set(cell) == expected_keys
+
+def _find_empty_cell(grid):
+    for row_idx, row in enumerate(grid):
+        for col_idx, cell in enumerate(row):
+            if cell['isEmpty']:
+                return row_idx, col_idx
+    return None
+
+def test_validate_move_delta_mode(client):
+    """Test that delta mode returns only changed cells and a version."""
+    game_data = json.loads(client.get('/api/newGame?difficulty=easy').data)
+    assert game_data['version'] == 0
+    row, col = _find_empty_cell(game_data['grid'])
+    value = game_data['numberBank'][0]
+
+    response = client.post('/api/validateMove',
+                           data=json.dumps({'gameId': game_data['gameId'], 'row': row, 'col': col,
+                                            'value': value, 'delta': True}),
+                           content_type='application/json')
+    data = json.loads(response.data)
+    assert data['valid'] is True
+    assert data['delta'] is True
+    assert data['version'] == 1
+    assert data['isComplete'] is False
+    assert 'grid' not in data
+    assert {'row': row, 'col': col} in [{'row': c['row'], 'col': c['col']} for c in data['cells']]
+    changed = next(c for c in data['cells'] if (c['row'], c['col']) == (row, col))
+    assert changed['value'] == value
+    assert data['bankChanges'] == [{'value': value,
+                                    'count': game_data['numberBank'].count(value) - 1}]
+
+    response = client.post('/api/clearCell',
+                           data=json.dumps({'gameId': game_data['gameId'], 'row': row, 'col': col,
+                                            'delta': True}),
+                           content_type='application/json')
+    data = json.loads(response.data)
+    assert data['version'] == 2
+    assert data['bankChanges'][0]['count'] == game_data['numberBank'].count(value)
+
+    state = json.loads(client.get(f'/api/gameState?gameId={game_data["gameId"]}').data)
+    assert state['version'] == 2
+    assert state['isComplete'] is False
+
+def test_validate_moves_endpoint(client):
+    """Test the batch move endpoint."""
+    game_data = json.loads(client.get('/api/newGame?difficulty=easy').data)
+    game_id = game_data['gameId']
+    row, col = _find_empty_cell(game_data['grid'])
+    value = game_data['numberBank'][0]
+
+    moves = [
+        {'row': row, 'col': col, 'value': value},
+        {'row': row, 'col': col, 'clear': True},
+        {'row': row, 'col': col, 'value': value}
+    ]
+    response = client.post('/api/validateMoves',
+                           data=json.dumps({'gameId': game_id, 'moves': moves}),
+                           content_type='application/json')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['valid'] is True
+    assert data['version'] == 1
+    assert data['grid'][row][col]['value'] == value
+
+    # An invalid move rejects the whole batch
+    moves = [{'row': row, 'col': col, 'clear': True}, {'row': 0, 'col': 0, 'value': 999}]
+    response = client.post('/api/validateMoves',
+                           data=json.dumps({'gameId': game_id, 'moves': moves}),
+                           content_type='application/json')
+    data = json.loads(response.data)
+    assert data['valid'] is False
+    assert data['index'] == 1
+    state = json.loads(client.get(f'/api/gameState?gameId={game_id}').data)
+    assert state['grid'][row][col]['value'] == value
+    assert state['version'] == 1
+
+    # Malformed batches
+    response = client.post('/api/validateMoves',
+                           data=json.dumps({'gameId': game_id, 'moves': [{'row': 0}]}),
+                           content_type='application/json')
+    assert response.status_code == 400
+    response = client.post('/api/validateMoves',
+                           data=json.dumps({'gameId': 'non-existent-id', 'moves': []}),
+                           content_type='application/json')
+    assert response.status_code == 404
+
+def test_empty_batch_changes_nothing(client):
+    """Test that an empty move batch keeps the version and the ETag."""
+    game_id = json.loads(client.get('/api/newGame?difficulty=easy').data)['gameId']
+    etag = client.get(f'/api/gameState?gameId={game_id}').headers['ETag']
+
+    response = client.post('/api/validateMoves', data=json.dumps({'gameId': game_id, 'moves': []}),
+                           content_type='application/json')
+    assert response.status_code == 200
+    assert json.loads(response.data)['version'] == 0
+    response = client.get(f'/api/gameState?gameId={game_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+def test_game_state_etag(client):
+    """Test that unchanged game state polls return 304 and changes return 200."""
+    game_data = json.loads(client.get('/api/newGame?difficulty=easy').data)
+    game_id = game_data['gameId']
+
+    response = client.get(f'/api/gameState?gameId={game_id}')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    response = client.get(f'/api/gameState?gameId={game_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    row, col = _find_empty_cell(game_data['grid'])
+    client.post('/api/validateMove',
+                data=json.dumps({'gameId': game_id, 'row': row, 'col': col,
+                                 'value': game_data['numberBank'][0]}),
+                content_type='application/json')
+    response = client.get(f'/api/gameState?gameId={game_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert json.loads(response.data)['version'] == 1
@@ -0,0 +1,92 @@
+import itertools
+import operator
+import pytest
+from app.game.puzzle_cache import PuzzleCache
+from app.game.puzzle_generator import Equation, Position, PuzzleGenerator
+from app.game.solver import PuzzleSolver, count_solutions, equation_fills, hidden_cells
+
+OPERATIONS = {'+': operator.add, '-': operator.sub, '*': operator.mul}
+
+def _brute_force(puzzle):
+    """Count solutions by trying every ordering of the number bank."""
+    cells = hidden_cells(puzzle['grid'])
+    solutions = 0
+    for values in set(itertools.permutations(puzzle['numberBank'])):
+        filled = dict(zip(cells, values))
+        solutions += all(
+            OPERATIONS[eq.operator](*(filled.get(eq.cells[i], value) for i, value in ((0, eq.a), (2, eq.b))))
+            == filled.get(eq.cells[4], eq.result)
+            for eq in puzzle['equations'])
+    return solutions
+
+def _equation(row, a, operator, b, result):
+    cells = [(row, col) for col in range(5)]
+    return Equation(Position(row, 0, 'horizontal'), a, operator, b, result, cells)
+
+def test_equation_fills():
+    """Test fills for one, two and three unknown numbers."""
+    values = [1, 2, 3, 4, 6]
+    assert equation_fills('+', 2, None, None, values) == [(1, 3), (2, 4), (4, 6)]
+    assert equation_fills('*', None, None, 6, values) == [(1, 6), (2, 3), (3, 2), (6, 1)]
+    assert equation_fills('-', 4, 1, None, values) == [(3,)]
+    assert (2, 2, 4) in equation_fills('*', None, None, None, values)
+    assert equation_fills('*', None, 4, 2, values) == []
+
+def test_counts_match_brute_force():
+    """Test that solution counts agree with trying every fill on small puzzles."""
+    generator = PuzzleGenerator()
+    checked = 0
+    for difficulty in ('easy', 'medium'):
+        for seed in range(15):
+            puzzle = generator.generate_puzzle(difficulty, seed=seed)
+            if len(puzzle['numberBank']) > 8:
+                continue
+            assert count_solutions(puzzle, limit=100) == min(_brute_force(puzzle), 100)
+            checked += 1
+    assert checked >= 10
+
+def test_commutative_fill_is_ambiguous():
+    """Test that swapping the operands of `_ + _ = 7` counts as a second solution."""
+    equations = [_equation(0, 3, '+', 4, 7), _equation(2, 2, '*', 5, 10)]
+    solver = PuzzleSolver(equations, [(0, 0), (0, 2)], [3, 4])
+    assert solver.count_solutions() == 2
+    assert len(solver.solutions(limit=5)) == 2
+
+    # Giving the operand away leaves one fill
+    solver = PuzzleSolver(equations, [(0, 2), (2, 4)], [4, 10])
+    assert solver.is_unique()
+
+def test_rejects_mismatched_bank():
+    """Test that a bank that does not match the hidden cells is rejected."""
+    with pytest.raises(ValueError):
+        PuzzleSolver([_equation(0, 3, '+', 4, 7)], [(0, 0), (0, 2)], [3])
+
+def test_generate_unique_puzzles():
+    """Test that unique=True puzzles have one solution."""
+    generator = PuzzleGenerator()
+    for difficulty in ('easy', 'medium', 'hard'):
+        for seed in range(10):
+            puzzle = generator.generate_puzzle(difficulty, seed=seed, unique=True)
+            assert count_solutions(puzzle) == 1
+            assert len(puzzle['numberBank']) == len(hidden_cells(puzzle['grid']))
+            assert generator.generate_puzzle(difficulty, seed=seed, unique=True)['grid'] == puzzle['grid']
+
+def test_unique_puzzles_cached_apart():
+    """Test that unique and plain puzzles of one seed are cached under separate keys."""
+    generator = PuzzleGenerator(cache=PuzzleCache())
+    plain = generator.generate_puzzle('hard', seed=7)
+    unique = generator.generate_puzzle('hard', seed=7, unique=True)
+    assert generator.revealed > 0
+    assert unique['numberBank'] != plain['numberBank']
+    assert len(generator.cache) == 2
+
+    assert generator.generate_puzzle('hard', seed=7)['numberBank'] == plain['numberBank']
+    assert generator.generate_puzzle('hard', seed=7, unique=True)['numberBank'] == unique['numberBank']
+    assert generator.cache.hits == 2
+
+def test_generate_unique_large_grid():
+    """Test unique puzzles on a large grid, where values repeat more than 31 times in the bank."""
+    generator = PuzzleGenerator(50)
+    puzzle = generator.generate_puzzle('hard', seed=3, unique=True)
+    assert max(puzzle['numberBank'].count(value) for value in puzzle['numberBank']) > 31
+    assert count_solutions(puzzle) == 1
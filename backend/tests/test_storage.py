@@ -0,0 +1,179 @@
+import pytest
+from app.game.game_state import GameState, GameStateManager, Move
+from app.game.puzzle_generator import PuzzleGenerator
+from app.game.storage import GameStore, SQLiteGameStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteGameStore(str(tmp_path / 'games.db'))
+    yield store
+    store.close()
+
+def _puzzle():
+    return PuzzleGenerator(grid_size=11).generate_puzzle('easy', seed=7)
+
+def _open_cell_puzzle(number_bank):
+    """A one-cell puzzle whose only cell accepts any number."""
+    return {'grid': [[{'value': None, 'isEmpty': True, 'inEquation': True}]],
+            'equations': [], 'numberBank': number_bank}
+
+def test_incomplete_store_cannot_be_created():
+    """Test that a store missing part of the interface fails on creation."""
+    class LoadOnlyStore(GameStore):
+        def load(self, game_id):
+            return None
+
+    with pytest.raises(TypeError):
+        LoadOnlyStore()
+
+def test_store_uses_wal(store):
+    """Test that the SQLite store runs in WAL mode."""
+    assert store._connection().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+def test_record_round_trip(store):
+    """Test that a stored game loads back with the same state."""
+    puzzle = _puzzle()
+    game = GameState(puzzle['grid'], puzzle['equations'], puzzle['numberBank'], 'easy')
+    assert store.save_many([(game.to_record(), None)]) == []
+
+    loaded = GameState.from_record(store.load(game.id))
+    assert loaded.id == game.id
+    assert loaded.grid == game.grid
+    assert loaded.equations == game.equations
+    assert loaded.number_bank == game.number_bank
+    assert loaded.version == game.version
+    assert store.load('missing') is None
+
+def test_save_only_over_base_version(store):
+    """Test that a record is only written over the version its changes were based on."""
+    puzzle = _open_cell_puzzle([1, 2])
+    game = GameState(puzzle['grid'], puzzle['equations'], puzzle['numberBank'], 'easy')
+    assert store.save_many([(game.to_record(), None)]) == []
+    assert store.save_many([(game.to_record(), None)]) == [game.id]  # Already stored
+
+    game.validate_move(Move(0, 0, 1))
+    stale = game.to_record()
+    assert store.save_many([(game.to_record(), 0)]) == []
+    assert store.save_many([(stale, 0)]) == [game.id]
+    assert store.load_version(game.id) == 1
+
+def test_flush_writes_dirty_games_in_one_batch(store):
+    """Test that created and mutated games are written on flush."""
+    manager = GameStateManager(store=store)
+    games = [manager.create_game(_open_cell_puzzle([1]), 'easy') for _ in range(5)]
+    assert manager.flush() == 5
+    assert manager.flush() == 0  # Nothing dirty any more
+
+    games[0].validate_move(Move(0, 0, 1))
+    assert manager.flush() == 1
+    assert store.load_version(games[0].id) == 1
+
+def test_second_manager_serves_stored_game(store):
+    """Test that another worker sharing the store can load and follow a game."""
+    first = GameStateManager(store=store)
+    second = GameStateManager(store=store)
+    second.revalidate_interval = 0
+
+    game = first.create_game(_open_cell_puzzle([1, 2]), 'easy')
+    assert second.get_game(game.id) is None
+    first.flush()
+
+    loaded = second.get_game(game.id)
+    assert loaded is not None and loaded.version == 0
+
+    game.validate_move(Move(0, 0, 2))
+    first.flush()
+    refreshed = second.get_game(game.id)
+    assert refreshed.version == 1
+    assert refreshed.grid[0][0].value == 2
+    assert refreshed.number_bank == [1]
+
+def test_expired_games_are_not_loaded(store):
+    """Test that stale stored games are neither served nor kept."""
+    manager = GameStateManager(store=store)
+    game = manager.create_game(_open_cell_puzzle([1]), 'easy')
+    game.last_activity -= 7200
+    manager.flush()
+
+    assert GameStateManager(store=store).get_game(game.id) is None
+    assert store.delete_expired(game.last_activity + 1) == 1
+    assert store.load(game.id) is None
+
+def test_concurrent_moves_on_two_managers(tmp_path):
+    """Test that two workers moving one game from the same version do not both win."""
+    path = str(tmp_path / 'shared.db')
+    first_store, second_store = SQLiteGameStore(path), SQLiteGameStore(path)
+    first = GameStateManager(store=first_store)
+    second = GameStateManager(store=second_store)
+    try:
+        game = first.create_game(_open_cell_puzzle([1, 2]), 'easy')
+        first.flush()
+        copy = second.get_game(game.id)
+
+        # Both move the game from version 0 to 1
+        game.validate_move(Move(0, 0, 1))
+        copy.validate_move(Move(0, 0, 2))
+        assert game.etag != copy.etag
+        assert first.flush() == 1
+        assert second.flush() == 0
+
+        # The losing worker replays its move on the stored game
+        reloaded = second.get_game(game.id)
+        assert reloaded is not copy
+        assert reloaded.version == 2
+        assert reloaded.grid[0][0].value == 2
+        assert reloaded.number_bank == [1]
+        assert second.flush() == 1
+        assert GameState.from_record(first_store.load(game.id)).grid[0][0].value == 2
+
+        shard = second._shard_for(game.id)
+        assert [game_id for _, game_id in shard.expiry_heap] == [game.id]
+    finally:
+        first.close()
+        second.close()
+
+def test_replayed_move_that_no_longer_applies_is_logged(tmp_path, caplog):
+    """Test that a move made on a stale copy is dropped and logged when it conflicts."""
+    path = str(tmp_path / 'shared.db')
+    first = GameStateManager(store=SQLiteGameStore(path))
+    second = GameStateManager(store=SQLiteGameStore(path))
+    try:
+        game = first.create_game(_open_cell_puzzle([1, 2]), 'easy')
+        game.validate_move(Move(0, 0, 1))
+        first.flush()
+        copy = second.get_game(game.id)
+
+        game.clear_cell(0, 0)
+        first.flush()
+        copy.clear_cell(0, 0)  # Already cleared in the stored game
+        assert second.flush() == 0
+
+        reloaded = second.get_game(game.id)
+        assert reloaded.version == 2 and reloaded.grid[0][0].value is None
+        assert 'Dropped move' in caplog.text
+        assert second.flush() == 0  # Nothing left to write
+    finally:
+        first.close()
+        second.close()
+
+def test_revalidate_reloads_dirty_game(tmp_path):
+    """Test that a dirty cached game is reloaded once another worker stored a newer version."""
+    path = str(tmp_path / 'shared.db')
+    first = GameStateManager(store=SQLiteGameStore(path))
+    second = GameStateManager(store=SQLiteGameStore(path))
+    second.revalidate_interval = 0
+    try:
+        game = first.create_game(_open_cell_puzzle([1, 2]), 'easy')
+        first.flush()
+        copy = second.get_game(game.id)
+
+        game.validate_move(Move(0, 0, 1))
+        first.flush()
+        copy.validate_move(Move(0, 0, 2))  # Made on a stale copy, still dirty
+        reloaded = second.get_game(game.id)
+        assert (reloaded.version, reloaded.grid[0][0].value) == (2, 2)
+        assert second.flush() == 1
+        assert first.store.load_version(game.id) == 2
+    finally:
+        first.close()
+        second.close()